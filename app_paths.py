@@ -0,0 +1,13 @@
+import os
+
+# Everything PyPackManager stores on disk (caches, indexes, ...) lives here.
+# Set PYPACKMANAGER_HOME to use a different location.
+DEFAULT_DATA_DIR = os.path.join(os.path.expanduser("~"), ".pypackmanager")
+
+
+def data_dir(*parts):
+    """Return a directory inside the PyPackManager data folder, creating it if needed."""
+    base = os.environ.get("PYPACKMANAGER_HOME") or DEFAULT_DATA_DIR
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -1,208 +1,103 @@
 import os
-import sys
+import html
 import subprocess
 import platform
+from collections import deque
+from functools import partial
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QListWidget, QListWidgetItem,
+    QWidget, QVBoxLayout, QLabel, QListWidget, QListView,
     QHBoxLayout, QStackedWidget, QSplitter, QMessageBox, 
-    QFrame, QScrollArea, QProgressBar, QPushButton
+    QFrame, QScrollArea, QProgressBar, QPushButton, QDialog, QCheckBox
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from PyQt5.QtGui import QFont, QPixmap, QPainter, QColor
+from PyQt5.QtCore import Qt, QThread, QTimer, QFileSystemWatcher, pyqtSignal
+from PyQt5.QtGui import QFont, QPixmap, QPainter, QColor, QTextCursor
 
-from search_thread import PyPISearchThread
+from search_thread import PyPISearchThread, PackageIndexThread, recent_sort_key
+from metadata_cache import normalize_name
 from package_card import PackageCard
+from package_list import InstalledPackageModel, LibraryRole
+from icon_service import shared_icons, icon_file_name
+from icon_loader import IconLoader
+from detail_loader import DetailLoader
+from inventory import InventoryCache, scan_distributions, pip_version_text
+from install_manager import InstallManager, RUNNING, FAILED, SUCCEEDED
+from install_plan import InstallSet
+from downloader import shared_downloader, DownloadCancelled, DEFAULT_SEGMENTS, format_size
+from outdated_scanner import OutdatedScanThread
+from bulk_upgrade import submit_upgrade
+from wheel_store import shared_wheel_store
+from interpreters import (
+    InterpreterDiscoveryThread, current_interpreter, describe, is_current, same_path, shared_interpreter_registry
+)
+from disk_report import shared_counts
+from python_updates import CHECK_INTERVAL, PythonUpdateCheckThread, describe_update, shared_release_feed
 from ui.home_page import create_home_page
 from ui.search_page import create_search_results_page
 from ui.detail_page import create_library_detail_page
 from ui.placeholder_page import create_placeholder_page
+from ui.install_panel import create_install_panel, create_install_set_bar, create_offline_toggle
+from ui.install_plan_dialog import InstallPlanDialog
+from ui.disk_report_dialog import DiskReportDialog
+from ui.new_environment_dialog import NewEnvironmentDialog
+from ui.environment_bar import create_environment_bar
 import tempfile
-import urllib.request
 import subprocess
 import time
 import ctypes
 
+# Search-as-you-type: wait this long after the last keystroke before searching
+SEARCH_DEBOUNCE_MS = 250
+MIN_SEARCH_LENGTH = 2
+
+# An install touches site-packages many times; rescan once it has been quiet this long
+INVENTORY_REFRESH_DELAY_MS = 500
+
+# Long descriptions are painted progressively: about a screenful first,
+# then the rest in slices between events so input is never blocked
+DESCRIPTION_FIRST_CHARS = 6000
+DESCRIPTION_SLICE_CHARS = 12000
+
 # Thread to collect Python installation information
 class PythonInfoCollector(QThread):
     update_signal = pyqtSignal(dict)
+
+    def __init__(self, inventory=None, interpreter=None):
+        super().__init__()
+        self.inventory = inventory
+        self.interpreter = interpreter
     
     def run(self):
         info = {}
-        
-        # Get Python version
-        info['python_version'] = platform.python_version()
-        info['python_implementation'] = platform.python_implementation()
-        info['python_path'] = sys.executable
-        
-        # Get pip version
+        interpreter = self.interpreter or current_interpreter()
+        
+        # Version and location come from the interpreter's fingerprint, so it isn't started
+        info['python_version'] = interpreter.version
+        info['python_implementation'] = interpreter.implementation
+        info['python_path'] = interpreter.path
+        info['install_dir'] = interpreter.home
+        info['environment_dir'] = interpreter.prefix
+        info['environment_kind'] = interpreter.kind
+        
+        # Get installed packages (name, version, location, installer, size) and
+        # the pip version in-process, without starting pip
         try:
-            pip_version = subprocess.check_output([sys.executable, '-m', 'pip', '--version']).decode('utf-8').strip()
-            info['pip_version'] = pip_version
-        except Exception as e:
-            info['pip_version'] = f"Error retrieving pip version: {str(e)}"
-        
-        # Get installed packages with versions
-        try:
-            packages_output = subprocess.check_output([sys.executable, '-m', 'pip', 'list']).decode('utf-8').strip()
-            packages_lines = packages_output.split('\n')[2:]  # Skip header lines
-            package_info = []
-            for line in packages_lines:
-                parts = line.split()
-                if len(parts) >= 2:
-                    package_info.append({"name": parts[0], "version": parts[1]})
-                else:
-                    package_info.append({"name": parts[0], "version": "Unknown"})
-            
+            if self.inventory is not None:
+                # Only re-reads the distributions that changed since the last visit
+                package_info = self.inventory.refresh()
+            else:
+                package_info = scan_distributions(interpreter.site_dirs)
             info['installed_packages'] = package_info
             info['package_count'] = len(package_info)
+            # From the RECORD files; packages without one (.egg-info) aren't counted
+            info['installed_size'] = sum(package['size'] or 0 for package in package_info)
+            info['pip_version'] = pip_version_text(package_info, interpreter.version)
         except Exception as e:
             info['installed_packages'] = []
             info['package_count'] = 0
             info['packages_error'] = str(e)
+            info['pip_version'] = f"Error retrieving pip version: {str(e)}"
         
-        # Check for Python updates using the documentation versions API
-        info['has_update'] = False
-        info['update_version'] = ""
-        info['update_changes'] = ""
-        
-        try:
-            # Get current version details
-            current_version = info['python_version']
-            version_parts = current_version.split('.')
-            major_minor = f"{version_parts[0]}.{version_parts[1]}"  # e.g., "3.12"
-            
-            print(f"Checking for updates to Python {current_version} (major.minor: {major_minor})")
-            
-            try:
-                import urllib.request
-                import re
-                from datetime import datetime
-                
-                # Use Python's documentation versions page
-                python_versions_url = "https://www.python.org/doc/versions/"
-                print(f"Fetching data from: {python_versions_url}")
-                
-                with urllib.request.urlopen(python_versions_url) as response:
-                    html = response.read().decode()
-                    
-                    print(f"Received {len(html)} bytes of HTML data")
-                    
-                    # Extract version information using regex
-                    pattern = r'<li><a.*?>Python\s+(\d+\.\d+\.\d+)</a>,\s+documentation\s+released\s+on\s+(\d+\s+\w+\s+\d{4})\.</li>'
-                    version_matches = re.findall(pattern, html)
-                    
-                    print(f"Found {len(version_matches)} version matches")
-                    for vm in version_matches[:5]:  # Show first 5 for debugging
-                        print(f"  Version: {vm[0]}, Released: {vm[1]}")
-                    
-                    if version_matches:
-                        # Filter versions to include only those from the same major.minor series
-                        filtered_versions = [v for v, d in version_matches if v.startswith(major_minor)]
-                        
-                        print(f"Filtered to {len(filtered_versions)} versions for {major_minor} series: {filtered_versions}")
-                        
-                        if filtered_versions:
-                            # Find the latest version in the same major.minor series
-                            latest_version = max(filtered_versions, key=lambda v: [int(x) for x in v.split('.')])
-                            
-                            print(f"Latest version in {major_minor} series: {latest_version}")
-                            print(f"Comparing: current={current_version}, latest={latest_version}")
-                            
-                            # Check if this version is newer than the current one
-                            if self._version_greater_than(latest_version, current_version):
-                                print(f"Update available: {latest_version} > {current_version}")
-                                info['has_update'] = True
-                                info['update_version'] = latest_version
-                                
-                                # Get the release date of this version
-                                release_date_str = "recently"
-                                for version, date_str in version_matches:
-                                    if version == latest_version:
-                                        release_date_str = date_str
-                                        break
-                                
-                                # Create update message
-                                info['update_changes'] = f"""
-                                Python {latest_version} is available!
-                                
-                                This release was published on {release_date_str} and contains bug fixes and improvements over your current version.
-                                
-                                Visit https://docs.python.org/release/{latest_version}/ for documentation.
-                                Visit https://www.python.org/downloads/release/python-{latest_version.replace('.', '')}/ for download information.
-                                """
-                            else:
-                                print(f"No update needed: {latest_version} <= {current_version}")
-                        else:
-                            print(f"No versions found for {major_minor} series")
-                    else:
-                        print("No version matches found in HTML")
-            except Exception as e:
-                print(f"Error during update check: {str(e)}")
-                info['update_error'] = str(e)
-                    
-        except Exception as e:
-            print(f"Outer error in update check: {str(e)}")
-            info['update_error'] = str(e)
-        
-        # Look for Python installation directory
-        if platform.system() == 'Windows':
-            # Check for Python in standard locations
-            python_version_no_dots = info['python_version'].split('.')
-            python_version_folder = f"Python{python_version_no_dots[0]}{python_version_no_dots[1]}"
-            python_install_dir = f"C:\\{python_version_folder}"
-            
-            if os.path.exists(python_install_dir):
-                info['install_dir'] = python_install_dir
-            else:
-                # Try to determine install directory from executable path
-                try:
-                    info['install_dir'] = os.path.dirname(sys.executable)
-                except:
-                    info['install_dir'] = "Unknown"
-        else:
-            # For non-Windows systems
-            info['install_dir'] = os.path.dirname(sys.executable)
-            
-        # Force an update to be visible for testing
-        if not info['has_update']:
-            print("Adding a forced test update for demonstration")
-            info['has_update'] = True
-            info['update_version'] = "3.12.10"  # From the API HTML you provided
-            info['update_changes'] = """
-            Python 3.12.10 is available!
-            
-            This release was published on 8 April 2025 and contains bug fixes and improvements over your current version.
-            
-            Visit https://docs.python.org/release/3.12.10/ for documentation.
-            Visit https://www.python.org/downloads/release/python-31210/ for download information.
-            """
-            
         self.update_signal.emit(info)
-    
-    def _version_greater_than(self, version1, version2):
-        """Compare version strings to determine if version1 > version2."""
-        print(f"Comparing versions: {version1} vs {version2}")
-        v1_parts = [int(x) for x in version1.split('.')]
-        v2_parts = [int(x) for x in version2.split('.')]
-        
-        # Pad shorter version with zeros
-        while len(v1_parts) < len(v2_parts):
-            v1_parts.append(0)
-        while len(v2_parts) < len(v1_parts):
-            v2_parts.append(0)
-        
-        result = False    
-        for i in range(len(v1_parts)):
-            if v1_parts[i] > v2_parts[i]:
-                result = True
-                break
-            elif v1_parts[i] < v2_parts[i]:
-                result = False
-                break
-                
-        print(f"  Result: {version1} > {version2} = {result}")
-        return result
-
 
 
 class PyPackManager(QWidget):
@@ -249,16 +144,96 @@ class PyPackManager(QWidget):
             # Save the default Python icon
             pixmap.save(self.default_icon_path)
 
+        # Fetch real project logos in the background
+        self.icon_loader = IconLoader(parent=self)
+        self.icon_loader.icon_ready.connect(self.refresh_package_icon)
+        shared_icons().loader = self.icon_loader
+        self.detail_library = None
+
+        # Long descriptions, release lists and classifiers are only loaded
+        # for the detail page (prefetched when a result is hovered)
+        self.detail_loader = DetailLoader(parent=self)
+        self.detail_loader.details_ready.connect(self.show_library_details)
+        self.detail_loader.error_occurred.connect(self.show_library_details_error)
+        self.description_blocks = deque()  # Blocks of the shown description not painted yet
+        self.description_generation = 0
+
+        # Environments found on earlier runs are listed right away; discovery
+        # refreshes the list in the background. The last one picked is shown first.
+        self.interpreter_registry = shared_interpreter_registry()
+        self.target_interpreter = self.interpreter_registry.last_used() or current_interpreter()
+        self.environment_thread = None
+        self.inventories = {}  # Interpreter path -> InventoryCache, so switching back doesn't rescan
+        self.python_infos = {}  # Interpreter path -> last collected info
+        self.disk_report = None  # Last DiskReport, for marking packages shared with other environments
+
+        # Installed packages are scanned incrementally, and only again after
+        # something in site-packages changed (install, upgrade, uninstall)
+        self.inventory = self.inventory_for(self.target_interpreter)
+        self.python_info = None
+        self.outdated_thread = None
+        self.outdated_scanning = False
+        self.site_packages_watcher = QFileSystemWatcher(self.inventory.directories(), self)
+        self.site_packages_watcher.directoryChanged.connect(self.site_packages_changed)
+        self.inventory_refresh_timer = QTimer(self)
+        self.inventory_refresh_timer.setSingleShot(True)
+        self.inventory_refresh_timer.setInterval(INVENTORY_REFRESH_DELAY_MS)
+        self.inventory_refresh_timer.timeout.connect(self.refresh_visible_inventory)
+
+        # Python updates are looked up on their own schedule, apart from the inventory scan;
+        # the release list is cached, so most checks don't touch the network
+        self.python_updates = {}  # Interpreter path -> newer Release, or None when up to date
+        self.python_update_thread = None
+        self.python_update_timer = QTimer(self)
+        self.python_update_timer.setInterval(CHECK_INTERVAL * 1000)
+        self.python_update_timer.timeout.connect(self.check_python_updates)
+        self.python_update_timer.start()
+
+        # pip runs in the background, queued per environment
+        self.target_python = self.target_interpreter.path
+        self.install_manager = InstallManager(parent=self)
+        # Build machines can start in offline mode with PYPACKMANAGER_OFFLINE=1
+        self.install_manager.offline = os.environ.get("PYPACKMANAGER_OFFLINE") == "1"
+        self.install_manager.job_added.connect(self.update_install_status)
+        self.install_manager.job_changed.connect(self.update_install_status)
+        self.install_manager.job_finished.connect(self.install_finished)
+        self.shown_install_job = None
+
+        # Packages picked in the result lists, installed together in one pip run
+        self.install_set = InstallSet(self)
+        self.install_set.changed.connect(self.update_install_set_bar)
+
         # Initialize empty libraries
         self.recent_libraries = []
         self.trending_libraries = []
         self.search_results = []
         
+        # (sort key, library) pairs for the home page cards currently on screen
+        self.shown_recent_libraries = []
+        self.shown_trending_libraries = []
+        
+        # Search-as-you-type state
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.search_package)
+        self.current_search_query = ""
+        self.loaded_search_libraries = {}  # Normalized name -> library, reused while a query is extended
+        self.cancelled_search_threads = set()  # Kept alive until they wind down
+        self.detail_threads = set()  # Threads loading details for rows scrolled into view
+        
+        # Keystroke-to-results latency instrumentation
+        self.last_keystroke_time = None
+        self.search_started_at = None
+        self.first_result_latency = None
+        self.search_latencies = deque(maxlen=100)  # (query, first result ms, all results ms)
+        
         # Thread management
         self.recent_thread = None
         self.trending_thread = None
         self.search_thread = None
         self.python_info_thread = None
+        self.index_thread = None
 
         main_layout = QHBoxLayout(self)
         main_layout.setContentsMargins(0, 0, 0, 0)
@@ -311,6 +286,14 @@ class PyPackManager(QWidget):
         
         sidebar_layout.addWidget(self.sidebar)
         sidebar_layout.addStretch()
+
+        # Selected packages and progress of background installs
+        self.install_set_bar = create_install_set_bar(self)
+        sidebar_layout.addWidget(self.install_set_bar)
+        self.install_panel = create_install_panel(self)
+        sidebar_layout.addWidget(self.install_panel)
+        sidebar_layout.addWidget(create_offline_toggle(self))
+        self.update_offline_tooltip()
         
         # App version at bottom of sidebar
         version_label = QLabel("PyPackManager v1.0")
@@ -356,6 +339,7 @@ class PyPackManager(QWidget):
         # Fetch initial data
         self.fetch_recent_libraries()
         self.fetch_trending_libraries()
+        self.update_package_index()
     
     def create_python_info_page(self):
         """Create the My Python page with Python environment information."""
@@ -370,6 +354,10 @@ class PyPackManager(QWidget):
         title_label.setStyleSheet("color: white; margin-bottom: 10px;")
         layout.addWidget(title_label)
         
+        # Environment switcher, filled from the interpreter registry
+        layout.addWidget(create_environment_bar(self))
+        self.update_environment_list(self.interpreter_registry.interpreters())
+        
         # Loading indicator
         self.python_loading_container = QHBoxLayout()
         self.python_loading_label = QLabel("Collecting Python environment information...")
@@ -536,6 +524,7 @@ class PyPackManager(QWidget):
         packages_layout = QVBoxLayout(packages_frame)
         packages_layout.setSpacing(15)
         
+        self.installed_package_model = InstalledPackageModel(parent=self)
         packages_header = QHBoxLayout()
         packages_header.setSpacing(10)
         
@@ -548,37 +537,73 @@ class PyPackManager(QWidget):
         self.packages_count_label.setFont(QFont("Segoe UI", 14))
         self.packages_count_label.setStyleSheet("color: #888;")
         packages_header.addWidget(self.packages_count_label)
+        packages_header.addStretch()
+        
+        # Outdated view: checks every installed package against PyPI
+        self.outdated_status_label = QLabel()
+        self.outdated_status_label.setStyleSheet("color: #888; font-size: 13px;")
+        packages_header.addWidget(self.outdated_status_label)
+        
+        self.outdated_only_checkbox = QCheckBox("Outdated only")
+        self.outdated_only_checkbox.setStyleSheet("color: #ddd; font-size: 13px;")
+        self.outdated_only_checkbox.setEnabled(False)
+        self.outdated_only_checkbox.toggled.connect(self.installed_package_model.set_outdated_only)
+        packages_header.addWidget(self.outdated_only_checkbox)
+        
+        self.check_outdated_button = QPushButton("Check for Updates")
+        self.check_outdated_button.setCursor(Qt.PointingHandCursor)
+        self.check_outdated_button.setStyleSheet("""
+            QPushButton {
+                padding: 6px 14px;
+                font-size: 13px;
+                background-color: #0078d7;
+                color: white;
+                border-radius: 4px;
+                border: none;
+            }
+            QPushButton:hover {
+                background-color: #005fa3;
+            }
+            QPushButton:disabled {
+                background-color: #444;
+                color: #aaa;
+            }
+        """)
+        self.check_outdated_button.clicked.connect(self.check_outdated_packages)
+        packages_header.addWidget(self.check_outdated_button)
+        
+        # Upgrades the selected outdated packages, or all of them, in one job
+        self.upgrade_button = QPushButton("Upgrade All")
+        self.upgrade_button.setCursor(Qt.PointingHandCursor)
+        self.upgrade_button.setStyleSheet(self.check_outdated_button.styleSheet())
+        self.upgrade_button.setEnabled(False)
+        self.upgrade_button.clicked.connect(self.upgrade_outdated_packages)
+        packages_header.addWidget(self.upgrade_button)
         
         packages_layout.addLayout(packages_header)
         
-        # Create a table-like view for packages with versions
-        self.package_list = QListWidget()
-        self.package_list.setFrameShape(QListWidget.NoFrame)
+        # List of packages with versions; rows are created as they scroll into view
+        self.package_list = QListView()
+        self.package_list.setModel(self.installed_package_model)
+        self.package_list.setUniformItemSizes(True)
+        self.package_list.setFrameShape(QListView.NoFrame)
         self.package_list.setFont(QFont("Segoe UI", 13))
+        self.package_list.setSelectionMode(QListView.ExtendedSelection)
         self.package_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: transparent;
                 color: #ddd;
                 border: none;
                 padding: 5px;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 8px 5px;
                 border-bottom: 1px solid #333;
             }
-            QListWidget::item:hover {
+            QListView::item:hover {
                 background-color: #333;
                 border-radius: 4px;
             }
-        """)
-        
-        packages_scroll = QScrollArea()
-        packages_scroll.setWidgetResizable(True)
-        packages_scroll.setStyleSheet("""
-            QScrollArea {
-                border: none;
-                background: transparent;
-            }
             QScrollBar:vertical {
                 border: none;
                 background: #333;
@@ -598,10 +623,11 @@ class PyPackManager(QWidget):
                 background: none;
             }
         """)
-        packages_scroll.setWidget(self.package_list)
-        packages_scroll.setFixedHeight(300)  # Increase height for more packages to be visible
+        self.package_list.setFixedHeight(300)  # Increase height for more packages to be visible
+        self.package_list.selectionModel().selectionChanged.connect(self.update_upgrade_button)
+        self.installed_package_model.modelReset.connect(self.update_upgrade_button)
         
-        packages_layout.addWidget(packages_scroll)
+        packages_layout.addWidget(self.package_list)
         
         python_info_layout.addWidget(packages_frame)
         
@@ -615,44 +641,83 @@ class PyPackManager(QWidget):
         return page
 
     
+    def schedule_search(self, text):
+        """Start a search once the user pauses typing in either search box."""
+        # Keep both search boxes showing the same text
+        if self.sender() is not self.search_box:
+            self.search_box.setText(text)
+        if self.sender() is not self.results_search_box:
+            self.results_search_box.setText(text)
+        
+        if len(text.strip()) < MIN_SEARCH_LENGTH:
+            self.search_timer.stop()
+            return
+            
+        self.last_keystroke_time = time.perf_counter()
+        self.search_timer.start()  # Restarts the countdown on every keystroke
+
     def search_package(self):
+        self.search_timer.stop()
         query = self.search_box.text().strip()
         if not query:
             return
+        if query == self.current_search_query and self.search_thread and self.search_thread.isRunning():
+            return  # Already searching for this
+            
+        # Measure latency from the keystroke that led to this search
+        self.search_started_at = self.last_keystroke_time or time.perf_counter()
+        self.last_keystroke_time = None
+        self.first_result_latency = None
+        
+        # Reuse packages already loaded when the user extends the previous query
+        if not (self.current_search_query and query.lower().startswith(self.current_search_query.lower())):
+            self.loaded_search_libraries = {}
+        self.current_search_query = query
             
         # Update the search results title
         self.search_results_title.setText(f"Search Results for '{query}'")
         
-        # Show loading placeholder
-        for i in reversed(range(self.search_results_layout.count())): 
-            widget = self.search_results_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-            
-        loading_label = QLabel("Searching PyPI...")
-        loading_label.setAlignment(Qt.AlignCenter)
-        loading_label.setStyleSheet("color: #888; padding: 40px; background-color: #2a2a2a; border-radius: 8px;")
-        self.search_results_layout.addWidget(loading_label)
+        # Show loading message
+        self.search_results_model.clear()
+        self.show_search_status("Searching PyPI...")
+        self.search_results = []
         
-        # Create and start search thread
+        # Cancel the superseded search; it stops at its next checkpoint
         if self.search_thread and self.search_thread.isRunning():
-            self.search_thread.terminate()
-            self.search_thread.wait()
+            old_thread = self.search_thread
+            old_thread.cancel()
+            self.cancelled_search_threads.add(old_thread)
+            old_thread.finished.connect(lambda: self.cancelled_search_threads.discard(old_thread))
             
-        self.search_thread = PyPISearchThread(query, "search")
+        self.search_thread = PyPISearchThread(query, "search", incremental=True, known=dict(self.loaded_search_libraries))
+        self.search_thread.names_ready.connect(self.show_search_names)
+        self.search_thread.package_ready.connect(self.add_search_result)
         self.search_thread.result_ready.connect(self.update_search_results)
         self.search_thread.error_occurred.connect(self.show_search_error)
         self.search_thread.start()
         
-        # Switch to search results page
+        # Switch to search results page, keeping the keyboard focus in a search box
+        typing = self.search_box.hasFocus()
         self.stack.setCurrentIndex(6)
+        if typing:
+            self.results_search_box.setFocus()
+            self.results_search_box.end(False)
+
+    def record_search_latency(self, query, result_count):
+        total_ms = (time.perf_counter() - self.search_started_at) * 1000
+        first_ms = self.first_result_latency
+        self.search_latencies.append((query, first_ms, total_ms))
+        
+        first_text = f"{first_ms:.0f} ms" if first_ms is not None else "n/a"
+        print(f"Search '{query}': first result after {first_text}, {result_count} results after {total_ms:.0f} ms")
 
     def fetch_recent_libraries(self):
         # Create and start recent libraries thread
         if self.recent_thread and self.recent_thread.isRunning():
             return
             
-        self.recent_thread = PyPISearchThread("", "recent")
+        self.recent_thread = PyPISearchThread("", "recent", incremental=True)
+        self.recent_thread.package_ready.connect(self.add_recent_library)
         self.recent_thread.result_ready.connect(self.update_recent_libraries)
         self.recent_thread.error_occurred.connect(self.show_recent_error)
         self.recent_thread.start()
@@ -662,58 +727,126 @@ class PyPackManager(QWidget):
         if self.trending_thread and self.trending_thread.isRunning():
             return
             
-        self.trending_thread = PyPISearchThread("", "trending")
+        self.trending_thread = PyPISearchThread("", "trending", incremental=True)
+        self.trending_thread.package_ready.connect(self.add_trending_library)
         self.trending_thread.result_ready.connect(self.update_trending_libraries)
         self.trending_thread.error_occurred.connect(self.show_trending_error)
         self.trending_thread.start()
 
+    def create_package_card(self, library):
+        package_card = PackageCard(library, self.install_set)
+        package_card.package_clicked.connect(self.show_library_detail)
+        package_card.package_hovered.connect(self.prefetch_library_detail)
+        package_card.install_clicked.connect(self.install_package)
+        package_card.setMinimumHeight(90)  # Set minimum height for consistency
+        package_card.setMaximumHeight(120)  # Set maximum height for consistency
+        return package_card
+
+    def insert_library_card(self, layout, shown, library, sort_key, offset=0, reverse=False):
+        """Insert a card for a library that just arrived, keeping the cards sorted.
+
+        ``shown`` holds (sort_key, library) pairs for the cards already in
+        ``layout``, which start at layout index ``offset``.
+        """
+        index = len(shown)
+        for i, (key, _) in enumerate(shown):
+            if (sort_key > key) if reverse else (sort_key < key):
+                index = i
+                break
+        
+        shown.insert(index, (sort_key, library))
+        layout.insertWidget(offset + index, self.create_package_card(library))
+
+    def show_search_status(self, message, error=False):
+        color = "#ff5555" if error else "#888"
+        self.search_status_label.setText(message)
+        self.search_status_label.setStyleSheet(f"color: {color}; padding: 40px; background-color: #2a2a2a; border-radius: 8px;")
+        self.search_status_label.setVisible(True)
+
+    def show_search_names(self, names):
+        # Ranked names from the package index; details fill in as they load
+        if self.sender() is not self.search_thread:
+            return
+            
+        self.search_results_model.set_names(names)
+        if names:
+            self.search_status_label.setVisible(False)
+
+    def add_search_result(self, position, library):
+        # Ignore packages from a search that has since been replaced
+        if self.sender() is not self.search_thread:
+            return
+            
+        self.search_status_label.setVisible(False)
+            
+        if self.first_result_latency is None:
+            self.first_result_latency = (time.perf_counter() - self.search_started_at) * 1000
+        
+        self.loaded_search_libraries[normalize_name(library["name"])] = library
+        self.search_results_model.add_library(position, library)
+
+    def load_search_result_details(self, names):
+        """Fetch details for result rows that have just scrolled into view."""
+        thread = PyPISearchThread(
+            "", "packages", incremental=True,
+            known=dict(self.loaded_search_libraries), package_names=names
+        )
+        thread.package_ready.connect(self.add_search_result_details)
+        thread.result_ready.connect(
+            lambda packages: self.search_results_model.mark_unavailable(
+                set(names) - {package["name"] for package in packages}
+            )
+        )
+        self.detail_threads.add(thread)
+        thread.finished.connect(lambda: self.detail_threads.discard(thread))
+        thread.start()
+
+    def add_search_result_details(self, position, library):
+        self.loaded_search_libraries[normalize_name(library["name"])] = library
+        self.search_results_model.update_library(library)
+
+    def update_package_index(self):
+        # Build or refresh the local index of PyPI project names used by search
+        if self.index_thread and self.index_thread.isRunning():
+            return
+            
+        self.index_thread = PackageIndexThread()
+        self.index_thread.index_ready.connect(lambda count: print(f"Package index ready: {count} projects"))
+        self.index_thread.error_occurred.connect(lambda error: print(f"Error updating package index: {error}"))
+        self.index_thread.start()
+
     def update_search_results(self, packages):
+        if self.sender() is not self.search_thread:
+            return
+            
         self.search_results = packages
+        self.record_search_latency(self.current_search_query, len(packages))
         
-        # Clear current layout
-        for i in reversed(range(self.search_results_layout.count())): 
-            widget = self.search_results_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-        
-        # Add results or no results message
-        if packages:
-            for library in packages:
-                package_card = PackageCard(library)
-                package_card.package_clicked.connect(self.show_library_detail)
-                package_card.setMinimumHeight(90)  # Set minimum height for consistency
-                package_card.setMaximumHeight(120)  # Set maximum height for consistency
-                self.search_results_layout.addWidget(package_card)
-        else:
-            no_results = QLabel(f"No packages found for '{self.search_box.text()}'")
-            no_results.setAlignment(Qt.AlignCenter)
-            no_results.setStyleSheet("color: #888; padding: 40px; background-color: #2a2a2a; border-radius: 8px;")
-            self.search_results_layout.addWidget(no_results)
+        # Rows were added as packages arrived; only the empty case is left
+        if self.search_results_model.rowCount() == 0:
+            self.show_search_status(f"No packages found for '{self.search_box.text()}'")
+
+    def add_recent_library(self, position, library):
+        # Clear the placeholder when the first card arrives
+        if self.recent_placeholder:
+            self.recent_placeholder.setParent(None)
+            self.recent_placeholder = None
+        
+        # Keep the title label at index 0; newest packages first
+        self.insert_library_card(
+            self.recent_layout, self.shown_recent_libraries, library,
+            recent_sort_key(library), offset=1, reverse=True
+        )
 
     def update_recent_libraries(self, packages):
         self.recent_libraries = packages
         
-        # Clear current recent layout except for the label
         if self.recent_placeholder:
             self.recent_placeholder.setParent(None)
             self.recent_placeholder = None
         
-        # Remove any existing package cards
-        for i in reversed(range(self.recent_layout.count())):
-            if i > 0:  # Keep the title label
-                widget = self.recent_layout.itemAt(i).widget()
-                if widget:
-                    widget.setParent(None)
-        
-        # Add the library cards or a message
-        if packages:
-            for library in packages:
-                package_card = PackageCard(library)
-                package_card.package_clicked.connect(self.show_library_detail)
-                package_card.setMinimumHeight(90)  # Set minimum height for consistency
-                package_card.setMaximumHeight(120)  # Set maximum height for consistency
-                self.recent_layout.addWidget(package_card)
-        else:
+        # Cards were added as packages arrived; only the empty case is left
+        if not self.shown_recent_libraries:
             no_packages = QLabel("No recent libraries found")
             no_packages.setAlignment(Qt.AlignCenter)
             no_packages.setStyleSheet("color: #888; padding: 20px; background-color: #2a2a2a; border-radius: 8px;")
@@ -722,30 +855,26 @@ class PyPackManager(QWidget):
         # Check if both recent and trending are loaded
         self.check_data_loading_complete()
 
+    def add_trending_library(self, position, library):
+        # Clear the placeholder when the first card arrives
+        if self.trending_placeholder:
+            self.trending_placeholder.setParent(None)
+            self.trending_placeholder = None
+        
+        # Keep the title label at index 0
+        self.insert_library_card(
+            self.trending_layout, self.shown_trending_libraries, library, position, offset=1
+        )
+
     def update_trending_libraries(self, packages):
         self.trending_libraries = packages
         
-        # Clear current trending layout except for the label
         if self.trending_placeholder:
             self.trending_placeholder.setParent(None)
             self.trending_placeholder = None
         
-        # Remove any existing package cards
-        for i in reversed(range(self.trending_layout.count())):
-            if i > 0:  # Keep the title label
-                widget = self.trending_layout.itemAt(i).widget()
-                if widget:
-                    widget.setParent(None)
-        
-        # Add the library cards or a message
-        if packages:
-            for library in packages:
-                package_card = PackageCard(library)
-                package_card.package_clicked.connect(self.show_library_detail)
-                package_card.setMinimumHeight(90)  # Set minimum height for consistency
-                package_card.setMaximumHeight(120)  # Set maximum height for consistency
-                self.trending_layout.addWidget(package_card)
-        else:
+        # Cards were added as packages arrived; only the empty case is left
+        if not self.shown_trending_libraries:
             no_packages = QLabel("No trending libraries found")
             no_packages.setAlignment(Qt.AlignCenter)
             no_packages.setStyleSheet("color: #888; padding: 20px; background-color: #2a2a2a; border-radius: 8px;")
@@ -761,7 +890,27 @@ class PyPackManager(QWidget):
                 self.loading_indicator.hide()
                 self.progress_bar.hide()
 
+    def refresh_package_icon(self, file_name):
+        """Swap a newly downloaded logo into every place it is shown."""
+        shared_icons().icon_changed(file_name)
+        
+        for layout in (self.recent_layout, self.trending_layout):
+            for i in range(layout.count()):
+                widget = layout.itemAt(i).widget()
+                if isinstance(widget, PackageCard) and icon_file_name(widget.library) == file_name:
+                    widget.refresh_icon()
+        
+        # List rows are painted on demand; repaint the visible ones
+        self.search_results_view.viewport().update()
+        
+        if self.detail_library and icon_file_name(self.detail_library) == file_name:
+            self.detail_icon.setPixmap(
+                shared_icons().package_icon(self.detail_library, 80, self.detail_icon.devicePixelRatioF())
+            )
+
     def show_library_detail(self, library):
+        self.detail_library = library
+        
         # Update the detail page with the library's information
         self.detail_name.setText(library["name"])
         self.detail_developer.setText(f"Developed by: {library['developer']}")
@@ -782,116 +931,226 @@ class PyPackManager(QWidget):
         
         # Add some placeholder tags based on library name
         if "py" in library["name"].lower():
-            tag = QLabel("Python")
-            tag.setStyleSheet("""
-                background-color: #3776AB;
-                color: white;
-                font-size: 12px;
-                padding: 4px 10px;
-                border-radius: 12px;
-            """)
-            self.detail_tags.addWidget(tag)
+            self.add_detail_tag("Python", "#3776AB")
         
         if "data" in library["description"].lower():
-            tag = QLabel("Data Science")
-            tag.setStyleSheet("""
-                background-color: #44A833;
-                color: white;
-                font-size: 12px;
-                padding: 4px 10px;
-                border-radius: 12px;
-            """)
-            self.detail_tags.addWidget(tag)
+            self.add_detail_tag("Data Science", "#44A833")
         
         if "web" in library["description"].lower():
-            tag = QLabel("Web")
-            tag.setStyleSheet("""
-                background-color: #E44D26;
-                color: white;
-                font-size: 12px;
-                padding: 4px 10px;
-                border-radius: 12px;
-            """)
-            self.detail_tags.addWidget(tag)
-        
-        # Format description for HTML display
-        description = library["long_desc"].replace("\n", "<br>")
-        # Basic formatting for reStructuredText or Markdown
-        description = description.replace("**", "<b>").replace("**", "</b>")
-        description = description.replace("*", "<i>").replace("*", "</i>")
-        description = description.replace("# ", "<h3>").replace("\n#", "</h3>\n")
-        
-        self.detail_description.setHtml(description)
+            self.add_detail_tag("Web", "#E44D26")
         
         # Update the library icon
         icon_size = 80
-        icon_path = os.path.join(self.icons_dir, library["icon"])
-        
-        if os.path.exists(icon_path):
-            pixmap = QPixmap(icon_path).scaled(icon_size, icon_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        else:
-            # Create a custom icon
-            pixmap = QPixmap(icon_size, icon_size)
-            pixmap.fill(Qt.transparent)
-            
-            painter = QPainter(pixmap)
-            painter.setRenderHint(QPainter.Antialiasing)
-            
-            # Draw colored circle based on first letter
-            first_letter = library["name"][0].upper()
-            
-            # Different colors for different letters (same as in PackageCard)
-            color_map = {
-                'A': "#FF5733", 'B': "#33FF57", 'C': "#3357FF", 'D': "#F033FF", 
-                'E': "#33FFF0", 'F': "#FF3355", 'G': "#FFFF33", 'H': "#33FFFF",
-                'I': "#FF33FF", 'J': "#33FF33", 'K': "#3333FF", 'L': "#FF3333",
-                'M': "#33FFAA", 'N': "#AA33FF", 'O': "#FFAA33", 'P': "#3377FF",
-                'Q': "#FF7733", 'R': "#33FF77", 'S': "#7733FF", 'T': "#FF33AA",
-                'U': "#33FFAA", 'V': "#AA33FF", 'W': "#FFAA33", 'X': "#33AAFF",
-                'Y': "#FFAA33", 'Z': "#33AAFF"
-            }
-            
-            color = color_map.get(first_letter, "#3776AB")  # Default to Python blue
-            
-            painter.setBrush(QColor(color))
-            painter.setPen(Qt.NoPen)
-            painter.drawEllipse(0, 0, icon_size, icon_size)
-            
-            # Draw first letter
-            painter.setPen(Qt.white)
-            painter.setFont(QFont("Arial", 28, QFont.Bold))
-            painter.drawText(pixmap.rect(), Qt.AlignCenter, first_letter)
-            painter.end()
-        
+        pixmap = shared_icons().package_icon(library, icon_size, self.detail_icon.devicePixelRatioF())
         self.detail_icon.setPixmap(pixmap)
         
         # Update version dropdown
         self.detail_version.clear()
         self.detail_version.addItems(library["versions"])
+        self.update_detail_install_button()
+        
+        # The description and the other versions come from the detail loader
+        details = self.detail_loader.get(library["name"])
+        if details is not None:
+            self.show_library_details(normalize_name(library["name"]), details)
+        else:
+            self.set_description_message("Loading description...")
+            self.detail_loader.request(library["name"])
         
         # Show the detail page
         self.stack.setCurrentIndex(5)  # Index of the detail page in stack
 
+    def add_detail_tag(self, text, color):
+        tag = QLabel(text)
+        tag.setStyleSheet(f"""
+            background-color: {color};
+            color: white;
+            font-size: 12px;
+            padding: 4px 10px;
+            border-radius: 12px;
+        """)
+        self.detail_tags.addWidget(tag)
+
+    def prefetch_library_detail(self, library):
+        self.detail_loader.request(library["name"])
+
+    def prefetch_search_result_detail(self, index):
+        library = index.data(LibraryRole)
+        if library is not None:
+            self.detail_loader.request(library["name"])
+
+    def show_library_details(self, key, details):
+        """Fill in the parts of the detail page that are loaded on demand."""
+        if self.detail_library is None or normalize_name(self.detail_library["name"]) != key:
+            return  # Prefetched, or the page has moved on to another package
+
+        self.show_description(details["description_blocks"])
+
+        # Every release instead of the newest few, keeping the selection
+        selected = self.detail_version.currentText()
+        self.detail_version.clear()
+        self.detail_version.addItems(details["versions"] or self.detail_library["versions"])
+        if selected in details["versions"]:
+            self.detail_version.setCurrentText(selected)
+
+        for classifier in details["classifiers"]:
+            if classifier.startswith("Framework :: ") and classifier.count("::") == 1:
+                self.add_detail_tag(classifier.split("::")[1].strip(), "#6f42c1")
+
+    def show_description(self, blocks):
+        """Paint the first screenful of a rendered description now and the rest in slices."""
+        self.description_generation += 1
+        self.description_blocks = deque(blocks)
+        self.detail_description.setHtml(self.take_description_slice(DESCRIPTION_FIRST_CHARS))
+        if self.description_blocks:
+            QTimer.singleShot(0, partial(self.append_description_slice, self.description_generation))
+
+    def take_description_slice(self, size):
+        parts, length = [], 0
+        while self.description_blocks and (not parts or length < size):
+            block = self.description_blocks.popleft()
+            parts.append(block)
+            length += len(block)
+        return "".join(parts)
+
+    def append_description_slice(self, generation):
+        if generation != self.description_generation:
+            return  # Another description (or message) replaced this one
+        cursor = QTextCursor(self.detail_description.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertHtml(self.take_description_slice(DESCRIPTION_SLICE_CHARS))
+        if self.description_blocks:
+            QTimer.singleShot(0, partial(self.append_description_slice, generation))
+
+    def set_description_message(self, message):
+        self.description_generation += 1
+        self.description_blocks.clear()
+        self.detail_description.setHtml(f"<p style='color: #888;'>{message}</p>")
+
+    def show_library_details_error(self, key, message):
+        if self.detail_library is not None and normalize_name(self.detail_library["name"]) == key:
+            self.set_description_message(f"Could not load the description: {html.escape(message)}")
+
+    def install_package(self, library, version=None):
+        """Queue a pip install of ``library`` (the latest version unless one is given)."""
+        requirement = f"{library['name']}=={version}" if version else library["name"]
+        if any(job.involves(library["name"]) for job in self.install_manager.active_jobs()):
+            return  # Already queued or running
+        self.install_manager.submit([requirement], python=self.target_python)
+
+    def install_detail_library(self):
+        if self.detail_library is not None:
+            self.install_package(self.detail_library, self.detail_version.currentText() or None)
+
+    def update_install_set_bar(self):
+        count = len(self.install_set)
+        self.install_set_label.setText(f"{count} package{'s' if count != 1 else ''} selected")
+        self.install_set_bar.setVisible(count > 0)
+
+    def review_install_set(self):
+        """Resolve the selected packages together and confirm before installing them in one pip run."""
+        if len(self.install_set):
+            InstallPlanDialog(self.install_set, self.install_manager, self.target_python, self.inventory, self).open()
+
+    def set_offline_mode(self, offline):
+        """Install only from the wheel cache (pip --no-index) from now on."""
+        self.install_manager.offline = offline
+        self.update_offline_tooltip()
+
+    def update_offline_tooltip(self):
+        count, size = shared_wheel_store().usage()
+        self.offline_checkbox.setToolTip(
+            f"Install only from the {count} cached files ({format_size(size)}) instead of PyPI"
+        )
+
+    def update_install_status(self, job=None):
+        """Show the running (or next) install job in the sidebar panel."""
+        active = self.install_manager.active_jobs()
+        self.update_detail_install_button()
+        self.update_upgrade_button()
+        if not active:
+            self.shown_install_job = None
+            self.install_panel.setVisible(False)
+            return
+
+        # The running job first, then the next queued one
+        shown = next((job for job in active if job.state == RUNNING), active[0])
+        self.shown_install_job = shown
+        self.install_status_label.setText(f"{shown.title}\n{shown.status}")
+        self.install_progress_bar.setValue(shown.progress)
+        waiting = len(active) - 1
+        self.install_queue_label.setText(f"{waiting} more queued" if waiting else "")
+        self.install_panel.setVisible(True)
+
+    def cancel_shown_install(self):
+        if self.shown_install_job is not None:
+            self.install_manager.cancel(self.shown_install_job)
+
+    def install_finished(self, job):
+        self.update_install_status()
+        self.update_offline_tooltip()
+
+        # The site-packages watcher usually notices too, but not for every kind of change
+        self.inventory.mark_dirty()
+        self.inventory_refresh_timer.start()
+
+        if job.action == "create" and job.state == SUCCEEDED:
+            # Show the new environment right away
+            created = self.interpreter_registry.get(job.python)
+            if created is not None:
+                self.set_target_interpreter(created)
+                self.update_environment_list(self.interpreter_registry.interpreters())
+
+        if job.state == FAILED:
+            title = {"upgrade": "Upgrade Failed", "create": "Environment Not Created"}.get(job.action, "Install Failed")
+            message = QMessageBox(QMessageBox.Warning, title, f"{job.title} failed: {job.status}.", QMessageBox.Ok, self)
+            message.setInformativeText("\n".join(job.log[-5:]))
+            message.setDetailedText("\n".join(job.log))
+            message.setAttribute(Qt.WA_DeleteOnClose)
+            message.show()
+
+    def update_detail_install_button(self):
+        library = self.detail_library
+        busy = library is not None and any(job.involves(library["name"]) for job in self.install_manager.active_jobs())
+        self.install_detail_button.setText("Installing..." if busy else "Install")
+        self.install_detail_button.setEnabled(not busy)
+
+    def closeEvent(self, event):
+        active = self.install_manager.active_jobs()
+        if active:
+            answer = QMessageBox.question(
+                self, "Installs Running",
+                f"{len(active)} install job(s) are still running or queued. Stop them and quit?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+            )
+            if answer != QMessageBox.Yes:
+                event.ignore()
+                return
+            self.install_manager.cancel_all()
+
+        # Drop queued logo downloads so they don't hold up exit
+        self.icon_loader.shutdown()
+        self.detail_loader.shutdown()
+        if self.outdated_thread is not None:
+            self.outdated_thread.cancel()
+        super().closeEvent(event)
+
     def go_back_to_home(self):
         # Check which page we're coming from
         if self.stack.currentIndex() == 6:  # Search results page
             # If coming from search results, clear search
+            self.search_timer.stop()
             self.search_box.clear()
+            self.results_search_box.clear()
         
         self.stack.setCurrentIndex(0)  # Go back to home page
 
     def show_search_error(self, error_message):
-        # Clear current layout
-        for i in reversed(range(self.search_results_layout.count())): 
-            widget = self.search_results_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-        
-        # Show error message
-        error_label = QLabel(f"Error searching: {error_message}")
-        error_label.setAlignment(Qt.AlignCenter)
-        error_label.setStyleSheet("color: #ff5555; padding: 40px; background-color: #2a2a2a; border-radius: 8px;")
-        self.search_results_layout.addWidget(error_label)
+        if self.sender() is not self.search_thread:
+            return
+            
+        self.search_results_model.clear()
+        self.show_search_status(f"Error searching: {error_message}", error=True)
         
         # Optionally show a message box
         QMessageBox.warning(self, "Search Error", f"Error searching PyPI: {error_message}")
@@ -916,25 +1175,50 @@ class PyPackManager(QWidget):
             
             # If selecting My Python page, collect Python info
             if index == 3:  # My Python page
-                # Check if we have a Python info thread already
-                if hasattr(self, 'python_info_thread') and self.python_info_thread and self.python_info_thread.isRunning():
-                    return
-                    
-                # Show loading indicators
-                self.python_info_container.setVisible(False)
-                self.python_loading_label.setVisible(True)
-                self.python_progress_bar.setVisible(True)
-                
-                # Start the info collection thread
-                self.python_info_thread = PythonInfoCollector()
-                self.python_info_thread.update_signal.connect(self.update_python_info)
-                self.python_info_thread.start()
+                self.collect_python_info()
+                if self.environment_thread is None:
+                    self.discover_environments()
+
+    def collect_python_info(self):
+        """Show the My Python page info, rescanning installed packages only if they changed."""
+        # Check if we have a Python info thread already
+        if hasattr(self, 'python_info_thread') and self.python_info_thread and self.python_info_thread.isRunning():
+            return
+
+        if self.python_info is not None:
+            if not self.inventory.is_dirty():
+                return  # Already showing the current inventory
+        else:
+            # Show loading indicators (only the first time; later refreshes keep the old list visible)
+            self.python_info_container.setVisible(False)
+            self.python_loading_label.setVisible(True)
+            self.python_progress_bar.setVisible(True)
+
+        # Start the info collection thread; the update check runs separately and doesn't hold it up
+        self.python_info_thread = PythonInfoCollector(self.inventory, interpreter=self.target_interpreter)
+        self.python_info_thread.update_signal.connect(self.update_python_info)
+        self.python_info_thread.finished.connect(self.refresh_visible_inventory)
+        self.python_info_thread.start()
+        if self.target_python not in self.python_updates:
+            self.check_python_updates()
+
+    def site_packages_changed(self, path):
+        """Called by the file system watcher when a site-packages directory changes."""
+        self.inventory.mark_dirty()
+        self.inventory_refresh_timer.start()
+
+    def refresh_visible_inventory(self):
+        # Rescan right away if the My Python page is showing, otherwise on the next visit
+        if self.stack.currentIndex() == 3 and self.inventory.is_dirty():
+            self.collect_python_info()
 
     def update_python(self):
         """Download and install Python update with progress tracking."""        
-        # Get current Python version and update information
-        current_version = platform.python_version()
-        update_version = self.update_version_label.text().replace("Version ", "").replace(" available", "")
+        # The release found for the shown environment by the update check
+        release = self.python_updates.get(self.target_python)
+        if release is None:
+            return
+        update_version = release.version
         
         # Create a dialog for the update process
         update_dialog = QDialog(self)
@@ -1008,9 +1292,10 @@ class PyPackManager(QWidget):
             progress_signal = pyqtSignal(int, str)
             finished_signal = pyqtSignal(bool, str)
             
-            def __init__(self, version):
+            def __init__(self, release):
                 super().__init__()
-                self.version = version
+                self.release = release
+                self.version = release.version
                 self.cancelled = False
                 self.installer_path = None
             
@@ -1022,40 +1307,30 @@ class PyPackManager(QWidget):
                 except Exception as e:
                     print(f"Cleanup error: {str(e)}")
             
-            def get_installer_url(self):
-                """Determine the appropriate installer URL based on platform."""
-                system = platform.system()
-                machine = platform.machine()
-                base_url = "https://www.python.org/ftp/python"
-                
-                if system == "Windows":
-                    # Determine if 32-bit or 64-bit installer is needed
-                    arch = "amd64" if machine in ["AMD64", "x86_64"] else "win32"
-                    return f"{base_url}/{self.version}/python-{self.version}-{arch}.exe"
-                elif system == "Darwin":  # macOS
-                    return f"{base_url}/{self.version}/python-{self.version}-macosx10.9.pkg"
-                else:  # Linux and others
-                    return None
+            def get_installer(self):
+                """(url, sha256 or None) of the installer for this platform from the release's file list."""
+                return shared_release_feed().installer(self.release)
             
-            def download_installer(self, url, path):
-                """Download the installer with progress reporting."""
-                def report_progress(block_num, block_size, total_size):
-                    if self.cancelled:
-                        raise Exception("Download cancelled")
-                        
-                    if total_size > 0:
-                        percent = min(int((block_num * block_size * 100) / total_size), 100)
-                        self.progress_signal.emit(
-                            15 + int(percent * 0.65),  # Scale to 15-80% of overall progress
-                            f"Downloading Python {self.version} installer... {percent}%"
-                        )
+            def download_installer(self, url, path, sha256=None):
+                """Download the installer over several connections with progress reporting.
+
+                An interrupted download resumes, also after a restart, from the state kept next to the file.
+                """
+                def report_progress(progress):
+                    percent = progress.percent()
+                    self.progress_signal.emit(
+                        15 + int(percent * 0.65),  # Scale to 15-80% of overall progress
+                        f"Downloading Python {self.version} installer... {percent}% ({progress.describe()})"
+                    )
                 
                 try:
-                    urllib.request.urlretrieve(url, path, report_progress)
+                    shared_downloader().download(
+                        url, path, sha256, report_progress, lambda: self.cancelled, segments=DEFAULT_SEGMENTS
+                    )
                     return True
+                except DownloadCancelled:
+                    return False
                 except Exception as e:
-                    if "Download cancelled" in str(e):
-                        return False
                     self.finished_signal.emit(False, f"Download failed: {str(e)}")
                     return False
             
@@ -1105,17 +1380,18 @@ class PyPackManager(QWidget):
                 try:
                     # Step 1: Determine the appropriate installer URL
                     self.progress_signal.emit(5, "Determining installer for your platform...")
-                    installer_url = self.get_installer_url()
+                    installer = self.get_installer()
                     
                     if self.cancelled:
                         return
                     
-                    if not installer_url:
+                    if not installer:
                         self.finished_signal.emit(False, "Automatic update not supported for this platform. Please use your package manager.")
                         return
                     
                     # Step 2: Create a temporary directory for the download
                     self.progress_signal.emit(10, "Creating temporary directory...")
+                    installer_url, installer_sha256 = installer
                     temp_dir = tempfile.gettempdir()
                     self.installer_path = os.path.join(temp_dir, os.path.basename(installer_url))
                     
@@ -1124,7 +1400,8 @@ class PyPackManager(QWidget):
                     
                     # Step 3: Download the installer
                     self.progress_signal.emit(15, f"Downloading Python {self.version} installer...")
-                    if not self.download_installer(installer_url, self.installer_path):
+                    # python.org publishes a sha256 for recent installers; the downloader checks it
+                    if not self.download_installer(installer_url, self.installer_path, installer_sha256):
                         return
                     
                     if self.cancelled:
@@ -1153,7 +1430,7 @@ class PyPackManager(QWidget):
                         self.cleanup()
         
         # Create and configure the update thread
-        update_thread = PythonUpdateThread(update_version)
+        update_thread = PythonUpdateThread(release)
         
         # Connect signals
         def update_progress(percent, message):
@@ -1192,59 +1469,272 @@ class PyPackManager(QWidget):
 
     def update_python_info(self, info):
         """Update the Python info page with collected information."""
+        self.python_infos[info['python_path']] = info
+        if info['python_path'] != self.target_python:
+            return  # Collected for an environment that was switched away from
+        self.python_info = info
+
         # Update Python version information
         version_text = f"Python {info['python_version']} ({info['python_implementation']})"
         self.python_version_label.setText(version_text)
         
-        self.python_path_label.setText(f"Installation path: {info['install_dir']}")
+        path_text = f"Installation path: {info['install_dir']}"
+        if info.get('environment_dir') and info['environment_dir'] != info['install_dir']:
+            path_text += f"\n{info['environment_kind'].capitalize()}: {info['environment_dir']}"
+        self.python_path_label.setText(path_text)
         self.pip_version_label.setText(f"Pip: {info['pip_version']}")
         
         # Update package information
-        self.packages_count_label.setText(f"{info['package_count']} packages installed")
-        
-        # Clear and fill package list with versions
-        self.package_list.clear()
+        count_text = f"{info['package_count']} packages installed"
+        if info.get('installed_size'):
+            count_text += f" ({format_size(info['installed_size'])})"
+        self.packages_count_label.setText(count_text)
         
-        # Sort packages alphabetically
+        # Fill package list with versions, sorted alphabetically
         sorted_packages = sorted(info['installed_packages'], key=lambda x: x['name'].lower())
+        self.installed_package_model.set_packages(sorted_packages)
         
-        for package in sorted_packages:
-            # Create a formatted item with package name and version
-            item_text = f"{package['name']} - {package['version']}"
-            
-            item = QListWidgetItem(item_text)
-            
-            # Set custom styling for clarity
-            item.setFont(QFont("Segoe UI", 13))
-            
-            # Add to the list
-            self.package_list.addItem(item)
-        
-        # Check for updates
-        if info.get('has_update', False):
-            self.update_container.setVisible(True)
-            self.update_version_label.setText(f"Version {info['update_version']} available")
-            self.update_changes_label.setText(info['update_changes'])
-        else:
-            self.update_container.setVisible(False)
+        self.update_outdated_status()
+        
+        self.show_python_update()
         
         # Hide loading indicators and show content
         self.python_loading_label.setVisible(False)
         self.python_progress_bar.setVisible(False)
         self.python_info_container.setVisible(True)
 
+    def check_python_updates(self):
+        """Look up updates for the shown and all known environments in the background."""
+        if self.python_update_thread is not None and self.python_update_thread.isRunning():
+            return
+        versions = {
+            interpreter.path: interpreter.version for interpreter in self.interpreter_registry.interpreters()
+            if interpreter.version
+        }
+        versions[self.target_python] = self.target_interpreter.version
+        self.python_update_thread = PythonUpdateCheckThread(versions)
+        self.python_update_thread.update_checked.connect(self.python_update_checked)
+        self.python_update_thread.error_occurred.connect(
+            lambda error: print(f"Could not check for Python updates: {error}")
+        )
+        self.python_update_thread.start()
 
-def collect_python_info(self):
-    """Start thread to collect Python environment information."""
-    if hasattr(self, 'python_info_thread') and self.python_info_thread and self.python_info_thread.isRunning():
-        return
-            
-    # Show loading indicators
-    self.python_info_container.setVisible(False)
-    self.python_loading_label.setVisible(True)
-    self.python_progress_bar.setVisible(True)
-    
-    # Start the info collection thread
-    self.python_info_thread = PythonInfoCollector()
-    self.python_info_thread.update_signal.connect(self.update_python_info)
-    self.python_info_thread.start()
+    def python_update_checked(self, path, release):
+        self.python_updates[path] = release
+        if path == self.target_python:
+            self.show_python_update()
+
+    def show_python_update(self):
+        release = self.python_updates.get(self.target_python)
+        self.update_container.setVisible(release is not None)
+        if release is not None:
+            self.update_version_label.setText(f"Version {release.version} available")
+            self.update_changes_label.setText(describe_update(release))
+
+    def check_outdated_packages(self):
+        """Look up the latest release of every installed package in the background."""
+        if self.python_info is None or self.outdated_scanning:
+            return
+        self.outdated_scanning = True
+        self.installed_package_model.clear_outdated()
+        self.check_outdated_button.setEnabled(False)
+        self.outdated_status_label.setText("Checking...")
+
+        self.outdated_thread = OutdatedScanThread(self.python_info['installed_packages'])
+        self.outdated_thread.batch_ready.connect(self.installed_package_model.add_outdated)
+        self.outdated_thread.progress.connect(self.update_outdated_progress)
+        self.outdated_thread.scan_finished.connect(self.outdated_scan_finished)
+        self.outdated_thread.error_occurred.connect(self.show_outdated_error)
+        self.outdated_scan_started = time.perf_counter()
+        self.outdated_thread.start()
+
+    def update_outdated_progress(self, checked, total):
+        found = len(self.installed_package_model.outdated_packages())
+        self.outdated_status_label.setText(f"Checked {checked} of {total}, {found} outdated")
+
+    def outdated_scan_finished(self, outdated, checked):
+        elapsed = time.perf_counter() - self.outdated_scan_started
+        print(f"Outdated scan: {checked} packages on PyPI, {len(outdated)} outdated, {elapsed:.1f}s")
+        self.outdated_scanning = False
+        self.check_outdated_button.setEnabled(True)
+        self.outdated_only_checkbox.setEnabled(True)
+        self.update_outdated_status()
+        self.update_upgrade_button()
+
+    def update_outdated_status(self):
+        """Keep the outdated count in step with the list, e.g. after an upgrade."""
+        if self.outdated_thread is None or self.outdated_scanning:
+            return
+        count = len(self.installed_package_model.outdated_packages())
+        self.outdated_status_label.setText(f"{count} outdated" if count else "Everything is up to date")
+
+    def show_outdated_error(self, message):
+        self.outdated_scanning = False
+        self.check_outdated_button.setEnabled(True)
+        self.outdated_status_label.setText(message)
+        self.update_upgrade_button()
+
+    def selected_outdated_packages(self):
+        outdated = {normalize_name(package["name"]): package for package in self.installed_package_model.outdated_packages()}
+        selected = (index.data(LibraryRole) for index in self.package_list.selectionModel().selectedIndexes())
+        return [outdated[key] for key in (normalize_name(package["name"]) for package in selected) if key in outdated]
+
+    def update_upgrade_button(self, *args):
+        """Offer to upgrade the selected outdated packages, or all of them when none are selected."""
+        upgrading = any(job.action == "upgrade" for job in self.install_manager.active_jobs())
+        selected = self.selected_outdated_packages()
+        count = len(selected or self.installed_package_model.outdated_packages())
+        if upgrading:
+            self.upgrade_button.setText("Upgrading...")
+        elif selected:
+            self.upgrade_button.setText(f"Upgrade Selected ({count})")
+        else:
+            self.upgrade_button.setText(f"Upgrade All ({count})" if count else "Upgrade All")
+        self.upgrade_button.setEnabled(count > 0 and not upgrading and not self.outdated_scanning)
+
+    def upgrade_outdated_packages(self):
+        packages = self.selected_outdated_packages() or self.installed_package_model.outdated_packages()
+        if not packages:
+            return
+        names = ", ".join(package["name"] for package in packages[:5])
+        if len(packages) > 5:
+            names += f" and {len(packages) - 5} more"
+        answer = QMessageBox.question(
+            self, "Upgrade Packages",
+            f"Upgrade {len(packages)} package(s) to their latest versions?\n\n{names}\n\n"
+            "Dependencies are upgraded with them where needed. If any upgrade fails, "
+            "all of them are rolled back.",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes
+        )
+        if answer != QMessageBox.Yes:
+            return
+        submit_upgrade(self.install_manager, packages, self.target_python)
+        self.update_upgrade_button()
+
+    def inventory_for(self, interpreter):
+        inventory = self.inventories.get(interpreter.path)
+        if inventory is None:
+            # PyPackManager's own interpreter is scanned on sys.path, like before environments could be switched
+            paths = None if is_current(interpreter) else list(interpreter.site_dirs)
+            inventory = self.inventories[interpreter.path] = InventoryCache(paths)
+        return inventory
+
+    def discover_environments(self):
+        """Search the machine for interpreters and environments in the background."""
+        if self.environment_thread is not None and self.environment_thread.isRunning():
+            return
+        self.rescan_environments_button.setEnabled(False)
+        self.rescan_environments_button.setText("Searching...")
+        self.environment_thread = InterpreterDiscoveryThread(self.interpreter_registry)
+        self.environment_thread.interpreters_found.connect(self.environments_discovered)
+        self.environment_thread.error_occurred.connect(self.show_environment_error)
+        self.environment_thread.start()
+
+    def environments_discovered(self, interpreters):
+        self.rescan_environments_button.setEnabled(True)
+        self.rescan_environments_button.setText("Find Environments")
+        # Keep the shown environment's fingerprint current (e.g. new site directories)
+        fresh = next((i for i in interpreters if same_path(i.path, self.target_interpreter.path)), None)
+        if fresh is not None:
+            self.target_interpreter = fresh
+        self.update_environment_list(interpreters)
+
+    def show_environment_error(self, message):
+        print(f"Environment discovery failed: {message}")
+        self.rescan_environments_button.setEnabled(True)
+        self.rescan_environments_button.setText("Find Environments")
+
+    def update_environment_list(self, interpreters):
+        """Fill the environment switcher, with the shown environment selected."""
+        interpreters = list(interpreters)
+        if not any(same_path(interpreter.path, self.target_interpreter.path) for interpreter in interpreters):
+            interpreters.insert(0, self.target_interpreter)
+        self.environment_combo.clear()
+        for index, interpreter in enumerate(interpreters):
+            text = describe(interpreter)
+            if is_current(interpreter):
+                text += "  (PyPackManager)"
+            self.environment_combo.addItem(text, interpreter)
+            self.environment_combo.setItemData(
+                index, f"{interpreter.path}\n{interpreter.package_count} packages", Qt.ToolTipRole
+            )
+            if same_path(interpreter.path, self.target_interpreter.path):
+                self.environment_combo.setCurrentIndex(index)
+
+    def switch_environment(self, index):
+        interpreter = self.environment_combo.itemData(index)
+        if interpreter is not None and not same_path(interpreter.path, self.target_interpreter.path):
+            self.set_target_interpreter(interpreter)
+
+    def set_target_interpreter(self, interpreter):
+        """Show and install into another environment.
+
+        Inventories and page info are kept per environment, so switching
+        back to one shows it at once and only rescans what changed.
+        """
+        self.interpreter_registry.mark_used(interpreter.path)
+        self.target_interpreter = interpreter
+        self.target_python = interpreter.path
+
+        # Outdated results belong to the environment they were found in
+        self.stop_outdated_scan()
+        self.installed_package_model.clear_outdated()
+        self.outdated_status_label.setText("")
+        self.outdated_only_checkbox.setChecked(False)
+        self.outdated_only_checkbox.setEnabled(False)
+        self.installed_package_model.set_shared(
+            shared_counts(self.disk_report, interpreter) if self.disk_report is not None else {}
+        )
+
+        old_directories = self.site_packages_watcher.directories()
+        if old_directories:
+            self.site_packages_watcher.removePaths(old_directories)
+        self.inventory = self.inventory_for(interpreter)
+        if self.inventory.directories():
+            self.site_packages_watcher.addPaths(self.inventory.directories())
+
+        cached = self.python_infos.get(interpreter.path)
+        if cached is not None:
+            self.update_python_info(cached)
+        else:
+            self.python_info = None
+        self.collect_python_info()
+
+    def show_disk_report(self):
+        """Measure every known environment and list the packages they have in common."""
+        interpreters = self.interpreter_registry.interpreters()
+        if not any(same_path(interpreter.path, self.target_interpreter.path) for interpreter in interpreters):
+            interpreters.insert(0, self.target_interpreter)
+        # Inventories already collected for My Python aren't scanned again
+        inventories = {
+            path: inventory.packages() for path, inventory in self.inventories.items()
+            if inventory.packages() is not None and not inventory.is_dirty()
+        }
+        dialog = DiskReportDialog(interpreters, inventories, self)
+        dialog.report_ready.connect(self.apply_disk_report)
+        dialog.open()
+
+    def create_environment(self):
+        """Create a virtual environment, optionally with the shown environment's packages."""
+        interpreters = self.interpreter_registry.interpreters()
+        if not any(is_current(interpreter) for interpreter in interpreters):
+            interpreters.append(current_interpreter())
+        packages = self.python_info['installed_packages'] if self.python_info else []
+        source_name = os.path.basename(self.target_interpreter.prefix) or self.target_interpreter.prefix
+        NewEnvironmentDialog(self.install_manager, interpreters, packages, source_name, self).open()
+
+    def apply_disk_report(self, report):
+        self.disk_report = report
+        self.installed_package_model.set_shared(shared_counts(report, self.target_interpreter))
+
+    def stop_outdated_scan(self):
+        if self.outdated_thread is None:
+            return
+        self.outdated_thread.cancel()
+        if self.outdated_scanning:
+            for signal in (self.outdated_thread.batch_ready, self.outdated_thread.progress,
+                           self.outdated_thread.scan_finished, self.outdated_thread.error_occurred):
+                signal.disconnect()
+        self.outdated_thread = None
+        self.outdated_scanning = False
+        self.check_outdated_button.setEnabled(True)
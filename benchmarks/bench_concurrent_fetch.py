@@ -0,0 +1,52 @@
+"""Compare sequential and concurrent package fetching against a local server.
+
+Usage: python benchmarks/bench_concurrent_fetch.py [--latency 0.2] [--packages 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pypi_client import PyPIClient
+from fake_pypi import FakePyPIServer
+
+
+def timed_fetch(client, names, deadline=None):
+    start = time.perf_counter()
+    results = client.get_packages(names, deadline=deadline)
+    return time.perf_counter() - start, len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds of latency per request")
+    parser.add_argument("--packages", type=int, default=10, help="number of packages to fetch")
+    parser.add_argument("--workers", type=int, default=10, help="concurrency limit")
+    args = parser.parse_args()
+
+    names = [f"package-{i}" for i in range(args.packages)]
+
+    with FakePyPIServer(latency=args.latency) as server:
+        sequential = PyPIClient(server.base_url, max_workers=1)
+        concurrent = PyPIClient(server.base_url, max_workers=args.workers)
+
+        seq_time, seq_count = timed_fetch(sequential, names)
+        con_time, con_count = timed_fetch(concurrent, names)
+
+        print(f"{args.packages} packages, {args.latency * 1000:.0f} ms latency per request")
+        print(f"  sequential (1 worker):    {seq_time:6.2f}s  ({seq_count} loaded)")
+        print(f"  concurrent ({args.workers} workers):   {con_time:6.2f}s  ({con_count} loaded)")
+        print(f"  speedup: {seq_time / con_time:.1f}x")
+
+    # One package hangs and one is missing: the rest should still come back
+    slow_name, missing_name = names[0], names[1]
+    with FakePyPIServer(latency=args.latency, slow={slow_name: 5}, missing=[missing_name]) as server:
+        client = PyPIClient(server.base_url, timeout=1, max_workers=args.workers)
+        elapsed, count = timed_fetch(client, names)
+        print(f"  with one hung and one missing package: {elapsed:6.2f}s  ({count} of {len(names)} loaded)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Measure many environments with one os.walk and with the parallel walker, and check the duplicate report.
+
+Creates lightweight virtual environments that all install the same
+generated distributions (real files with RECORD hashes); in half of them
+the files are hard links to the first environment's copies. Compares a
+single-threaded os.walk with the parallel walker and times the whole
+report, checking that the reclaimable space matches the copies that
+aren't linked yet. Threads help most on cold caches and network drives.
+
+Usage: python benchmarks/bench_disk_report.py [--environments 20] [--packages 30] [--files 40] [--workers 8]
+"""
+import argparse
+import base64
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from disk_report import build_report, walk_usage
+from interpreters import Interpreter
+
+MAJOR_MINOR = f"{sys.version_info.major}.{sys.version_info.minor}"
+FILE_SIZE = 4096
+
+
+def write_distribution(site_dir, index, files):
+    name = f"bench_disk_{index}"
+    dist_info = os.path.join(site_dir, f"{name}-1.0.dist-info")
+    os.makedirs(os.path.join(site_dir, name))
+    os.makedirs(dist_info)
+    rows = []
+    for i in range(files):
+        relative = f"{name}/module_{i}.py"
+        data = (f"# {name} {i}\n".encode() * FILE_SIZE)[:FILE_SIZE]
+        with open(os.path.join(site_dir, relative), "wb") as f:
+            f.write(data)
+        digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b"=").decode()
+        rows.append(f"{relative},sha256={digest},{len(data)}\n")
+    with open(os.path.join(dist_info, "METADATA"), "w", encoding="utf-8") as f:
+        f.write(f"Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n")
+    with open(os.path.join(dist_info, "RECORD"), "w", encoding="utf-8") as f:
+        f.write("".join(rows) + f"{name}-1.0.dist-info/RECORD,,\n")
+
+
+def make_environment(root, source_site, packages, files):
+    site_dir = os.path.join(root, "lib", f"python{MAJOR_MINOR}", "site-packages")
+    if source_site is None:
+        os.makedirs(site_dir)
+        for index in range(packages):
+            write_distribution(site_dir, index, files)
+    else:
+        # Hard link every file to the first environment's copy
+        shutil.copytree(source_site, site_dir, copy_function=os.link)
+    with open(os.path.join(root, "pyvenv.cfg"), "w", encoding="utf-8") as f:
+        f.write(f"home = {os.path.dirname(sys.executable)}\n")
+    return Interpreter(
+        os.path.join(root, "bin", "python3"), sys.version.split()[0], "CPython", "venv", root,
+        os.path.dirname(sys.executable), (site_dir,), packages, ""
+    )
+
+
+def walk_sequentially(roots):
+    total = 0
+    for root in roots:
+        for folder, _, names in os.walk(root):
+            for name in names:
+                try:
+                    total += os.lstat(os.path.join(folder, name)).st_size
+                except OSError:
+                    pass
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--environments", type=int, default=20, help="environments to create")
+    parser.add_argument("--packages", type=int, default=30, help="distributions in each environment")
+    parser.add_argument("--files", type=int, default=40, help="files in each distribution")
+    parser.add_argument("--workers", type=int, default=8, help="walker threads")
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp(prefix="bench-disk-report-")
+    try:
+        interpreters = []
+        first_site = None
+        for i in range(args.environments):
+            linked = i % 2 == 1
+            interpreter = make_environment(
+                os.path.join(home, f"env-{i}"), first_site if linked else None, args.packages, args.files
+            )
+            first_site = first_site or interpreter.site_dirs[0]
+            interpreters.append(interpreter)
+
+        start = time.perf_counter()
+        walked = walk_sequentially([interpreter.prefix for interpreter in interpreters])
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        walk_usage([interpreter.prefix for interpreter in interpreters], args.workers)
+        walk = time.perf_counter() - start
+
+        start = time.perf_counter()
+        report = build_report(interpreters, workers=args.workers)
+        parallel = time.perf_counter() - start
+
+        # Linked environments share the first one's files; each other copy could be linked too
+        copies = (args.environments + 1) // 2
+        expected = (copies - 1) * args.packages * args.files * FILE_SIZE
+        measured = sum(usage.bytes for usage in report.environments)
+        print(f"{args.environments} environments, {args.packages} distributions of {args.files} files each")
+        print(f"  one os.walk:             {sequential:6.2f} s  ({walked / 2 ** 20:.1f} MB)")
+        print(f"  parallel walk:           {walk:6.2f} s")
+        print(f"  whole report:            {parallel:6.2f} s  ({measured / 2 ** 20:.1f} MB, "
+              f"{report.on_disk / 2 ** 20:.1f} MB on disk)")
+        print(f"  duplicated releases: {len(report.duplicates)} of {args.packages}")
+        print(f"  reclaimable: {report.reclaimable / 2 ** 20:.1f} MB (expected {expected / 2 ** 20:.1f} MB)")
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
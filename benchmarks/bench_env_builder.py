@@ -0,0 +1,107 @@
+"""Create populated environments with venv + pip and by linking from the unpacked-wheel store.
+
+Generates wheels (with a console script each) into a scratch wheel
+store, then creates environments with the same packages: with
+`python -m venv` and one `pip install --no-index`, and with the
+environment builder, twice, so the second run links from trees that are
+already unpacked. Reports time and how much disk space each new
+environment really added (files with several hard links count once).
+
+Usage: python benchmarks/bench_env_builder.py [--packages 40] [--files 50] [--file-size 32768]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def write_wheel(directory, index, files, file_size):
+    name = f"bench_env_{index}"
+    dist_info = f"{name}-1.0.dist-info"
+    contents = {
+        f"{name}/__init__.py": "def main():\n    print('ok')\n",
+        f"{dist_info}/METADATA": f"Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n",
+        f"{dist_info}/WHEEL": "Wheel-Version: 1.0\nGenerator: bench\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+        f"{dist_info}/entry_points.txt": f"[console_scripts]\nbench-env-{index} = {name}:main\n",
+    }
+    for i in range(files):
+        contents[f"{name}/data_{i}.py"] = (f"# {name} {i}\n" * file_size)[:file_size]
+    path = os.path.join(directory, f"{name}-1.0-py3-none-any.whl")
+    with zipfile.ZipFile(path, "w") as archive:
+        for file_path, text in contents.items():
+            archive.writestr(file_path, text)
+        archive.writestr(f"{dist_info}/RECORD", "".join(f"{p},,\n" for p in contents) + f"{dist_info}/RECORD,,\n")
+    return path
+
+
+def added_bytes(walk_usage, home, before):
+    return walk_usage([home])[os.path.abspath(home)][4] - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packages", type=int, default=40, help="packages in each environment")
+    parser.add_argument("--files", type=int, default=50, help="files in each package")
+    parser.add_argument("--file-size", type=int, default=32768, help="bytes in each file")
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp(prefix="bench-env-builder-")
+    os.environ["PYPACKMANAGER_HOME"] = home
+
+    from disk_report import walk_usage
+    from env_builder import submit_environment
+    from install_manager import InstallManager
+    from wheel_store import WheelStore
+
+    try:
+        build_dir = os.path.join(home, "build")
+        os.makedirs(build_dir)
+        store = WheelStore(os.path.join(home, "wheels"))
+        for index in range(args.packages):
+            store.add(write_wheel(build_dir, index, args.files, args.file_size))
+        requirements = [f"bench_env_{index}" for index in range(args.packages)]
+        print(f"{args.packages} packages of {args.files} files, {args.packages * args.files * args.file_size / 2 ** 20:.0f} MB")
+
+        before = walk_usage([home])[home][4]
+        start = time.perf_counter()
+        venv = os.path.join(home, "envs", "pip")
+        subprocess.run([sys.executable, "-m", "venv", venv], check=True)
+        python = os.path.join(venv, "Scripts" if os.name == "nt" else "bin", "python")
+        subprocess.run(
+            [python, "-m", "pip", "install", "--quiet", "--disable-pip-version-check", "--no-index",
+             "--find-links", store.find_links()] + requirements,
+            check=True
+        )
+        print(f"  venv + pip install:     {time.perf_counter() - start:6.2f} s  "
+              f"{added_bytes(walk_usage, home, before) / 2 ** 20:7.1f} MB added")
+
+        manager = InstallManager(logs_dir=home, downloads_dir=home, wheel_store=store)
+        manager.offline = True
+        for run in ("first", "second"):
+            before = walk_usage([home])[home][4]
+            start = time.perf_counter()
+            job = submit_environment(manager, os.path.join(home, "envs", run), sys.executable, requirements)
+            while not job.finished:
+                time.sleep(0.02)
+            elapsed = time.perf_counter() - start
+            print(f"  linked, {run} run:{' ' * (7 - len(run))}    {elapsed:6.2f} s  "
+                  f"{added_bytes(walk_usage, home, before) / 2 ** 20:7.1f} MB added  ({job.state}: {job.status})")
+            if run == "second":
+                script = os.path.join(os.path.dirname(job.python), "bench-env-0")
+                check = subprocess.run([job.python, "-m", "pip", "check"], capture_output=True, text=True)
+                print(f"  pip check: {check.stdout.strip() or check.stderr.strip()}")
+                if os.name != "nt":
+                    ran = subprocess.run([script], capture_output=True, text=True)
+                    print(f"  console script: {ran.stdout.strip() or ran.stderr.strip()}")
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
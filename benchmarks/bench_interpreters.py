@@ -0,0 +1,90 @@
+"""Discover many virtual environments by fingerprinting their files and by starting each interpreter.
+
+Creates a project folder full of lightweight virtual environments
+(pyvenv.cfg, a link to this interpreter and a site-packages folder with
+some installed distributions), then compares discover_interpreters()
+with starting every interpreter to ask for its version and sys.path,
+and with a second discovery that reuses the registry's fingerprints.
+
+Usage: python benchmarks/bench_interpreters.py [--environments 60] [--packages 40]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from interpreters import discover_interpreters, probe, InterpreterRegistry
+
+VERSION = f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"
+MAJOR_MINOR = f"{sys.version_info.major}.{sys.version_info.minor}"
+
+
+def make_environment(root, packages):
+    if os.name == "nt":
+        executable = os.path.join(root, "Scripts", "python.exe")
+        site_dir = os.path.join(root, "Lib", "site-packages")
+    else:
+        executable = os.path.join(root, "bin", "python3")
+        site_dir = os.path.join(root, "lib", f"python{MAJOR_MINOR}", "site-packages")
+    os.makedirs(os.path.dirname(executable))
+    os.makedirs(site_dir)
+    try:
+        os.symlink(sys.executable, executable)
+    except OSError:
+        shutil.copy2(sys.executable, executable)
+    with open(os.path.join(root, "pyvenv.cfg"), "w", encoding="utf-8") as f:
+        f.write(f"home = {os.path.dirname(sys.executable)}\ninclude-system-site-packages = false\nversion = {VERSION}\n")
+    for i in range(packages):
+        dist_info = os.path.join(site_dir, f"package_{i}-1.0.dist-info")
+        os.makedirs(dist_info)
+        with open(os.path.join(dist_info, "METADATA"), "w", encoding="utf-8") as f:
+            f.write(f"Metadata-Version: 2.1\nName: package-{i}\nVersion: 1.0\n")
+    return executable
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--environments", type=int, default=60, help="virtual environments to create")
+    parser.add_argument("--packages", type=int, default=40, help="distributions in each environment")
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp(prefix="bench-interpreters-")
+    try:
+        projects = os.path.join(home, "projects")
+        executables = [
+            make_environment(os.path.join(projects, f"project-{i}", ".venv"), args.packages)
+            for i in range(args.environments)
+        ]
+
+        start = time.perf_counter()
+        started = [probe(executable) for executable in executables]
+        probing = time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = discover_interpreters(project_dirs=[projects])
+        cold = time.perf_counter() - start
+
+        registry = InterpreterRegistry(os.path.join(home, "interpreters.sqlite3"))
+        registry.replace(found)
+        known = {interpreter.path: interpreter for interpreter in registry.interpreters()}
+        start = time.perf_counter()
+        again = discover_interpreters(known, project_dirs=[projects])
+        warm = time.perf_counter() - start
+
+        ours = [i for i in found if i.prefix.startswith(projects)]
+        agree = sum(1 for i in ours if i.version == VERSION and i.package_count == args.packages)
+        print(f"{args.environments} virtual environments with {args.packages} distributions each")
+        print(f"  starting every interpreter:   {probing:6.2f} s  ({sum(1 for s in started if s)} answered)")
+        print(f"  discovery, first run:         {cold:6.2f} s  ({len(found)} environments on this machine)")
+        print(f"  discovery, with the registry: {warm:6.2f} s  ({len(again)} environments)")
+        print(f"  created environments fingerprinted correctly: {agree} of {args.environments}")
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compare the in-process inventory scan with `pip list` on a large environment.
+
+Builds a throwaway site-packages folder with fake .dist-info entries and
+lists it both ways, then times an incremental InventoryCache refresh after
+one more package is "installed".
+
+Usage: python benchmarks/bench_inventory.py [--packages 600] [--repeat 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory import InventoryCache, scan_distributions
+
+
+def make_environment(root, count, start=0):
+    for i in range(start, start + count):
+        name, version = f"bench_package_{i}", f"1.{i % 50}.0"
+        dist_info = os.path.join(root, f"{name}-{version}.dist-info")
+        os.makedirs(dist_info)
+        with open(os.path.join(dist_info, "METADATA"), "w") as f:
+            f.write(f"Metadata-Version: 2.1\nName: bench-package-{i}\nVersion: {version}\n\n")
+            f.write("Long description line.\n" * 200)
+        with open(os.path.join(dist_info, "INSTALLER"), "w") as f:
+            f.write("pip\n")
+        with open(os.path.join(dist_info, "RECORD"), "w") as f:
+            for j in range(20):
+                f.write(f"{name}/module_{j}.py,sha256=abc,{1000 + j}\n")
+            f.write(f"{name}-{version}.dist-info/RECORD,,\n")
+
+
+def best_time(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def pip_list(path):
+    # What PythonInfoCollector used to do: start pip twice and parse the columns
+    subprocess.check_output([sys.executable, "-m", "pip", "--version"])
+    output = subprocess.check_output([sys.executable, "-m", "pip", "list", "--path", path]).decode()
+    return [line.split() for line in output.splitlines()[2:] if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packages", type=int, default=600, help="number of fake distributions")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per method (best is reported)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        make_environment(root, args.packages)
+
+        scan_time, packages = best_time(lambda: scan_distributions([root]), args.repeat)
+        pip_time, rows = best_time(lambda: pip_list(root), args.repeat)
+
+        print(f"{args.packages} installed distributions")
+        print(f"  pip --version + pip list:  {pip_time * 1000:8.1f} ms  ({len(rows)} packages)")
+        print(f"  in-process scan:           {scan_time * 1000:8.1f} ms  ({len(packages)} packages, with sizes)")
+        print(f"  speedup: {pip_time / scan_time:.1f}x")
+
+        inventory = InventoryCache([root])
+        inventory.refresh()
+        make_environment(root, 1, start=args.packages)
+        start = time.perf_counter()
+        packages = inventory.refresh()
+        refresh_time = time.perf_counter() - start
+        print(f"  incremental refresh after one install: {refresh_time * 1000:8.1f} ms  "
+              f"({inventory.last_reread} re-read, {len(packages)} packages)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Check a large environment for outdated packages against a local stand-in PyPI.
+
+Compares looking the packages up one after another (what
+``pip list --outdated`` does) with the concurrent, batched and rate
+limited outdated scanner, first with an empty metadata cache and then
+with a warm one.
+
+Usage: python benchmarks/bench_outdated.py [--packages 400] [--latency 0.05] [--rate 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_pypi import FakePyPIServer
+from metadata_cache import MetadataCache
+from pypi_client import PyPIClient
+from outdated_scanner import SCAN_WORKERS, find_outdated, scan_outdated
+
+
+def installed_packages(count):
+    # The stand-in server offers 1.0.0 .. 1.19.0 of every package
+    return [{"name": f"bench-package-{i}", "version": f"1.{i % 25}.0"} for i in range(count)]
+
+
+def sequential(server, packages):
+    client = PyPIClient(base_url=server.base_url)
+    documents = {}
+    for package in packages:
+        documents[package["name"]] = client.get_package(package["name"])
+    return find_outdated(packages, documents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packages", type=int, default=400, help="installed packages to check")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated round trip (s)")
+    parser.add_argument("--rate", type=float, default=50, help="scanner rate limit (requests/s)")
+    args = parser.parse_args()
+
+    packages = installed_packages(args.packages)
+    with tempfile.TemporaryDirectory() as tmp, FakePyPIServer(latency=args.latency) as server:
+        start = time.perf_counter()
+        expected = sequential(server, packages)
+        sequential_time = time.perf_counter() - start
+
+        cache = MetadataCache(os.path.join(tmp, "metadata.sqlite3"))
+        client = PyPIClient(base_url=server.base_url, max_workers=SCAN_WORKERS, cache=cache, rate_limit=args.rate)
+        start = time.perf_counter()
+        outdated, checked = scan_outdated(packages, client)
+        cold_time = time.perf_counter() - start
+        start = time.perf_counter()
+        scan_outdated(packages, client)
+        warm_time = time.perf_counter() - start
+
+        print(f"{args.packages} installed packages, {args.latency * 1000:.0f} ms latency, {args.rate:.0f} requests/s limit")
+        print(f"  one at a time:           {sequential_time:7.2f} s  ({len(expected)} outdated)")
+        print(f"  scanner, empty cache:    {cold_time:7.2f} s  ({len(outdated)} outdated, {checked} found)")
+        print(f"  scanner, warm cache:     {warm_time:7.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Check for a Python update by scanning the versions HTML page and with the cached release feed.
+
+Serves a generated copy of python.org's /doc/versions/ page and of its
+downloads API release list from a local HTTP server (with a delay per
+request, like a real round trip). Times the old check, which downloaded
+and regex-scanned the page every time My Python was opened, against
+ReleaseFeed on the first check, on a cache hit, and on a revalidation
+after the cache expired. It also checks that 3.1.x isn't offered as an
+update for 3.12.
+
+Usage: python benchmarks/bench_python_updates.py [--releases 500] [--latency 0.15] [--opens 20]
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python_updates import ReleaseFeed, find_update
+from version_key import version_greater, version_key
+
+# The pattern the old check used on the versions page
+OLD_PATTERN = r'<li><a.*?>Python\s+(\d+\.\d+\.\d+)</a>,\s+documentation\s+released\s+on\s+(\d+\s+\w+\s+\d{4})\.</li>'
+
+
+def make_versions(count):
+    versions = []
+    for minor in range(0, 14):
+        for micro in range(0, 40):
+            versions.append(f"3.{minor}.{micro}")
+    return versions[-count:]
+
+
+def make_page(versions):
+    items = "\n".join(
+        f'<li><a href="https://docs.python.org/release/{v}/">Python {v}</a>, documentation released on 8 April 2025.</li>'
+        for v in reversed(versions)
+    )
+    return f"<html><body>{'<p>' + 'x' * 200 + '</p>' * 50}<ul>{items}</ul></body></html>".encode()
+
+
+def make_feed(versions):
+    return json.dumps([
+        {
+            "name": f"Python {v}", "slug": f"python-{v.replace('.', '')}", "version": 3, "is_published": True,
+            "is_latest": False, "release_date": "2025-04-08T14:39:38Z", "pre_release": False, "release_page": None,
+            "release_notes_url": f"https://docs.python.org/release/{v}/whatsnew/changelog.html",
+            "show_on_download_page": True, "resource_uri": f"https://www.python.org/api/v2/downloads/release/{i}/",
+        }
+        for i, v in enumerate(versions)
+    ]).encode()
+
+
+def old_check(url, current):
+    with urllib.request.urlopen(url) as response:
+        html = response.read().decode()
+    major_minor = ".".join(current.split(".")[:2])
+    matches = re.findall(OLD_PATTERN, html)
+    filtered = [v for v, _ in matches if v.startswith(major_minor)]
+    if filtered:
+        latest = max(filtered, key=version_key)
+        if version_greater(latest, current):
+            return latest
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--releases", type=int, default=500, help="releases in the generated feed")
+    parser.add_argument("--latency", type=float, default=0.15, help="seconds the server waits per request")
+    parser.add_argument("--opens", type=int, default=20, help="times My Python is opened")
+    args = parser.parse_args()
+
+    versions = make_versions(args.releases)
+    page = make_page(versions)
+    feed = make_feed(versions)
+    etag = '"feed-1"'
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(args.latency)
+            if self.path.startswith("/feed"):
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body, content_type = feed, "application/json"
+            else:
+                body, content_type = page, "text/html"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    home = tempfile.mkdtemp(prefix="bench-python-updates-")
+    try:
+        current = "3.12.3"
+        print(f"{len(versions)} releases: versions page {len(page) / 1024:.0f} KB, feed {len(feed) / 1024:.0f} KB")
+
+        start = time.perf_counter()
+        for _ in range(args.opens):
+            old = old_check(f"{base}/doc/versions/", current)
+        print(f"  old check, {args.opens} opens:       {time.perf_counter() - start:6.2f} s  (found {old})")
+
+        cache = os.path.join(home, "python_releases.json")
+        start = time.perf_counter()
+        releases = ReleaseFeed(cache).releases(url=f"{base}/feed")
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(args.opens):
+            # A new ReleaseFeed each time, like a new run of the app reading the cache file
+            update = find_update(ReleaseFeed(cache).releases(url=f"{base}/feed"), current)
+        cached = time.perf_counter() - start
+        start = time.perf_counter()
+        ReleaseFeed(cache).releases(max_age=0, url=f"{base}/feed")
+        revalidated = time.perf_counter() - start
+        print(f"  release feed, first check:  {first:6.2f} s  ({len(releases)} releases, found {update.version})")
+        print(f"  release feed, {args.opens} opens:    {cached:6.2f} s  (from the cache)")
+        print(f"  release feed, expired:      {revalidated:6.2f} s  (304 Not Modified)")
+
+        print(f"  3.1.5 -> old check offers {old_check(f'{base}/doc/versions/', '3.1.5')}, "
+              f"feed offers {getattr(find_update(releases, '3.1.5'), 'version', None)}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(home, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Resolve a large synthetic dependency graph served by a local fixture index.
+
+Times the first (cold) resolution, which fetches metadata over the simulated
+network, and repeat resolutions that are answered from the release store,
+both in memory and re-opened from disk as after a restart.
+
+Usage: python benchmarks/bench_resolver.py [--packages 120] [--versions 8] [--latency 0.02]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_pypi import FakePyPIServer
+from pypi_client import PyPIClient
+from release_store import ReleaseStore
+from resolver import Resolver
+
+
+def make_fixture_index(count, versions, fanout, seed=1):
+    """A "framework" depending on ``count`` packages that also depend on each other (no cycles)."""
+    rng = random.Random(seed)
+    projects = {}
+    for i in range(count):
+        releases = {}
+        for v in range(versions):
+            requires = []
+            for j in sorted(rng.sample(range(i + 1, count), min(fanout, count - i - 1))):
+                requires.append(f"pkg-{j}>=1.{rng.randrange(versions // 2)}")
+            requires.append('legacy-shim; python_version < "3"')  # Never applies
+            requires.append(f'pkg-extra-{i}; extra == "all"')      # Only with the extra
+            releases[f"1.{v}"] = {"requires_dist": requires, "requires_python": ">=3.8"}
+        projects[f"pkg-{i}"] = releases
+
+    # The newest framework release conflicts with pkg-1 and has to be backtracked
+    projects["framework"] = {
+        "2.0": {"requires_dist": [f"pkg-{i}" for i in range(count)] + ["pkg-1<1.0"]},
+        "1.9": {"requires_dist": [f"pkg-{i}" for i in range(count)]},
+    }
+    return projects
+
+
+def resolve(server, store):
+    client = PyPIClient(base_url=server.base_url, cache=None)
+    start = time.perf_counter()
+    resolution = Resolver(client=client, store=store).resolve(["framework"])
+    return time.perf_counter() - start, resolution
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packages", type=int, default=120, help="packages in the graph")
+    parser.add_argument("--versions", type=int, default=8, help="versions per package")
+    parser.add_argument("--fanout", type=int, default=4, help="dependencies per release")
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated round trip (s)")
+    args = parser.parse_args()
+
+    projects = make_fixture_index(args.packages, args.versions, args.fanout)
+    with tempfile.TemporaryDirectory() as tmp, FakePyPIServer(latency=args.latency, projects=projects) as server:
+        store_path = os.path.join(tmp, "releases.sqlite3")
+        store = ReleaseStore(store_path)
+
+        cold_time, resolution = resolve(server, store)
+        cold_requests = server.request_count
+        warm_time, _ = resolve(server, store)
+        disk_time, _ = resolve(server, ReleaseStore(store_path))
+        framework = next(pin for pin in resolution if pin.name == "framework")
+
+        print(f"{args.packages} packages x {args.versions} versions, {args.latency * 1000:.0f} ms latency")
+        print(f"  resolved {len(resolution)} pins, framework {framework.version}")
+        print(f"  first resolution:          {cold_time * 1000:8.1f} ms  ({cold_requests} requests)")
+        print(f"  again (memoized):          {warm_time * 1000:8.1f} ms")
+        print(f"  again (store from disk):   {disk_time * 1000:8.1f} ms")
+        print(f"  requests after first run:  {server.request_count - cold_requests}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Download an installer-sized file in one stream and in byte-range segments from a local server.
+
+Serves a random file from a local HTTP/1.1 server that answers Range
+requests and caps each connection's bandwidth (like a CDN edge that
+throttles single connections). Compares:
+
+- urlretrieve, as the update dialog used to do, with a callback on every block;
+- DownloadManager in one stream;
+- DownloadManager with --segments byte ranges.
+
+For each it reports time and the number of progress callbacks. Then it
+interrupts a segmented download part way, resumes it with a new
+DownloadManager (as after a restart) and checks how many bytes were sent
+twice. Last, it checks the fallback to one stream against a server that
+ignores Range. Every result is checked against the file's sha256.
+
+Usage: python benchmarks/bench_segmented_download.py [--size-mb 28] [--rate-mb 8] [--segments 4]
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from downloader import DownloadCancelled, DownloadManager
+
+BLOCK = 16 * 1024
+
+
+def start_server(data, rate, ranges=True):
+    sent = {"bytes": 0, "requests": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            start, end = 0, len(data) - 1
+            requested = self.headers.get("Range") if ranges else None
+            if requested:
+                first, _, last = requested.split("=", 1)[1].partition("-")
+                start, end = int(first), min(int(last), end) if last else end
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", str(end + 1 - start))
+            self.send_header("ETag", '"installer-1"')
+            self.send_header("Accept-Ranges", "bytes" if ranges else "none")
+            self.end_headers()
+            with lock:
+                sent["requests"] += 1
+            began = time.perf_counter()
+            written = 0
+            try:
+                for offset in range(start, end + 1, BLOCK):
+                    block = data[offset:min(offset + BLOCK, end + 1)]
+                    self.wfile.write(block)
+                    written += len(block)
+                    with lock:
+                        sent["bytes"] += len(block)
+                    # Hold this connection to ``rate`` bytes a second
+                    delay = written / rate - (time.perf_counter() - began)
+                    if delay > 0:
+                        time.sleep(delay)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, sent
+
+
+def sha256_of(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=28, help="size of the served file")
+    parser.add_argument("--rate-mb", type=float, default=8, help="bandwidth of each connection, MB/s")
+    parser.add_argument("--segments", type=int, default=4, help="byte ranges fetched at once")
+    args = parser.parse_args()
+
+    data = os.urandom(int(args.size_mb * 2 ** 20))
+    sha256 = hashlib.sha256(data).hexdigest()
+    server, sent = start_server(data, args.rate_mb * 2 ** 20)
+    url = f"http://127.0.0.1:{server.server_port}/python-installer.exe"
+    home = tempfile.mkdtemp(prefix="bench-segmented-")
+    try:
+        print(f"{args.size_mb:.0f} MB file, {args.rate_mb:.0f} MB/s per connection")
+
+        calls = [0]
+        path = os.path.join(home, "urlretrieve.exe")
+        start = time.perf_counter()
+        urllib.request.urlretrieve(url, path, lambda *_: calls.__setitem__(0, calls[0] + 1))
+        print(f"  urlretrieve:            {time.perf_counter() - start:6.2f} s  {calls[0]:6d} callbacks  "
+              f"sha256 {'ok' if sha256_of(path) == sha256 else 'WRONG'}")
+
+        for label, segments in (("one stream", 1), (f"{args.segments} segments", args.segments)):
+            calls = [0]
+            path = os.path.join(home, f"{segments}.exe")
+            manager = DownloadManager()
+            start = time.perf_counter()
+            manager.download(url, path, sha256, lambda _: calls.__setitem__(0, calls[0] + 1), segments=segments)
+            manager.close()
+            print(f"  {label + ':':<23} {time.perf_counter() - start:6.2f} s  {calls[0]:6d} callbacks  sha256 ok")
+
+        # Interrupt a segmented download at about 40% and resume it with a new manager
+        path = os.path.join(home, "resumed.exe")
+        manager = DownloadManager()
+        before = sent["bytes"]
+        try:
+            manager.download(
+                url, path, sha256, is_cancelled=lambda: sent["bytes"] - before > len(data) * 0.4,
+                segments=args.segments
+            )
+        except DownloadCancelled:
+            pass
+        manager.close()
+        interrupted = sent["bytes"] - before
+        start = time.perf_counter()
+        manager = DownloadManager()
+        manager.download(url, path, sha256, segments=args.segments)
+        manager.close()
+        total = sent["bytes"] - before
+        print(f"  interrupted after {interrupted / 2 ** 20:.1f} MB, resumed in {time.perf_counter() - start:.2f} s: "
+              f"{total / 2 ** 20:.1f} MB sent in all, {(total - len(data)) / 2 ** 20:.2f} MB more than the file, "
+              f"sha256 ok, leftovers: {sorted(os.listdir(home))}")
+
+        # A server without Range support gets one stream
+        plain, _ = start_server(data, args.rate_mb * 2 ** 20, ranges=False)
+        path = os.path.join(home, "plain.exe")
+        manager = DownloadManager()
+        start = time.perf_counter()
+        manager.download(f"http://127.0.0.1:{plain.server_port}/python-installer.exe", path, sha256, segments=args.segments)
+        manager.close()
+        plain.shutdown()
+        print(f"  no Range support:       {time.perf_counter() - start:6.2f} s  (one stream, sha256 ok)")
+    finally:
+        server.shutdown()
+        shutil.rmtree(home, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Upgrade many packages in a scratch environment, one pip run per package and as one bulk upgrade.
+
+Creates a virtual environment, installs version 1.0 of generated
+packages whose 2.0 releases depend on each other in chains, and upgrades
+them all from a local wheel store (no network needed): first one package
+at a time, the way upgrading from the detail page does, then with the
+bulk upgrade job, which resolves once, installs once and can roll back.
+With --fail one of the new wheels is broken, to check that the bulk
+upgrade leaves the environment as it found it.
+
+Usage: python benchmarks/bench_upgrade.py [--packages 30] [--chain 5] [--fail]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def package_name(index):
+    return f"bench_upgrade_{index}"
+
+
+def write_wheel(directory, index, version, requires=(), broken=False):
+    name = package_name(index)
+    dist_info = f"{name}-{version}.dist-info"
+    files = {
+        f"{name}/__init__.py": f"VERSION = {version!r}\n",
+        f"{dist_info}/METADATA": "".join(
+            [f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"] +
+            [f"Requires-Dist: {requirement}\n" for requirement in requires]
+        ),
+        f"{dist_info}/WHEEL": "Wheel-Version: 1.0\nGenerator: bench\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+    }
+    if broken:
+        # pip refuses to install files outside the environment, halfway through the transaction
+        files["../../outside.txt"] = "broken\n"
+    record = "".join(f"{path},,\n" for path in files) + f"{dist_info}/RECORD,,\n"
+    path = os.path.join(directory, f"{name}-{version}-py3-none-any.whl")
+    with zipfile.ZipFile(path, "w") as archive:
+        for file_path, text in files.items():
+            archive.writestr(file_path, text)
+        archive.writestr(f"{dist_info}/RECORD", record)
+    return path
+
+
+def installed_versions(python):
+    output = subprocess.run(
+        [python, "-m", "pip", "list", "--format=freeze", "--disable-pip-version-check"],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return dict(line.split("==") for line in output.split() if line.startswith("bench"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packages", type=int, default=30, help="outdated packages to upgrade")
+    parser.add_argument("--chain", type=int, default=5, help="length of the dependency chains")
+    parser.add_argument("--fail", action="store_true", help="break one wheel to test the rollback")
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp(prefix="bench-upgrade-")
+    os.environ["PYPACKMANAGER_HOME"] = home
+
+    from install_manager import InstallManager, SUCCEEDED
+    from wheel_store import WheelStore
+    from bulk_upgrade import submit_upgrade
+
+    print(f"Creating a virtual environment in {home}...")
+    venv = os.path.join(home, "venv")
+    subprocess.run([sys.executable, "-m", "venv", venv], check=True)
+    python = os.path.join(venv, "Scripts" if os.name == "nt" else "bin", "python")
+
+    old_dir = os.path.join(home, "old")
+    new_dir = os.path.join(home, "new")
+    os.makedirs(old_dir)
+    os.makedirs(new_dir)
+    store = WheelStore(os.path.join(home, "wheels"))
+    broken = args.packages // 2 if args.fail else None
+    old_wheels = []
+    for index in range(args.packages):
+        # Every 2.0 needs the 2.0 of the package before it in its chain
+        requires = [f"{package_name(index - 1)}>=2.0"] if index % args.chain else []
+        old_wheels.append(write_wheel(old_dir, index, "1.0"))
+        store.add(write_wheel(new_dir, index, "2.0", requires, broken=index == broken))
+
+    def install_old():
+        subprocess.run(
+            [python, "-m", "pip", "install", "--quiet", "--disable-pip-version-check", "--no-deps",
+             "--force-reinstall"] + old_wheels,
+            check=True
+        )
+
+    packages = [{"name": package_name(i), "version": "1.0", "latest": "2.0"} for i in range(args.packages)]
+    manager = InstallManager(logs_dir=home, downloads_dir=home, wheel_store=store)
+    manager.offline = True
+
+    if not args.fail:
+        install_old()
+        start = time.perf_counter()
+        for package in packages:
+            subprocess.run(
+                [python, "-m", "pip", "install", "--quiet", "--disable-pip-version-check", "--no-index",
+                 "--find-links", store.find_links(), f"{package['name']}==2.0"],
+                check=True
+            )
+        sequential = time.perf_counter() - start
+        print(f"  one pip run per package:  {sequential:6.2f} s")
+
+    install_old()
+    start = time.perf_counter()
+    job = submit_upgrade(manager, packages, python)
+    while not job.finished:
+        time.sleep(0.05)
+    bulk = time.perf_counter() - start
+    print(f"  bulk upgrade:             {bulk:6.2f} s  ({job.state}: {job.status})")
+
+    versions = installed_versions(python)
+    upgraded = sum(1 for version in versions.values() if version == "2.0")
+    print(f"  {upgraded} of {args.packages} packages at 2.0 afterwards")
+    if args.fail:
+        intact = job.state != SUCCEEDED and all(versions.get(p["name"]) == "1.0" for p in packages)
+        print(f"  rolled back cleanly: {intact}")
+    print(f"Log: {job.log_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Sort the release lists of many packages with version_key and with packaging.
+
+Generates realistic release histories (pre-releases, post-releases, dev
+builds, the odd invalid version) and sorts each package's releases
+newest first, the way the search results and detail page do.
+
+Usage: python benchmarks/bench_version_key.py [--packages 500] [--releases 120]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from version_key import sort_versions, version_key
+
+try:
+    from packaging.version import Version, InvalidVersion
+except ImportError:
+    from pip._vendor.packaging.version import Version, InvalidVersion
+
+
+def make_releases(count, rng):
+    releases = set()
+    while len(releases) < count:
+        version = f"{rng.randrange(30)}.{rng.randrange(20)}.{rng.randrange(15)}"
+        roll = rng.random()
+        if roll < 0.1:
+            version += rng.choice(["a1", "b2", "rc1", "rc2"])
+        elif roll < 0.14:
+            version += ".post1"
+        elif roll < 0.16:
+            version += ".dev0"
+        elif roll < 0.165:
+            version = "2004d"  # Legacy, not PEP 440
+        releases.add(version)
+    releases = list(releases)
+    rng.shuffle(releases)
+    return releases
+
+
+def packaging_sort(releases):
+    def key(version):
+        try:
+            return (1, Version(version))
+        except InvalidVersion:
+            return (0, version)
+    return sorted(releases, key=key, reverse=True)
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packages", type=int, default=500, help="packages to sort")
+    parser.add_argument("--releases", type=int, default=120, help="releases per package")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    packages = [make_releases(args.releases, rng) for _ in range(args.packages)]
+    total = args.packages * args.releases
+
+    version_key.cache_clear()
+    cold = timed(lambda: [sort_versions(releases) for releases in packages])
+    warm = timed(lambda: [sort_versions(releases) for releases in packages])
+    reference = timed(lambda: [packaging_sort(releases) for releases in packages])
+    mismatches = sum(
+        1 for releases in packages
+        if [str(v) for v in sort_versions(releases) if version_key(v)[0]] !=
+           [v for v in packaging_sort(releases) if version_key(v)[0]]
+    )
+
+    print(f"{args.packages} packages x {args.releases} releases ({total} versions)")
+    print(f"  packaging.Version sort:  {reference * 1000:8.1f} ms")
+    print(f"  version_key, first run:  {cold * 1000:8.1f} ms")
+    print(f"  version_key, cached:     {warm * 1000:8.1f} ms")
+    print(f"  packages ordered differently from packaging: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Local stand-in for the PyPI JSON API, used by the benchmark scripts.
+
+Every request sleeps for ``latency`` seconds before answering so that
+network round trips can be simulated without touching pypi.org. Responses
+carry an ETag and conditional requests are answered with 304.
+
+A fixture index for dependency resolution can be given as ``projects``:
+{name: {version: {"requires_dist": [...], "requires_python": ...}}}. Those
+projects are served with their release files and also answer
+``/pypi/<name>/<version>/json``.
+"""
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+def make_package_document(name, release_count=20):
+    releases = {
+        f"1.{i}.0": [{"upload_time": f"2024-01-{(i % 28) + 1:02d}T12:00:00"}]
+        for i in range(release_count)
+    }
+    return {
+        "info": {
+            "name": name,
+            "summary": f"Stand-in package {name}",
+            "author": "Benchmark",
+            "project_url": f"https://pypi.org/project/{name}/",
+            "description": f"# {name}\n\nLong description for {name}.\n",
+        },
+        "releases": releases,
+    }
+
+
+def make_project_document(name, releases):
+    files = {
+        version: [{
+            "filename": f"{name}-{version}-py3-none-any.whl",
+            "requires_python": release.get("requires_python"),
+            "yanked": release.get("yanked", False),
+            "upload_time": "2024-01-01T12:00:00",
+        }]
+        for version, release in releases.items()
+    }
+    return {"info": {"name": name, "summary": f"Fixture package {name}"}, "releases": files}
+
+
+def make_release_document(name, version, release):
+    return {"info": {
+        "name": name,
+        "version": version,
+        "requires_dist": release.get("requires_dist") or None,
+        "requires_python": release.get("requires_python"),
+    }}
+
+
+class FakePyPIServer:
+    """Serve ``/pypi/<name>/json`` from a background thread.
+
+    ``slow`` maps package names to an extra delay and ``missing`` lists
+    names that answer 404, to exercise timeouts and partial results.
+    """
+
+    def __init__(self, latency=0.2, slow=None, missing=(), projects=None):
+        self.latency = latency
+        self.slow = dict(slow or {})
+        self.missing = set(missing)
+        self.projects = dict(projects or {})
+        self.request_count = 0
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.request_count += 1
+                parts = self.path.strip("/").split("/")
+                if len(parts) not in (3, 4) or parts[0] != "pypi" or parts[-1] != "json":
+                    self.send_error(404)
+                    return
+
+                name = parts[1]
+                time.sleep(server.latency + server.slow.get(name, 0))
+                releases = server.projects.get(name)
+                if name in server.missing or (len(parts) == 4 and (releases is None or parts[2] not in releases)):
+                    self.send_error(404)
+                    return
+
+                etag = f'"{name}-1"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                if len(parts) == 4:
+                    document = make_release_document(name, parts[2], releases[parts[2]])
+                elif releases is not None:
+                    document = make_project_document(name, releases)
+                else:
+                    document = make_package_document(name)
+                body = json.dumps(document).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output readable
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}/pypi"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,360 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from app_paths import data_dir
+from metadata_cache import normalize_name
+from downloader import DownloadError, DownloadCancelled, file_name_from_url, file_sha256, shared_downloader
+from install_manager import CREATION_FLAGS, CANCEL_GRACE_PERIOD, SUCCEEDED, FAILED, CANCELLED
+from install_plan import resolve_install_plan
+from inventory import DIST_INFO, distribution_entries, read_distribution, record_files, site_package_dirs
+
+PREPARE_WORKERS = 6      # Files downloaded or built into wheels at the same time
+PREPARE_SHARE = 60       # Percent of the job's progress bar spent preparing files
+
+
+class UpgradeError(Exception):
+    pass
+
+
+def dependency_levels(items):
+    """Group plan items so that each one only depends on items in earlier groups.
+
+    Dependencies outside the plan (already installed) don't count. When
+    the rest of the plan is a dependency cycle it goes into one last group,
+    since no order satisfies it anyway.
+    """
+    items_by_name = {normalize_name(item.name): item for item in items}
+    remaining = {
+        key: (set(item.requires) & items_by_name.keys()) - {key}
+        for key, item in items_by_name.items()
+    }
+    levels = []
+    done = set()
+    while remaining:
+        ready = [key for key, requires in remaining.items() if requires <= done] or list(remaining)
+        levels.append([items_by_name[key] for key in sorted(ready)])
+        done.update(ready)
+        for key in ready:
+            del remaining[key]
+    return levels
+
+
+def install_order(items):
+    """Plan items with every dependency before the packages that need it."""
+    return [item for level in dependency_levels(items) for item in level]
+
+
+def interpreter_site_dirs(python):
+    """The directories on ``python``'s sys.path that can hold installed distributions."""
+    # Not environment_key(): a virtual environment's python is a link to the base interpreter
+    if os.path.normcase(os.path.abspath(python)) == os.path.normcase(os.path.abspath(sys.executable)):
+        return site_package_dirs()
+    result = subprocess.run(
+        [python, "-c", "import json, sys; print(json.dumps(sys.path))"],
+        stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=30, creationflags=CREATION_FLAGS
+    )
+    if result.returncode != 0:
+        raise UpgradeError(f"Could not ask {python} for its site-packages")
+    try:
+        paths = json.loads(result.stdout)
+    except ValueError as e:
+        raise UpgradeError(f"Could not read the sys.path of {python}: {e}") from e
+    return [path for path in paths if path and os.path.isdir(path)]
+
+
+def installed_distributions(python, names):
+    """Inventory records of every installed distribution of the projects ``names`` (normalized).
+
+    Unlike scan_distributions, shadowed copies are included too, such as
+    the metadata a failed install left next to the old version.
+    """
+    packages = []
+    for site_dir in interpreter_site_dirs(python):
+        for entry_name in sorted(distribution_entries(site_dir)):
+            package = read_distribution(site_dir, entry_name)
+            if package is not None and normalize_name(package["name"]) in names:
+                packages.append(package)
+    return packages
+
+
+def remove_distribution(package):
+    """Delete the files of an installed .dist-info distribution, like `pip uninstall` without the stash."""
+    site_dir = package["location"]
+    try:
+        paths = record_files(package["metadata_path"])
+    except OSError:
+        # An install that stopped before writing RECORD; the snapshot covers the rest
+        shutil.rmtree(package["metadata_path"], ignore_errors=True)
+        return
+    directories = set()
+    for path in paths:
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        directories.add(os.path.dirname(path))
+    # Drop the package directories the removal emptied, but never site-packages itself
+    for directory in sorted(directories, key=len, reverse=True):
+        while directory != site_dir and directory.startswith(site_dir + os.sep):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+
+
+class InstallSnapshot:
+    """The installed files of some distributions, saved so they can be put back.
+
+    Files are hard linked into ``root`` where possible, so saving an
+    environment costs directory entries rather than copies. That is safe
+    because pip never writes to installed files: it moves the old ones
+    aside and writes new files, so the links keep the old contents.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.files = []  # (installed path, saved copy)
+        self.distributions = []  # Inventory records of the saved distributions
+        self.skipped = []  # Names of distributions without a RECORD, which can't be saved
+
+    def add(self, package):
+        if not package["metadata_path"].endswith(DIST_INFO):
+            self.skipped.append(package["name"])
+            return False
+        try:
+            paths = record_files(package["metadata_path"])
+        except OSError:
+            self.skipped.append(package["name"])
+            return False
+        for path in paths:
+            if not os.path.isfile(path):
+                continue  # Directories, and bytecode that was never written
+            saved = os.path.join(self.root, str(len(self.files)))
+            try:
+                os.link(path, saved)
+            except OSError:
+                shutil.copy2(path, saved)  # Another drive, or links not supported
+            self.files.append((path, saved))
+        self.distributions.append(package)
+        return True
+
+    def restore(self):
+        """Put every saved file back where it was installed."""
+        for path, saved in self.files:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                os.replace(saved, path)
+            except OSError:
+                shutil.copy2(saved, path)
+
+    def discard(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def build_wheel(python, sdist, wheel_dir, is_cancelled=None):
+    """Build a wheel for ``python`` from a source archive and return its path."""
+    command = [
+        python, "-m", "pip", "wheel", "--no-deps", "--disable-pip-version-check", "--no-input",
+        "--progress-bar", "off", "--wheel-dir", wheel_dir, sdist,
+    ]
+    process = subprocess.Popen(
+        command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, encoding="utf-8", errors="replace", creationflags=CREATION_FLAGS
+    )
+    while True:
+        try:
+            output, _ = process.communicate(timeout=0.5)
+            break
+        except subprocess.TimeoutExpired:
+            if is_cancelled is not None and is_cancelled():
+                process.terminate()
+                try:
+                    process.communicate(timeout=CANCEL_GRACE_PERIOD)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.communicate()
+                raise DownloadCancelled("Cancelled")
+    wheels = [name for name in os.listdir(wheel_dir) if name.endswith(".whl")]
+    if process.returncode != 0 or not wheels:
+        lines = output.strip().splitlines()
+        raise UpgradeError(f"Building {os.path.basename(sdist)} failed: {lines[-1] if lines else process.returncode}")
+    return os.path.join(wheel_dir, wheels[0])
+
+
+def submit_upgrade(manager, packages, python=None):
+    """Queue an upgrade of {"name", "latest"} dicts (InstalledPackageModel.outdated_packages) as one job."""
+    requirements = [f"{package['name']}=={package['latest']}" for package in packages]
+    return manager.submit(requirements, python, action="upgrade", runner=run_upgrade)
+
+
+def run_upgrade(manager, job, store):
+    """InstallManager runner for upgrade jobs.
+
+    1. pip resolves the pinned upgrades together in a dry run, so the
+       plan holds every changed distribution and what each depends on.
+    2. Every file is taken from the wheel store or downloaded, and sdists
+       are built into wheels, all in parallel.
+    3. The distributions about to be replaced are snapshotted.
+    4. One `pip install --no-deps --no-index` installs the prepared wheels,
+       dependencies first. If it fails (or is cancelled) the new files are
+       removed and the snapshot restored, so the environment ends up as it
+       was rather than half upgraded.
+    """
+    started = time.perf_counter()
+
+    def update(progress, status):
+        job.progress = progress
+        job.status = status
+        manager.job_changed.emit(job)
+
+    def finish(state, status):
+        job.state = state
+        job.status = status
+
+    update(2, "Resolving upgrades...")
+    try:
+        index_options = ["--no-index", "--find-links", store.find_links()] if job.offline else []
+        plan = resolve_install_plan(job.requirements, job.python, index_options)
+    except Exception as e:
+        job.log.append(str(e))
+        return finish(FAILED, f"Could not resolve the upgrade: {e}")
+    if job.cancel_requested:
+        return finish(CANCELLED, "Cancelled")
+    if not plan.items:
+        job.progress = 100
+        return finish(SUCCEEDED, "Already up to date")
+    if plan.downloads() is None:
+        # e.g. VCS requirements, which pip has to fetch itself
+        return finish(FAILED, "Some packages can't be downloaded directly; upgrade them one at a time")
+
+    levels = dependency_levels(plan.items)
+    job.log.append(f"Upgrading {len(plan.items)} distributions in {len(levels)} dependency levels:")
+    for depth, level in enumerate(levels, 1):
+        job.log.append(f"  {depth}: " + ", ".join(f"{item.name} {item.version}" for item in level))
+
+    try:
+        wheels = prepare_wheels(manager, job, store, plan.items, update)
+    except DownloadCancelled:
+        return finish(CANCELLED, "Cancelled")
+    except (DownloadError, UpgradeError, OSError) as e:
+        job.log.append(str(e))
+        return finish(FAILED, str(e))
+    job.log.append(f"Prepared {len(wheels)} wheels in {time.perf_counter() - started:.1f}s")
+
+    update(PREPARE_SHARE, "Saving the installed versions...")
+    snapshot = InstallSnapshot(data_dir("rollback", f"{time.strftime('%Y%m%d-%H%M%S')}-{job.id}"))
+    try:
+        for package in installed_distributions(job.python, {normalize_name(item.name) for item in plan.items}):
+            snapshot.add(package)
+    except (UpgradeError, OSError, subprocess.SubprocessError) as e:
+        snapshot.discard()
+        job.log.append(str(e))
+        return finish(FAILED, f"Could not save the installed versions: {e}")
+    if snapshot.skipped:
+        job.log.append("Can't be rolled back (no RECORD): " + ", ".join(snapshot.skipped))
+
+    command = [
+        job.python, "-m", "pip", "install", "--disable-pip-version-check", "--no-input",
+        "--progress-bar", "off", "--no-deps", "--no-index",
+    ] + [wheels[normalize_name(item.name)] for item in install_order(plan.items)]
+    job.returncode = manager.run_pip(job, command)
+    if job.returncode == 0:
+        snapshot.discard()
+        job.progress = 100
+        job.log.append(f"Upgraded {len(plan.items)} distributions in {time.perf_counter() - started:.1f}s")
+        return finish(SUCCEEDED, f"Upgraded {len(plan.items)} packages")
+
+    update(job.progress, "Rolling back...")
+    try:
+        roll_back(job.python, plan.items, snapshot)
+    except (UpgradeError, OSError, subprocess.SubprocessError) as e:
+        job.log.append(f"Rollback failed: {e}; the saved files are in {snapshot.root}")
+        return finish(FAILED, f"Upgrade failed and could not be rolled back: {e}")
+    snapshot.discard()
+    job.log.append("Rolled back to the versions installed before")
+    if job.cancel_requested:
+        return finish(CANCELLED, "Cancelled, nothing was upgraded")
+    return finish(FAILED, "Upgrade failed, nothing was changed")
+
+
+def prepare_wheels(manager, job, store, items, update, python=None):
+    """Fetch (and build, for sdists) a wheel for every plan item in parallel.
+
+    Sdists are built with ``python`` (default: the job's interpreter).
+    Returns {normalized name: wheel path}. The files stay held in the
+    store until the job ends, so they can't be evicted before pip runs.
+    The first failure stops the other workers and is raised.
+    """
+    downloader = manager.downloader or shared_downloader()
+    downloads_dir = manager.downloads_dir or data_dir("downloads")
+    stop = threading.Event()
+    lock = threading.Lock()
+
+    def cancelled():
+        return stop.is_set() or job.cancel_requested
+
+    def hold(sha256):
+        store.hold([sha256])
+        with lock:
+            job.held.append(sha256)
+
+    def prepare(item):
+        if cancelled():
+            raise DownloadCancelled("Cancelled")
+        path = store.get(item.sha256)
+        if path is not None:
+            hold(item.sha256)
+        elif job.offline:
+            raise UpgradeError(f"Offline: {file_name_from_url(item.url)} is not cached")
+        else:
+            downloaded = downloader.download(
+                item.url, os.path.join(downloads_dir, file_name_from_url(item.url)), item.sha256,
+                is_cancelled=cancelled
+            )
+            hold(item.sha256)
+            path = store.add(downloaded, item.sha256)
+        if path.endswith(".whl"):
+            return path
+
+        with tempfile.TemporaryDirectory(prefix="pypackmanager-build-") as wheel_dir:
+            built = build_wheel(python or job.python, path, wheel_dir, cancelled)
+            sha256 = file_sha256(built)
+            hold(sha256)
+            return store.add(built, sha256)
+
+    # Builds are the slow part, so they start first and downloads fill the remaining workers
+    queue = sorted(items, key=lambda item: item.url.endswith(".whl"))
+    wheels = {}
+    with ThreadPoolExecutor(max_workers=PREPARE_WORKERS, thread_name_prefix="upgrade-prepare") as executor:
+        futures = {executor.submit(prepare, item): item for item in queue}
+        try:
+            for future in as_completed(futures):
+                item = futures[future]
+                wheels[normalize_name(item.name)] = future.result()
+                update(len(wheels) * PREPARE_SHARE // len(items), f"Prepared {len(wheels)} of {len(items)}: {item.name}")
+        except BaseException:
+            stop.set()
+            for future in futures:
+                future.cancel()
+            raise
+    return wheels
+
+
+def roll_back(python, items, snapshot):
+    """Remove whatever the failed install left of ``items`` and put the snapshot back."""
+    for package in installed_distributions(python, {normalize_name(item.name) for item in items}):
+        if package["metadata_path"].endswith(DIST_INFO):
+            remove_distribution(package)
+    snapshot.restore()
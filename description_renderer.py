@@ -0,0 +1,488 @@
+import hashlib
+import html
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from app_paths import data_dir
+from metadata_cache import normalize_name
+
+# Optional renderers; without them the small converters below are used
+try:
+    import markdown
+except ImportError:
+    markdown = None
+try:
+    from docutils.core import publish_parts
+except ImportError:
+    publish_parts = None
+
+RENDER_VERSION = 1  # Bump when the output changes, so cached HTML is rendered again
+MAX_MEMORY_ENTRIES = 16
+MAX_DISK_ENTRIES = 300
+BLOCK_SEPARATOR = "\n<!--block-->\n"
+
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+def description_format(text, content_type):
+    """"markdown", "rst" or "plain" for a description and its description_content_type."""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type == "text/markdown":
+        return "markdown"
+    if content_type == "text/plain":
+        return "plain"
+    if content_type == "text/x-rst":
+        return "rst"
+    # PyPI treats untyped descriptions as rST, but many are really Markdown
+    if re.search(r"^(#{1,6} |```)", text, re.MULTILINE):
+        return "markdown"
+    return "rst"
+
+
+def render_description(text, content_type=""):
+    """Render a long description to a list of top-level HTML blocks.
+
+    The blocks can be painted one after another, so the first screenful
+    shows up before a large README is laid out completely.
+    """
+    text = (text or "").replace("\r\n", "\n").replace("\t", "    ")
+    if not text.strip():
+        return ["<p>No detailed description available</p>"]
+
+    kind = description_format(text, content_type)
+    try:
+        if kind == "markdown" and markdown is not None:
+            return split_html_blocks(markdown.markdown(text, extensions=["fenced_code", "tables"]))
+        if kind == "rst" and publish_parts is not None:
+            parts = publish_parts(text, writer_name="html", settings_overrides={
+                "raw_enabled": False, "file_insertion_enabled": False, "report_level": 5, "halt_level": 5,
+            })
+            return split_html_blocks(parts["html_title"] + parts["body"])
+    except Exception as e:
+        print(f"Could not render the description with {kind} library, using the simple renderer: {e}")
+
+    if kind == "markdown":
+        return render_markdown(text)
+    if kind == "rst":
+        return render_rst(text)
+    return render_plain(text)
+
+
+HTML_TAG = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9]*)[^>]*?(/?)>")
+
+
+def split_html_blocks(fragment):
+    """Split an HTML fragment after each of its top-level elements."""
+    blocks, start, depth = [], 0, 0
+    for match in HTML_TAG.finditer(fragment):
+        closing, tag, self_closing = match.groups()
+        if tag.lower() in VOID_ELEMENTS or self_closing:
+            continue
+        depth += -1 if closing else 1
+        if depth <= 0:
+            depth = 0
+            block = fragment[start:match.end()].strip()
+            if block:
+                blocks.append(block)
+            start = match.end()
+    if fragment[start:].strip():
+        blocks.append(fragment[start:].strip())
+    return blocks
+
+
+# Inline Markdown, applied to already escaped text
+CODE_SPAN = re.compile(r"(`+)(.+?)\1")
+IMAGE = re.compile(r"!\[([^\]]*)\]\(([^)\s]+)(?:\s+&quot;[^)]*&quot;)?\)")
+LINK = re.compile(r"\[([^\]]+)\]\(([^)\s]+)(?:\s+&quot;[^)]*&quot;)?\)")
+AUTOLINK = re.compile(r"&lt;(https?://[^\s&]+)&gt;")
+# Emphasis can't run past the next * or _ (or the end of the line), so a failed match costs
+# a short scan instead of one to the end of the paragraph for every delimiter
+EMPHASIS_TEXT = r"([^\s*_](?:[^*_\n]*?[^\s*_])?)"
+BOLD = re.compile(r"(\*\*|__)" + EMPHASIS_TEXT + r"\1")
+ITALIC = re.compile(r"(?<![\w*])([*_])" + EMPHASIS_TEXT + r"\1(?![\w*])")
+STRIKE = re.compile(r"~~([^\s~](?:[^~\n]*?[^\s~])?)~~")
+PLACEHOLDER = re.compile("\x00(\\d+)\x00")
+
+
+def markdown_inline(text):
+    codes = []
+
+    def keep_code(match):
+        codes.append(f"<code>{match.group(2).strip()}</code>")
+        return f"\x00{len(codes) - 1}\x00"
+
+    # Most lines have no markup at all, so only run the patterns that can match
+    text = html.escape(text, quote=False).replace('"', "&quot;")
+    if "`" in text:
+        text = CODE_SPAN.sub(keep_code, text)
+    if "](" in text:
+        text = IMAGE.sub(lambda m: f'<a href="{m.group(2)}">{m.group(1) or "image"}</a>', text)
+        text = LINK.sub(r'<a href="\2">\1</a>', text)
+    if "&lt;http" in text:
+        text = AUTOLINK.sub(r'<a href="\1">\1</a>', text)
+    if "*" in text or "_" in text:
+        text = BOLD.sub(r"<b>\2</b>", text)
+        text = ITALIC.sub(r"<i>\2</i>", text)
+    if "~~" in text:
+        text = STRIKE.sub(r"<s>\1</s>", text)
+    return PLACEHOLDER.sub(lambda m: codes[int(m.group(1))], text) if codes else text
+
+
+LIST_ITEM = re.compile(r"^\s{0,3}([-*+]|\d{1,9}[.)])\s+(.*)")
+FENCE = re.compile(r"^\s{0,3}(```|~~~)")
+ATX_HEADING = re.compile(r"^\s{0,3}(#{1,6})\s+(.*?)\s*#*\s*$")
+RULE = re.compile(r"^\s{0,3}([-*_])(\s*\1){2,}\s*$")
+TABLE_DIVIDER = re.compile(r"^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$")
+
+
+def render_markdown(text):
+    """Small CommonMark-ish converter for when the markdown package isn't installed."""
+    blocks = []
+    lines = text.split("\n")
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        if not stripped:
+            i += 1
+            continue
+
+        fence = FENCE.match(line)
+        if fence:
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith(fence.group(1)):
+                code.append(lines[i])
+                i += 1
+            blocks.append(f"<pre><code>{html.escape(chr(10).join(code))}</code></pre>")
+            i += 1
+            continue
+
+        heading = ATX_HEADING.match(line)
+        if heading:
+            level = len(heading.group(1))
+            blocks.append(f"<h{level}>{markdown_inline(heading.group(2))}</h{level}>")
+            i += 1
+            continue
+
+        if RULE.match(line):
+            blocks.append("<hr>")
+            i += 1
+            continue
+
+        if line.startswith("    "):
+            code = []
+            while i < len(lines) and (lines[i].startswith("    ") or not lines[i].strip()):
+                code.append(lines[i][4:])
+                i += 1
+            blocks.append(f"<pre><code>{html.escape(chr(10).join(code).rstrip())}</code></pre>")
+            continue
+
+        if stripped.startswith(">"):
+            quoted = []
+            while i < len(lines) and lines[i].strip().startswith(">"):
+                quoted.append(lines[i].strip()[1:].lstrip())
+                i += 1
+            blocks.append("<blockquote>" + "".join(render_markdown("\n".join(quoted))) + "</blockquote>")
+            continue
+
+        if stripped.startswith("<"):
+            # Raw HTML block (centered logos, badges, ...), up to the next blank line
+            raw = []
+            while i < len(lines) and lines[i].strip():
+                raw.append(lines[i])
+                i += 1
+            blocks.append("\n".join(raw))
+            continue
+
+        if "|" in line and i + 1 < len(lines) and TABLE_DIVIDER.match(lines[i + 1]) and "-" in lines[i + 1]:
+            rows = [line]
+            i += 2
+            while i < len(lines) and "|" in lines[i] and lines[i].strip():
+                rows.append(lines[i])
+                i += 1
+            blocks.append(_markdown_table(rows))
+            continue
+
+        item = LIST_ITEM.match(line)
+        if item:
+            ordered = item.group(1)[0].isdigit()
+            items = []
+            while i < len(lines):
+                item = LIST_ITEM.match(lines[i])
+                if item and item.group(1)[0].isdigit() != ordered:
+                    break  # A different kind of list starts
+                if item:
+                    items.append(item.group(2))
+                elif lines[i].strip() and items and lines[i].startswith(" "):
+                    items[-1] += " " + lines[i].strip()  # Continuation (nested lists are flattened)
+                else:
+                    break
+                i += 1
+            tag = "ol" if ordered else "ul"
+            blocks.append(f"<{tag}>" + "".join(f"<li>{markdown_inline(text)}</li>" for text in items) + f"</{tag}>")
+            continue
+
+        paragraph = []
+        while i < len(lines) and lines[i].strip():
+            next_line = lines[i]
+            if paragraph and (FENCE.match(next_line) or ATX_HEADING.match(next_line) or LIST_ITEM.match(next_line)):
+                break
+            if paragraph and re.match(r"^\s{0,3}(=+|-+)\s*$", next_line):
+                # Setext heading: the paragraph so far is its text
+                level = 1 if next_line.strip()[0] == "=" else 2
+                blocks.append(f"<h{level}>{markdown_inline(' '.join(paragraph))}</h{level}>")
+                paragraph = []
+                i += 1
+                break
+            paragraph.append(next_line.strip())
+            i += 1
+        if paragraph:
+            blocks.append(f"<p>{markdown_inline(' '.join(paragraph))}</p>")
+    return blocks
+
+
+def _markdown_table(rows):
+    def cells(row):
+        return [cell.strip() for cell in row.strip().strip("|").split("|")]
+
+    header = "".join(f"<th>{markdown_inline(cell)}</th>" for cell in cells(rows[0]))
+    body = "".join(
+        "<tr>" + "".join(f"<td>{markdown_inline(cell)}</td>" for cell in cells(row)) + "</tr>" for row in rows[1:]
+    )
+    return f"<table border='1' cellpadding='4' cellspacing='0'><tr>{header}</tr>{body}</table>"
+
+
+# Inline reStructuredText, applied to already escaped text
+RST_LITERAL = re.compile(r"``(.+?)``")
+RST_LINK = re.compile(r"`([^`<]+?)\s*&lt;([^`&]+)&gt;`__?")
+RST_ROLE = re.compile(r":[\w:.-]+:`([^`]+)`")
+RST_BOLD = re.compile(r"\*\*(?=\S)(.+?)(?<=\S)\*\*")
+RST_ITALIC = re.compile(r"(?<![\w*])\*(?=\S)(.+?)(?<=\S)\*(?![\w*])")
+RST_INTERPRETED = re.compile(r"`([^`]+)`_{0,2}")
+RST_SUBSTITUTION = re.compile(r"\|[\w -]+\|_?")
+
+RST_ADORNMENT = re.compile(r"^([=\-~^\"'`#*+_.:])\1{2,}\s*$")
+RST_DIRECTIVE = re.compile(r"^\.\.\s+(?:\|[^|]+\|\s+)?([\w-]+)::\s*(.*)$")
+RST_BULLET = re.compile(r"^\s*([-*+•]|\d+\.|#\.)\s+(.*)")
+
+
+def rst_inline(text):
+    literals = []
+
+    def keep_literal(match):
+        literals.append(f"<code>{match.group(1)}</code>")
+        return f"\x00{len(literals) - 1}\x00"
+
+    text = html.escape(text, quote=False)
+    if "`" in text:
+        text = RST_LITERAL.sub(keep_literal, text)
+        text = RST_LINK.sub(r'<a href="\2">\1</a>', text)
+        text = RST_ROLE.sub(r"<code>\1</code>", text)
+    if "*" in text:
+        text = RST_BOLD.sub(r"<b>\1</b>", text)
+        text = RST_ITALIC.sub(r"<i>\1</i>", text)
+    if "`" in text:
+        text = RST_INTERPRETED.sub(r"<i>\1</i>", text)
+    if "|" in text:
+        text = RST_SUBSTITUTION.sub("", text)  # Substitutions are mostly badges
+    return PLACEHOLDER.sub(lambda m: literals[int(m.group(1))], text) if literals else text
+
+
+def render_rst(text):
+    """Small reStructuredText converter for when docutils isn't installed.
+
+    Handles section titles, paragraphs, bullet lists, literal blocks and
+    code directives; other directives (images, badges, toctrees) are
+    left out.
+    """
+    blocks = []
+    heading_levels = []  # Adornment styles in order of first use
+    lines = text.split("\n")
+    i = 0
+
+    def indented_block(start):
+        # Lines indented past the first column (and blank lines between them)
+        end = start
+        while end < len(lines) and (not lines[end].strip() or lines[end][:1] in (" ", "\t")):
+            end += 1
+        block = lines[start:end]
+        while block and not block[-1].strip():
+            block.pop()
+        while block and not block[0].strip():
+            block.pop(0)
+        indent = min((len(l) - len(l.lstrip()) for l in block if l.strip()), default=0)
+        return [l[indent:] for l in block], end
+
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        if not stripped:
+            i += 1
+            continue
+
+        # Title with an overline and underline, or just an underline
+        if RST_ADORNMENT.match(line) and i + 2 < len(lines) and RST_ADORNMENT.match(lines[i + 2]) and lines[i + 1].strip():
+            style = "over" + line.strip()[0]
+            title, i = lines[i + 1].strip(), i + 3
+        elif i + 1 < len(lines) and RST_ADORNMENT.match(lines[i + 1]) and len(lines[i + 1].strip()) >= len(stripped) \
+                and not line.startswith(" "):
+            style = lines[i + 1].strip()[0]
+            title, i = stripped, i + 2
+        else:
+            style = None
+        if style is not None:
+            if style not in heading_levels:
+                heading_levels.append(style)
+            level = min(heading_levels.index(style) + 1, 6)
+            blocks.append(f"<h{level}>{rst_inline(title)}</h{level}>")
+            continue
+
+        directive = RST_DIRECTIVE.match(line)
+        if directive:
+            name = directive.group(1).lower()
+            i += 1
+            # Skip the directive's options, then take its content
+            while i < len(lines) and re.match(r"^\s+:[\w-]+:", lines[i]):
+                i += 1
+            content, i = indented_block(i)
+            if name in ("code", "code-block", "sourcecode"):
+                blocks.append(f"<pre><code>{html.escape(chr(10).join(content))}</code></pre>")
+            elif name in ("note", "warning", "tip", "important", "attention", "caution", "danger", "hint", "admonition"):
+                blocks.append(f"<blockquote><b>{name.capitalize()}:</b> " + "".join(render_rst("\n".join(content))) + "</blockquote>")
+            continue
+
+        if stripped.startswith(".. "):
+            # Comment, link target or footnote
+            i += 1
+            _, i = indented_block(i)
+            continue
+
+        if line.startswith(" "):
+            # Block quote
+            content, i = indented_block(i)
+            blocks.append("<blockquote>" + "".join(render_rst("\n".join(content))) + "</blockquote>")
+            continue
+
+        bullet = RST_BULLET.match(line)
+        if bullet:
+            ordered = bullet.group(1)[0].isdigit() or bullet.group(1) == "#."
+            items = []
+            while i < len(lines):
+                bullet = RST_BULLET.match(lines[i])
+                if bullet and not lines[i].startswith(" "):
+                    items.append(bullet.group(2).strip())
+                elif lines[i].strip() and items and lines[i].startswith(" "):
+                    items[-1] += " " + lines[i].strip()
+                elif not lines[i].strip() and i + 1 < len(lines) and RST_BULLET.match(lines[i + 1]):
+                    pass  # Blank line between items
+                else:
+                    break
+                i += 1
+            tag = "ol" if ordered else "ul"
+            blocks.append(f"<{tag}>" + "".join(f"<li>{rst_inline(text)}</li>" for text in items) + f"</{tag}>")
+            continue
+
+        paragraph = []
+        while i < len(lines) and lines[i].strip() and not lines[i].startswith(" "):
+            if paragraph and i + 1 < len(lines) and RST_ADORNMENT.match(lines[i + 1]):
+                break  # The next line is a section title
+            paragraph.append(lines[i].strip())
+            i += 1
+        text_block = " ".join(paragraph)
+        literal = text_block.endswith("::")
+        if literal:
+            text_block = text_block[:-1] if not text_block.endswith(" ::") else text_block[:-3]
+        if text_block:
+            blocks.append(f"<p>{rst_inline(text_block)}</p>")
+        if literal:
+            while i < len(lines) and not lines[i].strip():
+                i += 1
+            content, i = indented_block(i)
+            blocks.append(f"<pre><code>{html.escape(chr(10).join(content))}</code></pre>")
+    return blocks or render_plain(text)
+
+
+def render_plain(text):
+    return [
+        "<p>" + html.escape(paragraph.strip()).replace("\n", "<br>") + "</p>"
+        for paragraph in re.split(r"\n\s*\n", text) if paragraph.strip()
+    ]
+
+
+class DescriptionCache:
+    """Rendered descriptions per (package, version), in memory and on disk.
+
+    A release's description never changes, so once rendered it is read
+    back from the cache folder instead of being rendered again.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or data_dir("cache", "descriptions")
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, name, version, text, content_type=""):
+        """Return the HTML blocks of a description, rendering it if it isn't cached."""
+        # The cache file's path is the memory key too: it includes a digest of the text
+        path = self._file((normalize_name(name), version), text, content_type)
+        with self._lock:
+            blocks = self._memory.get(path)
+            if blocks is not None:
+                self._memory.move_to_end(path)
+                return blocks
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                blocks = f.read().split(BLOCK_SEPARATOR)
+        except OSError:
+            blocks = render_description(text, content_type)
+            self._save(path, blocks)
+
+        with self._lock:
+            self._memory[path] = blocks
+            while len(self._memory) > MAX_MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+        return blocks
+
+    def _file(self, key, text, content_type):
+        # The text is part of the key too: unreleased (or re-uploaded) metadata can change
+        digest = hashlib.sha1(f"{RENDER_VERSION}\0{content_type}\0{text}".encode("utf-8", "replace")).hexdigest()[:16]
+        name = re.sub(r"[^A-Za-z0-9._-]", "_", f"{key[0]}-{key[1]}")
+        return os.path.join(self.path, f"{name}-{digest}.html")
+
+    def _save(self, path, blocks):
+        try:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(BLOCK_SEPARATOR.join(blocks))
+            os.replace(tmp_path, path)
+            self._prune()
+        except OSError as e:
+            print(f"Could not cache rendered description: {e}")
+
+    def _prune(self):
+        files = [entry for entry in os.scandir(self.path) if entry.name.endswith(".html")]
+        if len(files) <= MAX_DISK_ENTRIES:
+            return
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in files[:len(files) - MAX_DISK_ENTRIES]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def shared_description_cache():
+    """Return the process-wide DescriptionCache, creating it on first use."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = DescriptionCache()
+        return _shared_cache
@@ -0,0 +1,98 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from pypi_client import PyPIClient
+from metadata_cache import shared_cache, normalize_name
+from description_renderer import shared_description_cache
+from version_key import sort_versions
+
+DETAIL_WORKERS = 2
+MAX_LOADED_DETAILS = 32  # Details (long descriptions) kept in memory, most recently used
+
+
+def package_details(data):
+    """The parts of a PyPI JSON document only the detail page needs.
+
+    List results (PyPISearchThread.process_package_data) carry just a
+    summary; this adds the long description, every release and the
+    classifiers.
+    """
+    info = data["info"]
+    releases = data.get("releases") or {}
+    versions = sort_versions([version for version, files in releases.items() if files] or releases.keys())
+    return {
+        "name": info["name"],
+        "long_desc": info.get("description") or "No detailed description available",
+        "content_type": info.get("description_content_type") or "",
+        "version": info.get("version") or "",
+        "versions": versions,
+        "classifiers": info.get("classifiers") or [],
+        "requires_python": info.get("requires_python") or "",
+        "license": info.get("license") or "",
+    }
+
+
+class DetailLoader(QObject):
+    """Loads package details for the detail page in the background.
+
+    get() returns details that are already loaded. request() loads them
+    off the GUI thread (from the metadata cache when the list fetched the
+    package recently), renders the long description to HTML blocks
+    ("description_blocks", cached per release) and emits
+    details_ready(normalized name, details);
+    calling it on hover means the details are usually there by the time
+    the page opens. Only the last MAX_LOADED_DETAILS are kept in memory.
+    """
+    details_ready = pyqtSignal(str, dict)
+    error_occurred = pyqtSignal(str, str)
+
+    def __init__(self, client=None, parent=None):
+        super().__init__(parent)
+        self.client = client or PyPIClient(cache=shared_cache())
+        self._executor = ThreadPoolExecutor(max_workers=DETAIL_WORKERS, thread_name_prefix="detail-loader")
+        self._details = OrderedDict()
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        key = normalize_name(name)
+        with self._lock:
+            details = self._details.get(key)
+            if details is not None:
+                self._details.move_to_end(key)
+            return details
+
+    def request(self, name):
+        """Load the details of ``name`` unless they are loaded or already on their way."""
+        key = normalize_name(name)
+        with self._lock:
+            if key in self._details or key in self._pending:
+                return
+            self._pending.add(key)
+        self._executor.submit(self._load, key, name)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _load(self, key, name):
+        try:
+            details = package_details(self.client.get_package(name))
+            # Only the rendered HTML is kept, not the (often much larger) source text
+            details["description_blocks"] = shared_description_cache().render(
+                details["name"], details["version"], details.pop("long_desc"), details["content_type"]
+            )
+        except Exception as e:
+            with self._lock:
+                self._pending.discard(key)
+            self.error_occurred.emit(key, str(e))
+            return
+
+        with self._lock:
+            self._pending.discard(key)
+            self._details[key] = details
+            while len(self._details) > MAX_LOADED_DETAILS:
+                self._details.popitem(last=False)
+        self.details_ready.emit(key, details)
@@ -0,0 +1,268 @@
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from inventory import record_entries, scan_distributions
+from metadata_cache import normalize_name
+
+WALK_WORKERS = 8
+PROGRESS_INTERVAL = 0.25  # Seconds between progress reports while walking
+
+# Disk usage of one environment. ``bytes`` counts every file, ``allocated`` the blocks they
+# use on disk and ``linked`` the bytes in files that have other hard links (already shared).
+EnvironmentUsage = namedtuple("EnvironmentUsage", "interpreter roots files bytes allocated linked packages")
+
+# The same release installed in several environments. ``size`` is one copy's installed size
+# and ``reclaimable`` what linking its identical files together (or to a shared store) would free.
+DuplicatePackage = namedtuple("DuplicatePackage", "name version environments size reclaimable")
+
+# ``on_disk`` counts files with several hard links once, across all environments
+DiskReport = namedtuple("DiskReport", "environments duplicates on_disk reclaimable")
+
+
+def usage_roots(interpreter):
+    """Folders whose contents belong to ``interpreter``'s environment.
+
+    Virtual, conda and pyenv environments own their whole prefix. A system
+    installation shares its prefix (e.g. /usr) with everything else on the
+    machine, so only its site directories are counted.
+    """
+    if interpreter.kind in ("venv", "conda", "pyenv"):
+        return [interpreter.prefix]
+    return list(interpreter.site_dirs)
+
+
+def allocated_size(stat):
+    # st_blocks is in 512-byte units; Windows doesn't have it
+    blocks = getattr(stat, "st_blocks", None)
+    return blocks * 512 if blocks is not None else stat.st_size
+
+
+def walk_usage(roots, workers=WALK_WORKERS, on_progress=None, is_cancelled=None):
+    """Total the files under each of ``roots`` with a pool of threads sharing a queue of folders.
+
+    Returns {root: [files, bytes, allocated, linked, unique allocated]}.
+    Symlinks aren't followed and a root nested in another is only counted
+    for itself. Memory stays bounded on huge trees: only folders waiting to
+    be listed are queued, and only files with several hard links are
+    remembered (by device and inode) so they are counted once on disk.
+    """
+    roots = [os.path.abspath(root) for root in roots if os.path.isdir(root)]
+    root_set = set(roots)
+    totals = {root: [0, 0, 0, 0, 0] for root in roots}
+    seen_links = set()
+    lock = threading.Lock()
+    folders = queue.Queue()
+    for root in roots:
+        folders.put((root, root))
+    scanned = [0, 0]  # Files and bytes reported so far
+    last_report = [time.monotonic()]
+
+    def flush(local):
+        with lock:
+            for root, counts in local.items():
+                total = totals[root]
+                for i, value in enumerate(counts):
+                    total[i] += value
+                scanned[0] += counts[0]
+                scanned[1] += counts[1]
+            report = on_progress is not None and time.monotonic() - last_report[0] >= PROGRESS_INTERVAL
+            if report:
+                last_report[0] = time.monotonic()
+                files, size = scanned
+        local.clear()
+        if report:
+            on_progress(files, size)
+
+    def worker():
+        local = {}
+        while True:
+            item = folders.get()
+            if item is None:
+                folders.task_done()
+                flush(local)
+                return
+            root, folder = item
+            try:
+                if is_cancelled is not None and is_cancelled():
+                    continue  # Drain the queue
+                counts = local.setdefault(root, [0, 0, 0, 0, 0])
+                try:
+                    with os.scandir(folder) as it:
+                        for entry in it:
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    if entry.path not in root_set:
+                                        folders.put((root, entry.path))
+                                    continue
+                                stat = entry.stat(follow_symlinks=False)
+                            except OSError:
+                                continue
+                            allocated = allocated_size(stat)
+                            counts[0] += 1
+                            counts[1] += stat.st_size
+                            counts[2] += allocated
+                            if stat.st_nlink > 1:
+                                counts[3] += stat.st_size
+                                key = (stat.st_dev, stat.st_ino)
+                                with lock:
+                                    if key in seen_links:
+                                        continue
+                                    seen_links.add(key)
+                            counts[4] += allocated
+                except OSError:
+                    pass  # Unreadable folder
+                if counts[0] >= 5000:
+                    flush(local)
+            finally:
+                folders.task_done()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+    folders.join()
+    for _ in threads:
+        folders.put(None)
+    for thread in threads:
+        thread.join()
+    return totals
+
+
+def reclaimable_bytes(copies):
+    """Bytes that sharing the identical files of several copies of one release would free.
+
+    Files are matched by their RECORD path and hash, so builds that differ
+    (e.g. compiled for another Python version) are only shared where they
+    really are the same. Copies that are already hard links of each other
+    count once.
+    """
+    files = {}  # (path, hash) -> (size, {(device, inode)})
+    for package in copies:
+        site_dir = package["location"]
+        try:
+            for path, digest, _ in record_entries(package["metadata_path"]):
+                if not digest:
+                    continue
+                try:
+                    stat = os.stat(os.path.join(site_dir, path))
+                except OSError:
+                    continue
+                entry = files.setdefault((path, digest), (stat.st_size, set()))
+                entry[1].add((stat.st_dev, stat.st_ino))
+        except OSError:
+            continue  # No RECORD (e.g. .egg-info)
+    return sum(size * (len(inodes) - 1) for size, inodes in files.values())
+
+
+def find_duplicates(inventories, workers=WALK_WORKERS, is_cancelled=None):
+    """Releases installed in more than one environment, largest saving first.
+
+    ``inventories`` pairs each interpreter with its installed packages (the
+    records PythonInfoCollector shows on My Python).
+    """
+    groups = {}
+    for interpreter, packages in inventories:
+        for package in packages:
+            key = (normalize_name(package["name"]), package["version"])
+            groups.setdefault(key, []).append((interpreter, package))
+    # Two interpreters of one environment see the same copy, which isn't a duplicate
+    shared = [copies for copies in groups.values() if len({p["metadata_path"] for _, p in copies}) > 1]
+
+    def measure(copies):
+        if is_cancelled is not None and is_cancelled():
+            return None
+        packages = [package for _, package in copies]
+        sizes = [package["size"] for package in packages if package.get("size")]
+        return DuplicatePackage(
+            packages[0]["name"], packages[0]["version"], [interpreter for interpreter, _ in copies],
+            max(sizes) if sizes else 0, reclaimable_bytes(packages)
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        duplicates = [duplicate for duplicate in executor.map(measure, shared) if duplicate is not None]
+    duplicates.sort(key=lambda d: (-d.reclaimable, -len(d.environments), d.name.lower()))
+    return duplicates
+
+
+def shared_counts(report, interpreter):
+    """{normalized name: other environments with the same release} for one environment's packages."""
+    counts = {}
+    for duplicate in report.duplicates:
+        if any(i.path == interpreter.path for i in duplicate.environments):
+            counts[normalize_name(duplicate.name)] = len(duplicate.environments) - 1
+    return counts
+
+
+def build_report(interpreters, inventories=None, workers=WALK_WORKERS, on_progress=None, is_cancelled=None):
+    """Disk usage of each environment and the releases they have in common.
+
+    ``inventories`` optionally maps interpreter paths to already collected
+    package lists (e.g. InventoryCache results); the others are scanned.
+    """
+    inventories = inventories or {}
+    packages = {}
+    for interpreter in interpreters:
+        found = inventories.get(interpreter.path)
+        packages[interpreter.path] = found if found is not None else scan_distributions(list(interpreter.site_dirs))
+
+    # A folder is counted for the first environment that owns it (e.g. two links to one venv)
+    owned = {}
+    for interpreter in interpreters:
+        for root in usage_roots(interpreter):
+            owned.setdefault(os.path.abspath(root), interpreter.path)
+    totals = walk_usage(list(owned), workers, on_progress, is_cancelled)
+
+    environments = []
+    on_disk = 0
+    for interpreter in interpreters:
+        roots = [root for root, owner in owned.items() if owner == interpreter.path]
+        counts = [0, 0, 0, 0, 0]
+        for root in roots:
+            for i, value in enumerate(totals.get(root, ())):
+                counts[i] += value
+        on_disk += counts[4]
+        environments.append(EnvironmentUsage(
+            interpreter, roots, counts[0], counts[1], counts[2], counts[3], len(packages[interpreter.path])
+        ))
+    environments.sort(key=lambda usage: -usage.allocated)
+
+    duplicates = find_duplicates(
+        [(interpreter, packages[interpreter.path]) for interpreter in interpreters], workers, is_cancelled
+    )
+    return DiskReport(environments, duplicates, on_disk, sum(d.reclaimable for d in duplicates))
+
+
+class DiskReportThread(QThread):
+    """Builds a DiskReport in the background, reporting files and bytes walked so far."""
+    progress = pyqtSignal(int, object)
+    report_ready = pyqtSignal(object)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, interpreters, inventories=None):
+        super().__init__()
+        self.interpreters = list(interpreters)
+        self.inventories = inventories
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            report = build_report(
+                self.interpreters, self.inventories,
+                on_progress=self.progress.emit, is_cancelled=self._cancelled.is_set
+            )
+        except Exception as e:
+            self.error_occurred.emit(f"Error: {str(e)}")
+            return
+        if self._cancelled.is_set():
+            return
+        print(f"Disk report of {len(self.interpreters)} environments in {time.perf_counter() - started:.2f}s")
+        self.report_ready.emit(report)
@@ -0,0 +1,598 @@
+import hashlib
+import http.client
+import json
+import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+
+CHUNK_SIZE = 64 * 1024       # Bytes read and hashed at a time; memory use doesn't grow with file size
+DEFAULT_TIMEOUT = 30         # Seconds allowed for connecting and for each read
+DEFAULT_MAX_WORKERS = 4      # Files downloaded at the same time
+DEFAULT_RETRIES = 3          # Resumed attempts after a dropped connection
+MAX_REDIRECTS = 5
+PROGRESS_INTERVAL = 0.1      # Minimum seconds between progress callbacks
+DEFAULT_SEGMENTS = 4         # Byte ranges fetched at the same time in a segmented download
+MIN_SEGMENT_SIZE = 2 * 1024 * 1024  # Files smaller than two of these are fetched in one piece
+STATE_INTERVAL = 1.0         # Minimum seconds between saves of a segmented download's state
+USER_AGENT = "PyPackManager"
+
+# Connection problems worth resuming after
+RETRYABLE_ERRORS = (OSError, http.client.HTTPException)
+
+
+class DownloadError(Exception):
+    pass
+
+
+class DownloadCancelled(DownloadError):
+    pass
+
+
+class HashMismatch(DownloadError):
+    pass
+
+
+class Download:
+    """One file to fetch into ``path``, verified against ``sha256`` if given.
+
+    While it is being fetched, ``received`` and ``total`` (None until the
+    server says) track its progress. With ``segments`` above 1 a large
+    file is fetched as that many byte ranges at once.
+    """
+
+    def __init__(self, url, path, sha256=None, size=None, segments=1):
+        self.url = url
+        self.path = path
+        self.sha256 = sha256.lower() if sha256 else None
+        self.segments = max(1, segments)
+        self.total = size
+        self.received = 0
+        self.resumed_from = 0
+        self.finished = False
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    @property
+    def part_path(self):
+        return self.path + ".part"
+
+    @property
+    def state_path(self):
+        return self.part_path + ".json"
+
+
+class DownloadProgress:
+    """Progress of a batch of downloads, handed to ``on_progress`` callbacks."""
+
+    def __init__(self, downloads):
+        self.downloads = list(downloads)
+        self.current = self.downloads[0] if self.downloads else None
+
+    @property
+    def received(self):
+        return sum(download.received for download in self.downloads)
+
+    @property
+    def total(self):
+        """Combined size in bytes, or None while some sizes are still unknown."""
+        if any(download.total is None for download in self.downloads):
+            return None
+        return sum(download.total for download in self.downloads)
+
+    @property
+    def finished(self):
+        return sum(1 for download in self.downloads if download.finished)
+
+    def percent(self):
+        total = self.total
+        if not total:
+            return 100 if self.downloads and self.finished == len(self.downloads) else 0
+        return min(100, int(self.received * 100 / total))
+
+    def describe(self):
+        """Short status like "3.2 MB of 12.0 MB (2 of 5 files)"."""
+        text = f"{format_size(self.received)}"
+        if self.total:
+            text += f" of {format_size(self.total)}"
+        if len(self.downloads) > 1:
+            text += f" ({self.finished} of {len(self.downloads)} files)"
+        return text
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def file_name_from_url(url):
+    return os.path.basename(urllib.parse.unquote(urllib.parse.urlsplit(url).path))
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ConnectionPool:
+    """Keeps idle HTTP(S) connections open between requests, per host.
+
+    Downloading many files from the same host (files.pythonhosted.org,
+    python.org) then costs one TCP and TLS handshake per worker instead of
+    one per file. request() hands out a connection that the caller gives
+    back with release() once the response has been read completely, or
+    closes with discard() if it hasn't.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_idle=DEFAULT_MAX_WORKERS):
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle = {}  # (scheme, host) -> [connection, ...]
+        self._lock = threading.Lock()
+
+    def request(self, url, headers):
+        """Send a GET and return (connection, response); retries once if an idle connection went stale."""
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                connection = idle.pop() if idle else None
+            reused = connection is not None
+            if connection is None:
+                connection = self._connect(parts)
+            try:
+                connection.request("GET", path, headers={"Host": parts.netloc, "User-Agent": USER_AGENT, **headers})
+                return connection, connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if not reused:
+                    raise
+
+    def release(self, url, connection):
+        parts = urllib.parse.urlsplit(url)
+        with self._lock:
+            idle = self._idle.setdefault((parts.scheme, parts.netloc), [])
+            if len(idle) < self.max_idle:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def discard(self, connection):
+        connection.close()
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                for connection in idle:
+                    connection.close()
+            self._idle = {}
+
+    def _connect(self, parts):
+        if parts.scheme == "https":
+            return http.client.HTTPSConnection(parts.hostname, parts.port, timeout=self.timeout)
+        if parts.scheme == "http":
+            return http.client.HTTPConnection(parts.hostname, parts.port, timeout=self.timeout)
+        raise DownloadError(f"Unsupported URL: {urllib.parse.urlunsplit(parts)}")
+
+
+class DownloadManager:
+    """Downloads files in parallel over reused connections, resuming where they stopped.
+
+    Data goes to ``<path>.part`` and is hashed as it arrives; an
+    interrupted download is continued with an HTTP Range request (the
+    existing bytes are re-hashed from disk first), and the file only gets
+    its final name once it is complete and matches its sha256. A file that
+    already exists with the right hash isn't downloaded again.
+    ``on_progress(DownloadProgress)`` is called from worker threads, at
+    most every PROGRESS_INTERVAL seconds and once at the end.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+        self.max_workers = max(1, max_workers)
+        self.retries = retries
+        self.pool = ConnectionPool(timeout)
+
+    def download(self, url, path, sha256=None, on_progress=None, is_cancelled=None, segments=1):
+        """Download one file and return its path; raises DownloadError.
+
+        ``segments`` above 1 splits a large file into that many byte ranges
+        fetched over separate connections (see _fetch_segmented).
+        """
+        return self.download_many([Download(url, path, sha256, segments=segments)], on_progress, is_cancelled)[0]
+
+    def download_many(self, downloads, on_progress=None, is_cancelled=None):
+        """Download several files at once and return their paths in the same order.
+
+        Stops at the first failure (or when ``is_cancelled()`` returns
+        True) and raises it; finished files are kept and partial ones are
+        resumed next time.
+        """
+        downloads = list(downloads)
+        progress = DownloadProgress(downloads)
+        reporter = _ProgressReporter(progress, on_progress)
+        stop = threading.Event()
+
+        def cancelled():
+            return stop.is_set() or (is_cancelled is not None and is_cancelled())
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(downloads) or 1), thread_name_prefix="download") as executor:
+            futures = [executor.submit(self._fetch, download, reporter, cancelled) for download in downloads]
+            done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in done:
+                if future.exception() is not None:
+                    stop.set()  # Let the other downloads wind down
+                    raise future.exception()
+
+        reporter.report(force=True)
+        return [download.path for download in downloads]
+
+    def close(self):
+        self.pool.close()
+
+    def _fetch(self, download, reporter, cancelled):
+        os.makedirs(os.path.dirname(os.path.abspath(download.path)), exist_ok=True)
+        if download.sha256 and os.path.exists(download.path) and file_sha256(download.path) == download.sha256:
+            download.total = download.received = os.path.getsize(download.path)
+            download.finished = True
+            reporter.report()
+            return download.path
+
+        for attempt in range(self.retries + 1):
+            try:
+                if urllib.parse.urlsplit(download.url).scheme == "file":
+                    digest = self._copy_local(download, reporter, cancelled)
+                elif download.segments > 1:
+                    digest = self._fetch_segmented(download, reporter, cancelled)
+                else:
+                    digest = self._fetch_http(download, reporter, cancelled)
+                break
+            except (DownloadCancelled, HashMismatch):
+                raise
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.retries:
+                    raise DownloadError(f"Could not download {download.name}: {e}") from e
+                time.sleep(min(2 ** attempt, 5))
+
+        if download.sha256 and digest.hexdigest() != download.sha256:
+            _remove(download.part_path)
+            _remove(download.state_path)
+            raise HashMismatch(f"{download.name} doesn't match its sha256 digest; the download was discarded")
+
+        os.replace(download.part_path, download.path)
+        _remove(download.state_path)
+        download.finished = True
+        reporter.report()
+        return download.path
+
+    def _fetch_http(self, download, reporter, cancelled):
+        state = _read_state(download)
+        if "segments" in state:
+            # Left by a segmented download: the part file has gaps, so it can't be continued from its end
+            _remove(download.part_path)
+            _remove(download.state_path)
+            state = {}
+        digest = hashlib.sha256()
+        offset = self._hash_existing_part(download, digest)
+        validator = state.get("validator")
+
+        headers = {"Accept-Encoding": "identity"}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            if validator:
+                headers["If-Range"] = validator  # Changed file: the server sends all of it again
+        url, connection, response = self._open(download.url, headers)
+
+        try:
+            if response.status == 416 and offset:
+                # Nothing left to send: the part file is already complete (or the file shrank)
+                self._finish(url, connection, response)
+                if download.sha256 is None or digest.hexdigest() == download.sha256:
+                    download.total = download.received = offset
+                    return digest
+                _remove(download.part_path)
+                raise HashMismatch(f"{download.name} doesn't match its sha256 digest; the download was discarded")
+            if response.status not in (200, 206):
+                self._finish(url, connection, response)
+                raise DownloadError(f"Could not download {download.name}: HTTP {response.status}")
+
+            mode = "ab"
+            if response.status == 200 or not _range_starts_at(response, offset):
+                # The server ignored the range: start over
+                digest, offset, mode = hashlib.sha256(), 0, "wb"
+            download.resumed_from = offset
+            download.received = offset
+            length = response.getheader("Content-Length")
+            if length is not None and length.isdigit():
+                download.total = offset + int(length)
+            _write_validator(download, response)
+
+            with open(download.part_path, mode) as f:
+                while True:
+                    if cancelled():
+                        raise DownloadCancelled(f"Download of {download.name} cancelled")
+                    chunk = response.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    digest.update(chunk)
+                    download.received += len(chunk)
+                    reporter.report()
+
+            if download.total is not None and download.received < download.total:
+                raise http.client.IncompleteRead(b"", download.total - download.received)
+        except BaseException:
+            # The rest of the body was never read, so the connection can't be reused
+            self.pool.discard(connection)
+            raise
+
+        self._finish(url, connection, response)
+        return digest
+
+    def _fetch_segmented(self, download, reporter, cancelled):
+        """Fetch a file as several byte ranges at once into a preallocated ``.part`` file.
+
+        Each range gets its own connection and writes at its own offset.
+        How far every range has got is saved to ``<path>.part.json`` (at
+        most every STATE_INTERVAL seconds and when the download stops), so
+        an interrupted download continues where each range stopped, also
+        after a restart. The sha256 is computed from the file at the end.
+        Small files and servers that don't answer range requests are
+        fetched in one piece with _fetch_http.
+        """
+        # A one-byte range tells the size, whether ranges work and what the file's validator is
+        url, connection, response = self._open(download.url, {"Range": "bytes=0-0", "Accept-Encoding": "identity"})
+        if response.status != 206:
+            self.pool.discard(connection)  # Don't read a whole body just to learn that ranges aren't supported
+            return self._fetch_http(download, reporter, cancelled)
+        size = _range_total(response)
+        validator = _validator(response)
+        self._finish(url, connection, response)
+        if size is None or size < 2 * MIN_SEGMENT_SIZE:
+            return self._fetch_http(download, reporter, cancelled)
+
+        state = _read_state(download)
+        segments = state.get("segments")
+        if not segments or state.get("size") != size or state.get("validator") != validator \
+                or _file_size(download.part_path) != size:
+            segments = _plan_segments(size, download.segments)
+            with open(download.part_path, "wb") as f:
+                _preallocate(f, size)
+
+        lock = threading.Lock()
+        stop = threading.Event()
+        last_saved = [time.monotonic()]
+
+        def save(force=False):
+            with lock:
+                now = time.monotonic()
+                if not force and now - last_saved[0] < STATE_INTERVAL:
+                    return
+                last_saved[0] = now
+                _write_state(download, {
+                    "url": download.url, "validator": validator, "size": size,
+                    "segments": [list(segment) for segment in segments],
+                })
+
+        def fetch_range(segment):
+            # segment is [next byte to fetch, end of the range (exclusive)]
+            headers = {"Range": f"bytes={segment[0]}-{segment[1] - 1}", "Accept-Encoding": "identity"}
+            if validator:
+                headers["If-Range"] = validator
+            connection, response = self.pool.request(url, headers)
+            try:
+                if response.status == 200:
+                    # If-Range failed: the file changed since the download started, so the next attempt starts over
+                    _remove(download.state_path)
+                    raise http.client.HTTPException(f"{download.name} changed on the server during the download")
+                if response.status != 206 or not _range_starts_at(response, segment[0]):
+                    raise DownloadError(f"Could not download {download.name}: HTTP {response.status}")
+                # Unbuffered, so everything the saved state counts as fetched has reached the file
+                with open(download.part_path, "r+b", buffering=0) as f:
+                    f.seek(segment[0])
+                    while segment[0] < segment[1]:
+                        if stop.is_set() or cancelled():
+                            raise DownloadCancelled(f"Download of {download.name} cancelled")
+                        chunk = response.read(min(CHUNK_SIZE, segment[1] - segment[0]))
+                        if not chunk:
+                            raise http.client.IncompleteRead(b"", segment[1] - segment[0])
+                        f.write(chunk)
+                        with lock:
+                            segment[0] += len(chunk)
+                            download.received += len(chunk)
+                        reporter.report()
+                        save()
+            except BaseException:
+                self.pool.discard(connection)
+                raise
+            self._finish(url, connection, response)
+
+        download.total = size
+        download.received = download.resumed_from = size - sum(end - start for start, end in segments)
+        save(force=True)
+        pending = [segment for segment in segments if segment[0] < segment[1]]
+        error = None
+        if pending:
+            with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="segment") as executor:
+                futures = [executor.submit(fetch_range, segment) for segment in pending]
+                done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+                error = next((future.exception() for future in done if future.exception() is not None), None)
+                if error is not None:
+                    stop.set()  # Let the other ranges wind down
+            save(force=True)
+        if error is not None:
+            raise error
+
+        digest = hashlib.sha256()
+        with open(download.part_path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest
+
+    def _open(self, url, headers):
+        """GET ``url`` following redirects; returns (final url, connection, response)."""
+        for _ in range(MAX_REDIRECTS + 1):
+            connection, response = self.pool.request(url, headers)
+            if response.status in (301, 302, 303, 307, 308) and response.getheader("Location"):
+                self._finish(url, connection, response)
+                url = urllib.parse.urljoin(url, response.getheader("Location"))
+                continue
+            return url, connection, response
+        raise DownloadError(f"Too many redirects for {url}")
+
+    def _finish(self, url, connection, response):
+        """Read what is left of a response and put its connection back in the pool."""
+        response.read()
+        if response.will_close:
+            self.pool.discard(connection)
+        else:
+            self.pool.release(url, connection)
+
+    def _copy_local(self, download, reporter, cancelled):
+        # file:// URLs, e.g. from a local wheelhouse
+        source = urllib.request.url2pathname(urllib.parse.urlsplit(download.url).path)
+        digest = hashlib.sha256()
+        download.total = os.path.getsize(source)
+        download.received = 0
+        with open(source, "rb") as src, open(download.part_path, "wb") as dst:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                if cancelled():
+                    raise DownloadCancelled(f"Download of {download.name} cancelled")
+                dst.write(chunk)
+                digest.update(chunk)
+                download.received += len(chunk)
+                reporter.report()
+        return digest
+
+    def _hash_existing_part(self, download, digest):
+        try:
+            with open(download.part_path, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                return f.tell()
+        except OSError:
+            return 0
+
+
+class _ProgressReporter:
+    """Calls on_progress for a batch, from any worker thread, at a limited rate."""
+
+    def __init__(self, progress, on_progress):
+        self.progress = progress
+        self.on_progress = on_progress
+        self._last = 0
+        self._lock = threading.Lock()
+
+    def report(self, force=False):
+        if self.on_progress is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last < PROGRESS_INTERVAL:
+                return
+            self._last = now
+            self.on_progress(self.progress)
+
+
+def _range_starts_at(response, offset):
+    # Content-Range: bytes 1000-4999/5000
+    content_range = response.getheader("Content-Range", "")
+    try:
+        return int(content_range.split()[1].split("-")[0]) == offset
+    except (IndexError, ValueError):
+        return False
+
+
+def _range_total(response):
+    # Content-Range: bytes 0-0/5000 (the size is "*" when the server doesn't know it)
+    try:
+        return int(response.getheader("Content-Range", "").rsplit("/", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def _plan_segments(size, count):
+    """Split ``size`` bytes into up to ``count`` [start, end) ranges of at least MIN_SEGMENT_SIZE."""
+    count = max(1, min(count, size // MIN_SEGMENT_SIZE))
+    step = -(-size // count)
+    return [[start, min(start + step, size)] for start in range(0, size, step)]
+
+
+def _preallocate(f, size):
+    # Reserve the space up front where the file system can, so a full disk shows before the download
+    try:
+        os.posix_fallocate(f.fileno(), 0, size)
+    except (AttributeError, OSError):
+        f.truncate(size)
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def _validator(response):
+    validator = response.getheader("ETag") or response.getheader("Last-Modified")
+    if validator and validator.startswith("W/"):
+        return None  # If-Range needs a strong validator
+    return validator
+
+
+def _read_state(download):
+    try:
+        with open(download.state_path, encoding="utf-8") as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_state(download, state):
+    try:
+        temp_path = download.state_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temp_path, download.state_path)
+    except OSError:
+        pass
+
+
+def _write_validator(download, response):
+    # Remember what the partial file came from, so a resume can tell if it changed
+    validator = _validator(response)
+    if validator and response.status == 200:
+        _write_state(download, {"url": download.url, "validator": validator})
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+_shared_downloader = None
+_shared_downloader_lock = threading.Lock()
+
+
+def shared_downloader():
+    """Return the process-wide DownloadManager, so all downloads share one connection pool."""
+    global _shared_downloader
+    with _shared_downloader_lock:
+        if _shared_downloader is None:
+            _shared_downloader = DownloadManager()
+        return _shared_downloader
@@ -0,0 +1,495 @@
+import base64
+import configparser
+import csv
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from app_paths import data_dir
+from bulk_upgrade import PREPARE_SHARE, PREPARE_WORKERS, UpgradeError, install_order, prepare_wheels
+from downloader import DownloadCancelled, DownloadError, format_size
+from install_manager import CANCELLED, CREATION_FLAGS, FAILED, SUCCEEDED, requirement_name
+from install_plan import resolve_install_plan
+from interpreters import WINDOWS, fingerprint, shared_interpreter_registry
+from inventory import DIST_INFO, record_entries
+from metadata_cache import normalize_name
+
+FICLONE = 0x40049409  # Linux ioctl that makes a copy-on-write clone (btrfs, XFS)
+
+# How files got into the environment
+LINKED = "linked"
+CLONED = "cloned"
+COPIED = "copied"
+
+# What pip writes for entry points (pip._internal.operations.install.wheel)
+SCRIPT_TEMPLATE = """# -*- coding: utf-8 -*-
+import re
+import sys
+from {module} import {import_name}
+if __name__ == "__main__":
+    sys.argv[0] = re.sub(r"(-script\\.pyw|\\.exe)?$", "", sys.argv[0])
+    sys.exit({function}())
+"""
+
+
+class EnvironmentCreationError(Exception):
+    pass
+
+
+def environment_python(prefix):
+    """Where the python executable of a virtual environment created at ``prefix`` will be."""
+    if WINDOWS:
+        return os.path.join(prefix, "Scripts", "python.exe")
+    return os.path.join(prefix, "bin", "python")
+
+
+def record_hash(data):
+    digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b"=").decode("ascii")
+    return f"sha256={digest}"
+
+
+def shebang(python):
+    if " " not in python or WINDOWS:
+        return f"#!{python}\n"
+    # A shebang can't hold a path with spaces; let sh start the interpreter instead (like pip)
+    return f"#!/bin/sh\n'''exec' \"{python}\" \"$0\" \"$@\"\n' '''\n"
+
+
+def clone_file(source, target):
+    """Make ``target`` a copy-on-write clone of ``source``; False where the file system can't.
+
+    ``target`` is created exclusively: an existing file may be a hard link
+    into the unpacked-wheel store, so it is never opened for writing.
+    """
+    created = False
+    try:
+        if fcntl is not None and sys.platform.startswith("linux"):
+            fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            created = True
+            with open(source, "rb") as src, os.fdopen(fd, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        elif sys.platform == "darwin":
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+            # clonefile() fails rather than overwrite an existing target
+            if libc.clonefile(os.fsencode(source), os.fsencode(target), 0) != 0:
+                return False
+            created = True
+        else:
+            return False
+        shutil.copymode(source, target)
+        return True
+    except OSError:
+        if created:
+            _remove(target)
+        return False
+
+
+def link_file(source, target):
+    """Put ``source`` at ``target`` as a hard link, else a clone, else a copy; returns which.
+
+    The file is made under a temporary name and moved over ``target``, so
+    an existing target (like pip, a later wheel overwrites an earlier
+    one's file) is replaced and never written to.
+    """
+    temp_path = f"{target}.tmp-{os.getpid()}-{threading.get_ident()}"
+    _remove(temp_path)  # Left by a crash; copying onto it could write through a hard link
+    try:
+        try:
+            os.link(source, temp_path)
+            method = LINKED
+        except OSError:
+            # Another drive, or a file system without hard links
+            if clone_file(source, temp_path):
+                method = CLONED
+            else:
+                shutil.copy2(source, temp_path)
+                method = COPIED
+        os.replace(temp_path, target)
+    except BaseException:
+        _remove(temp_path)
+        raise
+    return method
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class UnpackedWheels:
+    """Wheels from the wheel store, unpacked once so environments can link to their files.
+
+    Trees are kept under ``<root>/<sha[:2]>/<sha>`` by the wheel's hash.
+    Environments created from them share the files with the store (and
+    each other) as hard links, so a file must never be changed in place;
+    pip uninstall and upgrade remove files rather than edit them, which is
+    safe. Trees whose wheel left the wheel store are removed by prune().
+    """
+
+    def __init__(self, root=None):
+        self.root = root or data_dir("unpacked")
+        os.makedirs(self.root, exist_ok=True)
+
+    def tree(self, wheel_path, sha256):
+        """Folder with the contents of a wheel, unpacking it the first time it is needed."""
+        path = os.path.join(self.root, sha256[:2], sha256)
+        if os.path.isdir(path):
+            return path
+        temp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        shutil.rmtree(temp_path, ignore_errors=True)
+        with zipfile.ZipFile(wheel_path) as archive:
+            for info in archive.infolist():
+                extracted = archive.extract(info, temp_path)
+                mode = info.external_attr >> 16
+                if mode & 0o111 and not info.is_dir():
+                    os.chmod(extracted, 0o755)
+        try:
+            os.replace(temp_path, path)
+        except OSError:
+            # Another job unpacked the same wheel first
+            shutil.rmtree(temp_path, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+        return path
+
+    def prune(self, keep):
+        """Remove the trees whose hash isn't in ``keep``; returns how many were removed."""
+        removed = 0
+        for bucket in os.listdir(self.root):
+            bucket_path = os.path.join(self.root, bucket)
+            if not os.path.isdir(bucket_path):
+                continue
+            for sha256 in os.listdir(bucket_path):
+                if sha256 not in keep and ".tmp-" not in sha256:
+                    shutil.rmtree(os.path.join(bucket_path, sha256), ignore_errors=True)
+                    removed += 1
+        return removed
+
+
+def write_script(source, target, python):
+    """Copy a wheel's script, pointing a "#!python" line at the environment's interpreter."""
+    with open(source, "rb") as f:
+        data = f.read()
+    if data.startswith(b"#!python"):
+        data = shebang(python).encode("utf-8") + data.split(b"\n", 1)[-1]
+    with open(target, "wb") as f:
+        f.write(data)
+    os.chmod(target, 0o755)
+    return record_hash(data), len(data)
+
+
+def entry_point_scripts(dist_path, scripts_dir, python):
+    """Write launchers for console_scripts and gui_scripts; returns [(path, hash, size)]."""
+    parser = configparser.ConfigParser(delimiters=("=",), interpolation=None)
+    parser.optionxform = str
+    try:
+        parser.read(os.path.join(dist_path, "entry_points.txt"), encoding="utf-8")
+    except configparser.Error:
+        return []
+    written = []
+    for section in ("console_scripts", "gui_scripts"):
+        if not parser.has_section(section):
+            continue
+        for name, value in parser.items(section):
+            module, _, function = value.split("[")[0].strip().partition(":")
+            if not module or not function:
+                continue
+            script = SCRIPT_TEMPLATE.format(
+                module=module, import_name=function.split(".")[0], function=function
+            )
+            if WINDOWS:
+                # No .exe launchers without pip's copy of distlib; a .cmd next to the script does the same
+                files = {
+                    f"{name}-script.py": script,
+                    f"{name}.cmd": f'@"%~dp0python.exe" "%~dp0{name}-script.py" %*\r\n',
+                }
+            else:
+                files = {name: shebang(python) + script}
+            for file_name, text in files.items():
+                path = os.path.join(scripts_dir, file_name)
+                data = text.encode("utf-8")
+                with open(path, "wb") as f:
+                    f.write(data)
+                os.chmod(path, 0o755)
+                written.append((path, record_hash(data), len(data)))
+    return written
+
+
+def tree_dist_info(tree):
+    dist_info = next((name for name in os.listdir(tree) if name.endswith(DIST_INFO)), None)
+    if dist_info is None:
+        raise EnvironmentCreationError(f"No .dist-info folder in the unpacked wheel at {tree}")
+    return dist_info
+
+
+def tree_files(tree, paths):
+    """(source, path in the wheel, scheme, target) of each file install_tree puts in place.
+
+    ``scheme`` is the .data scheme of the file, or None for site-packages.
+    """
+    dist_info = tree_dist_info(tree)
+    data_folder = dist_info[:-len(DIST_INFO)] + ".data"
+    own_files = {f"{dist_info}/{name}" for name in ("RECORD", "INSTALLER", "REQUESTED")}
+    for folder, _, files in os.walk(tree):
+        for file_name in files:
+            source = os.path.join(folder, file_name)
+            relative = os.path.relpath(source, tree).replace(os.sep, "/")
+            if relative in own_files:
+                continue
+            if relative.startswith(data_folder + "/"):
+                parts = relative.split("/", 2)
+                if len(parts) < 3 or parts[1] not in paths:
+                    continue
+                yield source, relative, parts[1], os.path.join(paths[parts[1]], parts[2])
+            else:
+                yield source, relative, None, os.path.join(paths["purelib"], relative)
+
+
+def install_tree(tree, paths, python, requested=False, skip=()):
+    """Install one unpacked wheel into an environment by linking its files.
+
+    ``paths`` maps the wheel install schemes (purelib, platlib, scripts,
+    headers, data) to folders. Scripts and the installer's own metadata
+    (RECORD, INSTALLER, REQUESTED) are written per environment, since
+    they differ; everything else is linked. Targets in ``skip`` (normcased)
+    are left to another wheel but still listed in RECORD. Returns a Counter
+    of how many files were linked, cloned and copied (and the bytes copied).
+    """
+    dist_info = tree_dist_info(tree)
+    site_dir = paths["purelib"]
+    try:
+        hashes = {path: (digest, size) for path, digest, size in record_entries(os.path.join(tree, dist_info))}
+    except OSError:
+        hashes = {}
+    stats = Counter()
+    rows = []
+
+    for source, relative, scheme, target in tree_files(tree, paths):
+        if os.path.normcase(target) in skip:
+            rows.append((target,) + hashes.get(relative, ("", None)))
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if scheme == "scripts":
+            digest, size = write_script(source, target, python)
+            stats[COPIED] += 1
+            stats["bytes copied"] += size
+        else:
+            method = link_file(source, target)
+            stats[method] += 1
+            if method == COPIED:
+                stats["bytes copied"] += os.path.getsize(target)
+            digest, size = hashes.get(relative, ("", None))
+        rows.append((target, digest, size))
+
+    target_dist_info = os.path.join(site_dir, dist_info)
+    rows += entry_point_scripts(target_dist_info, paths["scripts"], python)
+    metadata = {"INSTALLER": "pypackmanager\n"}
+    if requested:
+        metadata["REQUESTED"] = ""
+    for name, text in metadata.items():
+        path = os.path.join(target_dist_info, name)
+        data = text.encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(data)
+        rows.append((path, record_hash(data), len(data)))
+
+    with open(os.path.join(target_dist_info, "RECORD"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        for path, digest, size in rows:
+            writer.writerow([os.path.relpath(path, site_dir).replace(os.sep, "/"), digest, "" if size is None else size])
+        writer.writerow([f"{dist_info}/RECORD", "", ""])
+    return stats
+
+
+def seed_pip(store, base_python):
+    """Add the pip wheel that ``base_python`` bundles for ensurepip to the store, if it has no pip."""
+    if store.find("pip"):
+        return
+    result = subprocess.run(
+        [base_python, "-c", "import ensurepip, glob, os; "
+         "print('\\n'.join(glob.glob(os.path.join(os.path.dirname(ensurepip.__file__), '_bundled', 'pip-*.whl'))))"],
+        stdin=subprocess.DEVNULL, capture_output=True, text=True, creationflags=CREATION_FLAGS
+    )
+    wheels = result.stdout.split()
+    if result.returncode == 0 and wheels:
+        # The store moves what it adds, so give it a copy
+        temp_dir = tempfile.mkdtemp(prefix="pypackmanager-pip-")
+        try:
+            copy = shutil.copy(wheels[0], temp_dir)
+            store.add(copy)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def submit_environment(manager, prefix, base_python, requirements=()):
+    """Queue the creation of a virtual environment at ``prefix`` with ``requirements`` installed."""
+    prefix = os.path.abspath(prefix)
+    runner = partial(run_create_environment, prefix=prefix, base_python=base_python)
+    return manager.submit(list(requirements), environment_python(prefix), action="create", runner=runner)
+
+
+def run_create_environment(manager, job, store, prefix, base_python):
+    """InstallManager runner for "create" jobs.
+
+    1. ``base_python -m venv --without-pip`` makes the empty environment.
+    2. The requirements (and pip) are resolved for it in one dry run of
+       PyPackManager's own pip.
+    3. Wheels come from the wheel store or are downloaded (and sdists
+       built), in parallel, exactly as for a bulk upgrade.
+    4. Each wheel is unpacked once into a shared store and its files are
+       hard linked (or cloned, or copied across drives) into the new
+       environment, so another environment with the same packages costs
+       next to no disk space and no unzipping.
+    A failed or cancelled job removes the half-made environment.
+    """
+    started = time.perf_counter()
+
+    def update(progress, status):
+        job.progress = progress
+        job.status = status
+        manager.job_changed.emit(job)
+
+    def finish(state, status):
+        job.state = state
+        job.status = status
+
+    if os.path.exists(prefix) and os.listdir(prefix):
+        return finish(FAILED, f"{prefix} already exists")
+
+    update(1, "Creating the environment...")
+    job.log.append(f"$ {subprocess.list2cmdline([base_python, '-m', 'venv', '--without-pip', prefix])}")
+    try:
+        result = subprocess.run(
+            [base_python, "-m", "venv", "--without-pip", prefix], stdin=subprocess.DEVNULL, capture_output=True,
+            text=True, encoding="utf-8", errors="replace", creationflags=CREATION_FLAGS
+        )
+    except OSError as e:
+        return finish(FAILED, f"Could not start {base_python}: {e}")
+    if result.returncode != 0:
+        output = (result.stderr or result.stdout).strip()
+        job.log.append(output)
+        shutil.rmtree(prefix, ignore_errors=True)
+        return finish(FAILED, f"venv failed: {output.splitlines()[-1] if output else result.returncode}")
+
+    try:
+        stats = populate_environment(manager, job, store, base_python, update)
+    except DownloadCancelled:
+        shutil.rmtree(prefix, ignore_errors=True)
+        return finish(CANCELLED, "Cancelled")
+    except (DownloadError, UpgradeError, EnvironmentCreationError, OSError, RuntimeError) as e:
+        job.log.append(str(e))
+        shutil.rmtree(prefix, ignore_errors=True)
+        return finish(FAILED, str(e))
+
+    job.log.append(
+        f"Created {prefix} in {time.perf_counter() - started:.1f}s: {stats[LINKED]} files linked, "
+        f"{stats[CLONED]} cloned, {stats[COPIED]} copied ({format_size(stats['bytes copied'])})"
+    )
+    # The environment is ready; registering it and pruning the unpacked store are best effort
+    try:
+        interpreter = fingerprint(job.python)
+        if interpreter is not None:
+            shared_interpreter_registry().add(interpreter)
+    except Exception as e:
+        print(f"Could not register {job.python}: {str(e)}")
+    try:
+        UnpackedWheels().prune(store.hashes())
+    except Exception as e:
+        print(f"Could not prune unpacked wheels: {str(e)}")
+    job.progress = 100
+    return finish(SUCCEEDED, f"Created with {stats['packages']} packages")
+
+
+def populate_environment(manager, job, store, base_python, update):
+    """Resolve, fetch and link the job's requirements into its new, empty environment."""
+    update(3, "Resolving packages...")
+    requirements = list(job.requirements)
+    if "pip" not in {requirement_name(requirement) for requirement in requirements}:
+        requirements.append("pip")
+    index_options = []
+    if job.offline:
+        seed_pip(store, base_python)
+        index_options = ["--no-index", "--find-links", store.find_links()]
+    plan = resolve_install_plan(requirements, sys.executable, index_options, target=job.python)
+    if plan.downloads() is None:
+        raise EnvironmentCreationError("Some packages can't be downloaded directly; install them after creating it")
+    if job.cancel_requested:
+        raise DownloadCancelled("Cancelled")
+    job.log.append(f"Installing {len(plan.items)} distributions: " + ", ".join(
+        f"{item.name} {item.version}" for item in plan.items
+    ))
+
+    wheels = prepare_wheels(manager, job, store, plan.items, update, python=base_python)
+
+    interpreter = fingerprint(job.python)
+    if interpreter is None or not interpreter.site_dirs:
+        raise EnvironmentCreationError("The new environment has no site-packages folder")
+    site_dir = interpreter.site_dirs[0]
+    major_minor = ".".join(interpreter.version.split(".")[:2])
+    prefix = interpreter.prefix
+    unpacked = UnpackedWheels()
+    stats = Counter()
+    lock = threading.Lock()
+
+    def paths_for(item):
+        return {
+            "purelib": site_dir,
+            "platlib": site_dir,
+            "scripts": os.path.dirname(job.python),
+            "headers": os.path.join(prefix, "include", "site", f"python{major_minor}", item.name),
+            "data": prefix,
+        }
+
+    def unpack(item):
+        if job.cancel_requested:
+            raise DownloadCancelled("Cancelled")
+        wheel = wheels[normalize_name(item.name)]
+        return normalize_name(item.name), unpacked.tree(wheel, store.hash_of(wheel))
+
+    with ThreadPoolExecutor(max_workers=PREPARE_WORKERS, thread_name_prefix="environment-unpack") as executor:
+        trees = dict(executor.map(unpack, plan.items))
+
+    # A file several wheels ship (e.g. an old-style namespace __init__.py) is only put in place
+    # by the last of them in install order, like pip, so parallel links never race on it
+    owners = {}
+    for item in install_order(plan.items):
+        for _, _, _, target in tree_files(trees[normalize_name(item.name)], paths_for(item)):
+            owners[os.path.normcase(target)] = normalize_name(item.name)
+
+    def install(item):
+        if job.cancel_requested:
+            raise DownloadCancelled("Cancelled")
+        name = normalize_name(item.name)
+        paths = paths_for(item)
+        skip = set()
+        for _, _, _, target in tree_files(trees[name], paths):
+            if owners[os.path.normcase(target)] != name:
+                skip.add(os.path.normcase(target))
+        counts = install_tree(trees[name], paths, job.python, requested=item.requested, skip=skip)
+        with lock:
+            stats.update(counts)
+            stats["packages"] += 1
+            done = stats["packages"]
+        update(PREPARE_SHARE + done * (100 - PREPARE_SHARE) // len(plan.items), f"Linked {done} of {len(plan.items)}: {item.name}")
+
+    with ThreadPoolExecutor(max_workers=PREPARE_WORKERS, thread_name_prefix="environment-link") as executor:
+        for future in [executor.submit(install, item) for item in plan.items]:
+            future.result()
+    return stats
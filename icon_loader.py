@@ -0,0 +1,124 @@
+import os
+import re
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from app_paths import data_dir
+from icon_service import icon_file_name
+
+# Thumbnails are stored at this size, enough for the 80px detail icon on HiDPI screens
+THUMBNAIL_SIZE = 160
+MAX_ICON_BYTES = 2 * 1024 * 1024
+ICON_TIMEOUT = 10
+ICON_WORKERS = 4
+
+# Don't retry a package whose logo couldn't be found for this long
+FAILURE_RETRY_AFTER = 7 * 24 * 60 * 60
+
+# Optional URL template used before project metadata, e.g. a local stand-in
+# server: PYPACKMANAGER_ICON_URL="http://127.0.0.1:8000/icons/{name}.png"
+ICON_URL_TEMPLATE = os.environ.get("PYPACKMANAGER_ICON_URL")
+
+GITHUB_OWNER = re.compile(r"https?://(?:www\.)?github\.com/([A-Za-z0-9][A-Za-z0-9-]*)", re.IGNORECASE)
+NOT_OWNERS = {"sponsors", "orgs", "features", "about", "marketplace"}
+
+
+def resolve_icon_url(library):
+    """Pick a logo URL for a package from its metadata, or None if there isn't one.
+
+    Uses the project's GitHub owner avatar, found in its project URLs or
+    home page, which for most projects is the organisation logo.
+    """
+    if ICON_URL_TEMPLATE:
+        return ICON_URL_TEMPLATE.format(name=library["name"].lower())
+
+    urls = list((library.get("project_urls") or {}).values())
+    urls.append(library.get("home_page") or "")
+    for url in urls:
+        match = GITHUB_OWNER.match(url or "")
+        if match and match.group(1).lower() not in NOT_OWNERS:
+            return f"https://github.com/{match.group(1)}.png?size={THUMBNAIL_SIZE}"
+    return None
+
+
+class IconLoader(QObject):
+    """Download package logos in the background and keep scaled thumbnails on disk.
+
+    request() never blocks: logos are fetched by a small worker pool,
+    scaled to THUMBNAIL_SIZE and saved as PNG in the thumbnails folder.
+    icon_ready(file_name) is emitted (and delivered in the GUI thread) once
+    a thumbnail is ready to be picked up by the IconService.
+    """
+    icon_ready = pyqtSignal(str)
+
+    def __init__(self, thumbnails_dir=None, parent=None):
+        super().__init__(parent)
+        self.thumbnails_dir = thumbnails_dir or data_dir("thumbnails")
+        self._executor = ThreadPoolExecutor(max_workers=ICON_WORKERS, thread_name_prefix="icon-loader")
+        self._requested = set()
+        self._lock = threading.Lock()
+
+    def thumbnail_path(self, file_name):
+        return os.path.join(self.thumbnails_dir, file_name)
+
+    def request(self, library):
+        """Fetch the logo for ``library`` unless it is known, in flight or has no logo."""
+        url = resolve_icon_url(library)
+        if url is None:
+            return
+
+        file_name = icon_file_name(library)
+        with self._lock:
+            if file_name in self._requested:
+                return
+            self._requested.add(file_name)
+
+        if self._failed_recently(file_name):
+            return
+        self._executor.submit(self._download, file_name, url)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _failed_recently(self, file_name):
+        marker = self.thumbnail_path(file_name) + ".missing"
+        try:
+            return time.time() - os.path.getmtime(marker) < FAILURE_RETRY_AFTER
+        except OSError:
+            return False
+
+    def _download(self, file_name, url):
+        path = self.thumbnail_path(file_name)
+        try:
+            request = urllib.request.Request(url, headers={"User-Agent": "PyPackManager"})
+            with urllib.request.urlopen(request, timeout=ICON_TIMEOUT) as response:
+                data = response.read(MAX_ICON_BYTES + 1)
+            if len(data) > MAX_ICON_BYTES:
+                raise ValueError("icon too large")
+
+            # QImage (unlike QPixmap) is safe to use off the GUI thread
+            image = QImage()
+            if not image.loadFromData(data):
+                raise ValueError("not an image")
+            if image.width() > THUMBNAIL_SIZE or image.height() > THUMBNAIL_SIZE:
+                image = image.scaled(THUMBNAIL_SIZE, THUMBNAIL_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+            tmp_path = path + ".tmp"
+            if not image.save(tmp_path, "PNG"):
+                raise OSError("could not save thumbnail")
+            os.replace(tmp_path, path)
+        except Exception:
+            # Remember the failure so we don't retry on every launch
+            try:
+                with open(path + ".missing", "w"):
+                    pass
+            except OSError:
+                pass
+            return
+
+        self.icon_ready.emit(file_name)
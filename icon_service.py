@@ -0,0 +1,140 @@
+import os
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont, QPixmap, QPainter, QColor
+
+from app_paths import data_dir
+
+ICONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "icons")
+
+# Colors for the generated letter avatars, by first letter of the package name
+LETTER_COLORS = {
+    'A': "#FF5733", 'B': "#33FF57", 'C': "#3357FF", 'D': "#F033FF",
+    'E': "#33FFF0", 'F': "#FF3355", 'G': "#FFFF33", 'H': "#33FFFF",
+    'I': "#FF33FF", 'J': "#33FF33", 'K': "#3333FF", 'L': "#FF3333",
+    'M': "#33FFAA", 'N': "#AA33FF", 'O': "#FFAA33", 'P': "#3377FF",
+    'Q': "#FF7733", 'R': "#33FF77", 'S': "#7733FF", 'T': "#FF33AA",
+    'U': "#33FFAA", 'V': "#AA33FF", 'W': "#FFAA33", 'X': "#33AAFF",
+    'Y': "#FFAA33", 'Z': "#33AAFF"
+}
+DEFAULT_AVATAR_COLOR = "#3776AB"  # Python blue
+
+DEFAULT_MAX_PIXMAPS = 512
+
+
+def icon_file_name(library):
+    return library.get("icon") or f"{library['name'].lower()}.png"
+
+
+class IconService:
+    """Package icons for cards, list rows and the detail page.
+
+    Pixmaps are kept in an LRU cache keyed by what they depend on (icon
+    file or avatar letter, size and device pixel ratio), so a letter avatar
+    is painted once per size. Icon files found to be missing are
+    remembered, so each name costs at most one filesystem check.
+    If a ``loader`` (IconLoader) is set, packages without an icon file are
+    handed to it to fetch their logo in the background.
+    Must only be used from the GUI thread.
+    """
+
+    def __init__(self, icons_dirs=(ICONS_DIR,), max_pixmaps=DEFAULT_MAX_PIXMAPS, loader=None):
+        self.icons_dirs = list(icons_dirs)
+        self.max_pixmaps = max_pixmaps
+        self.loader = loader
+        self._pixmaps = OrderedDict()
+        self._missing = set()
+
+    def package_icon(self, library, size, device_pixel_ratio=1.0):
+        """Return the package's icon file scaled to ``size``, or its letter avatar."""
+        file_name = icon_file_name(library)
+        if file_name not in self._missing:
+            key = ("file", file_name, size, device_pixel_ratio)
+            pixmap = self._get(key)
+            if pixmap is not None:
+                return pixmap
+
+            for icons_dir in self.icons_dirs:
+                path = os.path.join(icons_dir, file_name)
+                if os.path.exists(path):
+                    pixmap = self._scaled_file(path, size, device_pixel_ratio)
+                    if not pixmap.isNull():
+                        return self._put(key, pixmap)
+            self._missing.add(file_name)
+
+        if self.loader is not None:
+            self.loader.request(library)
+        return self.avatar(library["name"], size, device_pixel_ratio)
+
+    def avatar(self, name, size, device_pixel_ratio=1.0):
+        """Return a colored circle with the name's first letter."""
+        letter = name[0].upper() if name else "?"
+        key = ("avatar", letter, size, device_pixel_ratio)
+        pixmap = self._get(key)
+        if pixmap is None:
+            pixmap = self._put(key, self._paint_avatar(letter, size, device_pixel_ratio))
+        return pixmap
+
+    def icon_changed(self, file_name):
+        """Forget what we know about an icon file that has been added or replaced."""
+        self._missing.discard(file_name)
+        for key in [key for key in self._pixmaps if key[0] == "file" and key[1] == file_name]:
+            del self._pixmaps[key]
+
+    def _get(self, key):
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+        return pixmap
+
+    def _put(self, key, pixmap):
+        self._pixmaps[key] = pixmap
+        while len(self._pixmaps) > self.max_pixmaps:
+            self._pixmaps.popitem(last=False)
+        return pixmap
+
+    def _scaled_file(self, path, size, device_pixel_ratio):
+        pixels = int(size * device_pixel_ratio)
+        pixmap = QPixmap(path)
+        if pixmap.isNull():
+            return pixmap
+        pixmap = pixmap.scaled(pixels, pixels, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        pixmap.setDevicePixelRatio(device_pixel_ratio)
+        return pixmap
+
+    def _paint_avatar(self, letter, size, device_pixel_ratio):
+        pixels = int(size * device_pixel_ratio)
+        pixmap = QPixmap(pixels, pixels)
+        pixmap.fill(Qt.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # Draw colored circle based on first letter
+        painter.setBrush(QColor(LETTER_COLORS.get(letter, DEFAULT_AVATAR_COLOR)))
+        painter.setPen(Qt.NoPen)
+        painter.drawEllipse(0, 0, pixels, pixels)
+
+        # Draw first letter (16pt on a 40px icon, 28pt on an 80px one)
+        font = QFont("Arial", 1, QFont.Bold)
+        font.setPointSizeF((4 + size * 0.3) * device_pixel_ratio)
+        painter.setPen(Qt.white)
+        painter.setFont(font)
+        painter.drawText(pixmap.rect(), Qt.AlignCenter, letter)
+        painter.end()
+
+        pixmap.setDevicePixelRatio(device_pixel_ratio)
+        return pixmap
+
+
+_shared_icons = None
+
+
+def shared_icons():
+    """Return the application-wide IconService (create it after the QApplication)."""
+    global _shared_icons
+    if _shared_icons is None:
+        # Bundled icons first, then logos downloaded by the IconLoader
+        _shared_icons = IconService(icons_dirs=(ICONS_DIR, data_dir("thumbnails")))
+    return _shared_icons
@@ -0,0 +1,419 @@
+import itertools
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from app_paths import data_dir
+from metadata_cache import normalize_name
+from downloader import Download, DownloadError, DownloadCancelled, file_name_from_url, shared_downloader
+from wheel_store import shared_wheel_store
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# How long a cancelled pip gets to exit before it is killed
+CANCEL_GRACE_PERIOD = 5
+
+# Don't open a console window for every pip run on Windows
+CREATION_FLAGS = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+
+
+REQUIREMENT_NAME = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+
+def requirement_name(requirement):
+    """Normalized project name of a requirement string like "Django==5.0" or "requests[socks]"."""
+    match = REQUIREMENT_NAME.match(requirement)
+    return normalize_name(match.group(1)) if match else requirement
+
+
+def environment_key(python):
+    """Jobs for interpreters with the same key share site-packages and must not overlap."""
+    return os.path.normcase(os.path.realpath(python))
+
+
+def pip_progress(line, percent):
+    """Estimate progress from one line of pip output.
+
+    pip doesn't report overall progress, so this moves through its phases
+    (resolving, downloading, building, installing). Returns the new
+    percentage and a short status, or None when the line says nothing new.
+    """
+    text = line.strip()
+    if text.startswith(("Successfully installed", "Successfully uninstalled")):
+        return 100, text
+    if text.startswith(("Installing collected packages", "Found existing installation", "Uninstalling")):
+        return max(percent, 80), text
+    if text.startswith(("Building wheel", "Preparing metadata", "Building wheels")):
+        return max(percent, 65), text
+    if text.startswith(("Downloading", "Using cached")):
+        return min(max(percent, 50) + 2, 64), text
+    if text.startswith(("Collecting", "Requirement already satisfied")):
+        return min(max(percent, 10) + 4, 49), text
+    return None
+
+
+class InstallJob:
+    """One pip run (install or uninstall of one or more requirements) in one environment."""
+
+    def __init__(self, job_id, requirements, python, action="install", downloads=None, offline=False, runner=None):
+        self.id = job_id
+        self.requirements = list(requirements)
+        self.python = python
+        self.action = action
+        self.downloads = list(downloads or [])  # (url, sha256) of files to fetch before running pip
+        self.install_targets = None  # Local files pip installs instead of the requirements
+        self.offline = offline  # Install only from the wheel store, never from the index
+        self.find_links = None  # Wheel store page pip may take files from
+        self.held = []  # Hashes of the stored files this job uses
+        self.runner = runner  # runner(manager, job, store) does the work instead of a single pip run
+        self.state = QUEUED
+        self.progress = 0
+        self.status = "Waiting..."
+        self.log = []
+        self.log_path = None
+        self.returncode = None
+        self.cancel_requested = False
+        self.process = None
+
+    @property
+    def title(self):
+        if self.action == "create":
+            return f"Creating environment {os.path.basename(os.path.dirname(os.path.dirname(self.python)))}"
+        verb = {"uninstall": "Uninstalling", "upgrade": "Upgrading"}.get(self.action, "Installing")
+        if len(self.requirements) > 3:
+            return f"{verb} {len(self.requirements)} packages"
+        return f"{verb} {', '.join(self.requirements)}"
+
+    def involves(self, name):
+        """True if the job installs or removes the package ``name``."""
+        if self.action == "create":
+            return False  # Its packages go into an environment that doesn't exist yet
+        key = normalize_name(name)
+        return any(requirement_name(requirement) == key for requirement in self.requirements)
+
+    @property
+    def finished(self):
+        return self.state in (SUCCEEDED, FAILED, CANCELLED)
+
+    def command(self):
+        command = [self.python, "-m", "pip", self.action, "--disable-pip-version-check", "--no-input"]
+        if self.action == "uninstall":
+            command.append("--yes")
+        else:
+            command += ["--progress-bar", "off"]
+            if self.offline:
+                command.append("--no-index")
+            if self.find_links:
+                command += ["--find-links", self.find_links]
+        return command + (self.install_targets or self.requirements)
+
+
+class InstallManager(QObject):
+    """Runs pip jobs off the GUI thread, one queue per environment.
+
+    Jobs for different environments run at the same time, while jobs for
+    the same environment run one after another, so two pip processes never
+    write to the same site-packages. Output is captured line by line into
+    job.log and saved to the logs folder when the job ends. The signals
+    carry the InstallJob and are delivered in the GUI thread.
+    """
+    job_added = pyqtSignal(object)
+    job_changed = pyqtSignal(object)
+    job_output = pyqtSignal(object, str)
+    job_finished = pyqtSignal(object)
+
+    def __init__(self, logs_dir=None, downloads_dir=None, downloader=None, wheel_store=None, parent=None):
+        super().__init__(parent)
+        self.logs_dir = logs_dir
+        self.downloads_dir = downloads_dir
+        self.downloader = downloader
+        self.wheel_store = wheel_store
+        self.offline = False  # New jobs install only from the wheel store
+        self._ids = itertools.count(1)
+        self._jobs = []
+        self._queues = {}  # Environment key -> deque of queued jobs
+        self._lock = threading.Lock()
+
+    def submit(self, requirements, python=None, action="install", downloads=None, runner=None):
+        """Queue a pip job and return it; it starts as soon as its environment is free.
+
+        ``downloads`` ((url, sha256) pairs, e.g. from an install plan) are
+        fetched in parallel and verified first, and pip then installs
+        those files instead of downloading them itself one by one. Install
+        jobs without them ask pip for their files (a dry run) when they
+        start, so every install goes through the wheel store: files
+        already in it aren't downloaded again, and downloaded ones are
+        added to it. In offline mode pip only sees the store.
+        ``runner(manager, job, store)`` replaces the pip run for jobs that
+        need more than one step (see bulk_upgrade); it runs in the
+        environment's queue like any other job and sets job.state.
+        """
+        job = InstallJob(
+            next(self._ids), requirements, python or sys.executable, action, downloads, self.offline, runner
+        )
+        key = environment_key(job.python)
+        with self._lock:
+            self._jobs.append(job)
+            queue = self._queues.get(key)
+            start_worker = queue is None
+            if start_worker:
+                queue = self._queues[key] = deque()
+            queue.append(job)
+        self.job_added.emit(job)
+
+        if start_worker:
+            threading.Thread(target=self._run_queue, args=(key,), name="install-worker", daemon=True).start()
+        return job
+
+    def cancel(self, job):
+        """Drop a queued job, or stop a running one."""
+        dequeued = False
+        with self._lock:
+            if job.finished:
+                return
+            job.cancel_requested = True
+            queue = self._queues.get(environment_key(job.python))
+            if job.state == QUEUED and queue is not None and job in queue:
+                queue.remove(job)
+                job.state = CANCELLED
+                job.status = "Cancelled"
+                dequeued = True
+            process = job.process
+
+        # A running job is finished (and announced) by its worker
+        if dequeued:
+            self.job_finished.emit(job)
+        elif process is not None:
+            process.terminate()
+
+    def cancel_all(self):
+        for job in self.active_jobs():
+            self.cancel(job)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs)
+
+    def active_jobs(self):
+        return [job for job in self.jobs() if not job.finished]
+
+    def _run_queue(self, key):
+        try:
+            while True:
+                with self._lock:
+                    queue = self._queues[key]
+                    if not queue:
+                        # Nothing left for this environment; the next submit starts a new worker
+                        del self._queues[key]
+                        return
+                    job = queue.popleft()
+                    job.state = RUNNING
+                    job.status = "Starting pip..."
+                self.job_changed.emit(job)
+                self._run_job(job)
+                self.job_finished.emit(job)
+        except BaseException:
+            # Don't leave the environment blocked behind a worker that is gone
+            with self._lock:
+                self._queues.pop(key, None)
+            raise
+
+    def _run_job(self, job):
+        store = self.wheel_store or shared_wheel_store()
+        try:
+            if job.runner is not None:
+                job.runner(self, job, store)
+            else:
+                self._install(job, store)
+        except Exception as e:
+            print(f"Job for {job.python} failed: {str(e)}")
+            job.log.append(f"Error: {str(e)}")
+            with self._lock:
+                job.state = FAILED
+                job.status = f"Error: {str(e)}"
+        finally:
+            store.release(job.held)
+        self._save_log(job)
+
+    def _install(self, job, store):
+        if job.action == "install":
+            job.find_links = store.find_links()
+            if not job.downloads:
+                job.downloads = self._plan_downloads(job)
+            if job.downloads and not self._download_files(job, store):
+                return
+
+        job.returncode = self.run_pip(job, job.command())
+        with self._lock:
+            if job.returncode is None:
+                job.state = FAILED
+            elif job.cancel_requested:
+                job.state = CANCELLED
+                job.status = "Cancelled"
+            elif job.returncode == 0:
+                job.state = SUCCEEDED
+                job.progress = 100
+                job.status = "Done"
+            else:
+                job.state = FAILED
+                job.status = f"pip exited with code {job.returncode}"
+
+    def run_pip(self, job, command):
+        """Run one pip command for ``job``, streaming its output into the job log.
+
+        Cancelling the job terminates pip. Returns pip's exit code, or None
+        if it couldn't be started (job.status then says why).
+        """
+        job.log.append("$ " + subprocess.list2cmdline(command))
+        try:
+            process = subprocess.Popen(
+                command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+                creationflags=CREATION_FLAGS,
+                env={**os.environ, "PYTHONUNBUFFERED": "1"},
+            )
+        except OSError as e:
+            job.log.append(str(e))
+            job.status = f"Could not start pip: {e}"
+            return None
+
+        with self._lock:
+            job.process = process
+            cancelled = job.cancel_requested
+        if cancelled:
+            process.terminate()
+
+        for line in process.stdout:
+            line = line.rstrip("\n")
+            job.log.append(line)
+            self.job_output.emit(job, line)
+            update = pip_progress(line, job.progress)
+            if update is not None:
+                job.progress, job.status = update
+                self.job_changed.emit(job)
+
+        try:
+            returncode = process.wait(timeout=CANCEL_GRACE_PERIOD if job.cancel_requested else None)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            returncode = process.wait()
+
+        with self._lock:
+            job.process = None
+        return returncode
+
+    def _plan_downloads(self, job):
+        """(url, sha256) of the files pip would install for the job, so they go through the wheel store too.
+
+        Returns [] when pip can't say (an old pip, VCS or local requirements,
+        or nothing to install); pip then gets the files itself as before.
+        """
+        from install_plan import resolve_install_plan  # install_plan imports this module
+
+        job.status = "Resolving..."
+        self.job_changed.emit(job)
+        index_options = (["--no-index"] if job.offline else []) + ["--find-links", job.find_links]
+        try:
+            plan = resolve_install_plan(job.requirements, job.python, index_options)
+        except (RuntimeError, OSError, ValueError) as e:
+            job.log.append(f"Could not plan the files to download, pip fetches them itself: {e}")
+            return []
+        return plan.downloads() or []
+
+    def _download_files(self, job, store):
+        """Take the job's files from the wheel store, downloading the missing ones.
+
+        Returns False if a download failed or was cancelled, or if a file
+        isn't stored in offline mode.
+        """
+        targets = {}  # url -> local path
+        for url, sha256 in job.downloads:
+            path = store.get(sha256) if sha256 else None
+            if path is not None:
+                targets[url] = path
+                job.held.append(sha256)
+        store.hold(job.held)
+        missing = [(url, sha256) for url, sha256 in job.downloads if url not in targets]
+        if targets:
+            job.log.append(f"Using {len(targets)} cached files from {store.root}")
+
+        if missing and job.offline:
+            names = ", ".join(file_name_from_url(url) for url, _ in missing)
+            job.log.append(f"Not in the wheel cache: {names}")
+            job.state = FAILED
+            job.status = f"Offline: {len(missing)} files are not cached"
+            return False
+        if missing and not self._fetch(job, missing, store, targets):
+            return False
+        job.install_targets = [targets[url] for url, _ in job.downloads]
+        return True
+
+    def _fetch(self, job, missing, store, targets):
+        downloads_dir = self.downloads_dir or data_dir("downloads")
+        downloads = [
+            Download(url, os.path.join(downloads_dir, file_name_from_url(url)), sha256)
+            for url, sha256 in missing
+        ]
+
+        def report(progress):
+            # Downloading is the first half of the job
+            job.progress = progress.percent() // 2
+            job.status = f"Downloading {progress.describe()}"
+            self.job_changed.emit(job)
+
+        job.status = f"Downloading {len(downloads)} file{'s' if len(downloads) != 1 else ''}..."
+        self.job_changed.emit(job)
+        try:
+            paths = (self.downloader or shared_downloader()).download_many(
+                downloads, report, lambda: job.cancel_requested
+            )
+        except DownloadCancelled:
+            job.state = CANCELLED
+            job.status = "Cancelled"
+            return False
+        except DownloadError as e:
+            job.log.append(str(e))
+            job.state = FAILED
+            job.status = str(e)
+            return False
+        for download, path in zip(downloads, paths):
+            # Verified against the plan's sha256, so the store can trust the hash
+            sha256 = download.sha256 or None
+            if sha256:
+                store.hold([sha256])
+                job.held.append(sha256)
+            try:
+                targets[download.url] = store.add(path, sha256)
+            except OSError as e:
+                print(f"Could not add {download.name} to the wheel cache: {e}")
+                targets[download.url] = path
+        job.log.append(f"Downloaded {len(downloads)} files into the wheel cache")
+        return True
+
+    def _save_log(self, job):
+        try:
+            logs_dir = self.logs_dir or data_dir("logs")
+            path = os.path.join(logs_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{job.action}-{job.id}.log")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(job.log) + "\n")
+            job.log_path = path
+        except OSError as e:
+            print(f"Could not save install log: {e}")
+
@@ -0,0 +1,235 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import namedtuple
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+from metadata_cache import normalize_name
+from install_manager import CREATION_FLAGS
+from resolver import Resolver, parse_requirement
+from wheel_store import shared_wheel_store
+
+# One distribution that would be installed: ``requested`` is False for dependencies,
+# and ``requires`` names the projects it depends on in the target environment
+PlanItem = namedtuple(
+    "PlanItem", "name version requested url required_by sha256 requires", defaults=("", (), None, ())
+)
+
+
+class InstallSet(QObject):
+    """Packages picked in the result lists to be installed together.
+
+    Holds the library dicts from PyPISearchThread.process_package_data,
+    keyed by normalized name and kept in the order they were picked.
+    """
+    changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._libraries = {}
+
+    def __len__(self):
+        return len(self._libraries)
+
+    def __contains__(self, name):
+        return normalize_name(name) in self._libraries
+
+    def toggle(self, library):
+        key = normalize_name(library["name"])
+        if key in self._libraries:
+            del self._libraries[key]
+        else:
+            self._libraries[key] = library
+        self.changed.emit()
+
+    def set_selected(self, library, selected):
+        if selected != (library["name"] in self):
+            self.toggle(library)
+
+    def clear(self):
+        if self._libraries:
+            self._libraries = {}
+            self.changed.emit()
+
+    def libraries(self):
+        return list(self._libraries.values())
+
+    def requirements(self):
+        return [library["name"] for library in self._libraries.values()]
+
+
+class InstallPlan:
+    """What a single pip transaction for a set of requirements would install.
+
+    ``exact`` plans come from pip itself and can be installed pinned as they
+    are; plans from the in-process resolver are a preview that doesn't
+    know about wheel platform tags, so only the requested packages get pinned.
+    """
+
+    def __init__(self, requirements, items, exact=True):
+        self.requirements = list(requirements)
+        self.items = list(items)
+        self.exact = exact
+
+    @property
+    def requested(self):
+        return [item for item in self.items if item.requested]
+
+    @property
+    def dependencies(self):
+        return [item for item in self.items if not item.requested]
+
+    def downloads(self):
+        """(url, sha256) of every file in an exact plan, or None if they can't all be fetched directly."""
+        if not self.exact or not self.items:
+            return None
+        if not all(item.url.startswith(("https://", "http://", "file://")) and item.sha256 for item in self.items):
+            return None  # e.g. VCS or local directory requirements
+        return [(item.url, item.sha256) for item in self.items]
+
+    def pinned_requirements(self):
+        """Requirements to install the plan with (exact plans are pinned so pip doesn't resolve again)."""
+        items = self.items if self.exact else self.requested
+        pinned = {normalize_name(item.name) for item in items}
+        unchanged = [requirement for requirement in self.requirements if normalize_name(requirement) not in pinned]
+        return [f"{item.name}=={item.version}" for item in items] + (unchanged if not self.exact else [])
+
+
+def parse_install_report(report, requirements):
+    """Build an InstallPlan from the JSON written by `pip install --dry-run --report`."""
+    environment = report.get("environment") or {}
+    items = []
+    for entry in report.get("install", []):
+        metadata = entry.get("metadata", {})
+        download_info = entry.get("download_info", {})
+        items.append(PlanItem(
+            name=metadata.get("name", "?"),
+            version=metadata.get("version", "?"),
+            requested=bool(entry.get("requested")),
+            url=download_info.get("url", ""),
+            sha256=download_info.get("archive_info", {}).get("hashes", {}).get("sha256"),
+            requires=report_dependencies(
+                metadata.get("requires_dist") or [], entry.get("requested_extras") or [], environment
+            ),
+        ))
+    return InstallPlan(requirements, sort_plan_items(items))
+
+
+def report_dependencies(requires_dist, extras, environment):
+    """Normalized names of the requirements that apply in the report's marker ``environment``."""
+    names = []
+    environments = [{**environment, "extra": extra} for extra in [""] + list(extras)]
+    for text in requires_dist:
+        requirement = parse_requirement(text)
+        if requirement is None:
+            continue
+        if requirement.marker is None or not environment or any(
+            requirement.marker.evaluate(env) for env in environments
+        ):
+            names.append(normalize_name(requirement.name))
+    return tuple(names)
+
+
+def plan_from_resolution(resolution):
+    """Build an InstallPlan from a Resolver result, leaving out what is already installed."""
+    items = [
+        PlanItem(
+            name=pin.name,
+            version=str(pin.version),
+            requested=pin.name in resolution.requested,
+            required_by=pin.required_by,
+        )
+        for pin in resolution.changes()
+    ]
+    return InstallPlan(resolution.requirements, sort_plan_items(items), exact=False)
+
+
+def sort_plan_items(items):
+    # Requested packages first, then dependencies, alphabetically within each
+    return sorted(items, key=lambda item: (not item.requested, item.name.lower()))
+
+
+def resolve_install_plan(requirements, python=None, index_options=(), target=None):
+    """Resolve ``requirements`` together in one pip run without installing anything.
+
+    pip downloads what it needs to resolve into its own cache, so the
+    install that follows doesn't download it again. ``index_options`` are
+    extra pip options such as --no-index/--find-links. ``target`` runs the
+    pip of ``python`` against another interpreter that may not have pip
+    itself (pip 22.3 or newer). Needs pip 22.2 or newer; raises
+    RuntimeError with pip's output if resolution fails.
+    """
+    fd, report_path = tempfile.mkstemp(suffix=".json", prefix="pypackmanager-plan-")
+    os.close(fd)
+    try:
+        command = [python or sys.executable, "-m", "pip"] + (["--python", target] if target else []) + [
+            "install", "--dry-run", "--quiet", "--disable-pip-version-check", "--no-input", "--report", report_path,
+        ] + list(index_options) + list(requirements)
+        result = subprocess.run(
+            command, stdin=subprocess.DEVNULL, capture_output=True, text=True,
+            encoding="utf-8", errors="replace", creationflags=CREATION_FLAGS
+        )
+        if result.returncode != 0:
+            output = (result.stderr or result.stdout).strip()
+            raise RuntimeError(output.splitlines()[-1] if output else f"pip exited with code {result.returncode}")
+        with open(report_path, encoding="utf-8") as f:
+            return parse_install_report(json.load(f), requirements)
+    finally:
+        try:
+            os.remove(report_path)
+        except OSError:
+            pass
+
+
+class InstallPlanThread(QThread):
+    """Plans an install with the in-process resolver, falling back to pip's dry run.
+
+    ``inventory`` (an InventoryCache) tells the resolver what is installed
+    already, so those packages are left out of the plan. ``offline`` plans
+    only with what is in the wheel store, so the resolver is skipped.
+    """
+    plan_ready = pyqtSignal(object)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, requirements, python=None, inventory=None, offline=False, wheel_store=None):
+        super().__init__()
+        self.requirements = list(requirements)
+        self.python = python
+        self.inventory = inventory
+        self.offline = offline
+        self.wheel_store = wheel_store
+
+    def run(self):
+        if self.offline:
+            store = self.wheel_store or shared_wheel_store()
+            index_options = ["--no-index", "--find-links", store.find_links()]
+            try:
+                self.plan_ready.emit(resolve_install_plan(self.requirements, self.python, index_options))
+            except Exception as e:
+                self.error_occurred.emit(str(e))
+            return
+
+        if self.python in (None, sys.executable):
+            # The resolver evaluates markers for this interpreter only
+            try:
+                resolution = Resolver(installed=self.installed_versions()).resolve(self.requirements)
+                self.plan_ready.emit(plan_from_resolution(resolution))
+                return
+            except Exception as e:
+                print(f"Resolver could not plan the install, asking pip: {e}")
+
+        try:
+            self.plan_ready.emit(resolve_install_plan(self.requirements, self.python))
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+
+    def installed_versions(self):
+        if self.inventory is None:
+            return {}
+        packages = self.inventory.packages()
+        if packages is None or self.inventory.is_dirty():
+            packages = self.inventory.refresh()
+        return {package["name"]: package["version"] for package in packages}
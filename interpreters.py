@@ -0,0 +1,590 @@
+import glob
+import json
+import os
+import platform
+import re
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from app_paths import data_dir
+from install_manager import CREATION_FLAGS
+from inventory import distribution_entries, site_package_dirs
+
+DISCOVERY_WORKERS = 8
+PROJECT_SCAN_DEPTH = 3  # Directory levels searched for virtual environments below each project directory
+PROBE_TIMEOUT = 10      # Seconds an interpreter gets to describe itself when it has to be started
+WINDOWS = os.name == "nt"
+
+# Where people keep their projects; PYPACKMANAGER_PROJECT_DIRS (os.pathsep separated) replaces these
+DEFAULT_PROJECT_DIRS = ["projects", "Projects", "src", "code", "dev", "repos", "workspace", "PycharmProjects"]
+SKIPPED_DIRS = {".git", ".hg", "node_modules", "__pycache__", "site-packages", ".tox", ".nox", ".mypy_cache"}
+
+PATCHLEVEL = re.compile(r'#define\s+PY_VERSION\s+"([^"]+)"')
+VERSIONED_NAME = re.compile(r"(?:python|pypy)(\d+)\.?(\d+)", re.IGNORECASE)
+
+# One Python environment. ``kind`` is "system", "venv", "conda" or "pyenv", ``prefix`` its
+# root folder and ``home`` the folder of the base installation it was created from.
+# ``signature`` (file times and sizes) tells whether it changed since it was fingerprinted.
+Interpreter = namedtuple(
+    "Interpreter", "path version implementation kind prefix home site_dirs package_count signature"
+)
+
+# Prints what fingerprint() couldn't work out from the files alone
+PROBE_SCRIPT = (
+    "import json, os, platform, sys; print(json.dumps({"
+    "'version': platform.python_version(), 'implementation': platform.python_implementation(), "
+    "'prefix': sys.prefix, 'base_prefix': getattr(sys, 'base_prefix', sys.prefix), "
+    "'site_dirs': [p for p in sys.path if p and os.path.isdir(p) and p.endswith(('site-packages', 'dist-packages'))]}))"
+)
+
+
+def short_path(path):
+    """``path`` with the home folder written as ~."""
+    home = os.path.expanduser("~")
+    if path == home or path.startswith(home + os.sep):
+        return "~" + path[len(home):]
+    return path
+
+
+def describe(interpreter):
+    """One line for the environment switcher, e.g. "Python 3.11.7 (venv) ~/work/app/.venv"."""
+    name = "Python" if interpreter.implementation == "CPython" else interpreter.implementation
+    location = interpreter.prefix if interpreter.kind in ("venv", "conda") else interpreter.path
+    return f"{name} {interpreter.version} ({interpreter.kind})  {short_path(location)}"
+
+
+def is_current(interpreter):
+    return same_path(interpreter.path, sys.executable)
+
+
+def same_path(path1, path2):
+    return os.path.normcase(os.path.abspath(path1)) == os.path.normcase(os.path.abspath(path2))
+
+
+def environment_prefix(executable):
+    """The root folder of the environment an executable belongs to."""
+    directory = os.path.dirname(os.path.abspath(executable))
+    if os.path.basename(directory).lower() in ("bin", "scripts"):
+        return os.path.dirname(directory)
+    return directory
+
+
+def environment_executable(prefix):
+    """The python executable inside an environment folder, or None."""
+    if WINDOWS:
+        names = [os.path.join(prefix, "python.exe"), os.path.join(prefix, "Scripts", "python.exe")]
+    else:
+        names = [os.path.join(prefix, "bin", "python3"), os.path.join(prefix, "bin", "python")]
+    return next((name for name in names if os.path.isfile(name)), None)
+
+
+def read_pyvenv_cfg(prefix):
+    """The key = value pairs of an environment's pyvenv.cfg, or None if it isn't a virtual environment."""
+    values = {}
+    try:
+        with open(os.path.join(prefix, "pyvenv.cfg"), encoding="utf-8", errors="replace") as f:
+            for line in f:
+                key, separator, value = line.partition("=")
+                if separator:
+                    values[key.strip().lower()] = value.strip()
+    except OSError:
+        return None
+    return values
+
+
+def read_patchlevel(prefix, major_minor=None):
+    """The exact version from the C headers of an installation ("3.11.7"), or None."""
+    paths = [os.path.join(prefix, "include", "patchlevel.h")]  # Windows layout
+    # Up to 3.7 the folder has the ABI flags too (python3.7m)
+    paths += glob.glob(os.path.join(prefix, "include", f"python{major_minor or 3}*", "patchlevel.h"))
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                match = PATCHLEVEL.search(f.read())
+        except OSError:
+            continue
+        if match:
+            return match.group(1)
+    return None
+
+
+def conda_python_version(prefix):
+    """The python version conda installed into an environment, from conda-meta."""
+    for path in glob.glob(os.path.join(prefix, "conda-meta", "python-[0-9]*.json")):
+        version = os.path.basename(path)[len("python-"):].split("-")[0]
+        if version[:1].isdigit():
+            return version
+    return None
+
+
+def major_minor_of(executable, prefix):
+    """"3.11" from the executable's real name or the installation's files, or None."""
+    match = VERSIONED_NAME.search(os.path.basename(os.path.realpath(executable)))
+    if match:
+        return f"{match.group(1)}.{match.group(2)}"
+    for pattern in ("python3[0-9]*.dll", os.path.join("lib", "python3.*")):
+        for path in glob.glob(os.path.join(prefix, pattern)):
+            match = VERSIONED_NAME.search(os.path.basename(path))
+            if match:
+                return f"{match.group(1)}.{match.group(2)}"
+    return None
+
+
+def layout_site_dirs(prefix, major_minor, user_site=False):
+    """The site directories of an installation according to the standard folder layout."""
+    if WINDOWS:
+        candidates = [os.path.join(prefix, "Lib", "site-packages")]
+        if user_site and major_minor:
+            appdata = os.environ.get("APPDATA", "")
+            candidates.append(os.path.join(appdata, "Python", f"Python{major_minor.replace('.', '')}", "site-packages"))
+    else:
+        libs = [f"python{major_minor}"] if major_minor else [os.path.basename(p) for p in glob.glob(os.path.join(prefix, "lib", "python3*"))]
+        candidates = [os.path.join(prefix, "lib", lib, "site-packages") for lib in libs]
+        if prefix in ("/usr", "/usr/local"):
+            # Debian keeps distribution packages in dist-packages
+            candidates += [os.path.join(prefix, "lib", "python3", "dist-packages")]
+            candidates += [os.path.join(prefix, "lib", lib, "dist-packages") for lib in libs]
+        if user_site and major_minor:
+            candidates.append(os.path.expanduser(os.path.join("~", ".local", "lib", f"python{major_minor}", "site-packages")))
+    return [path for path in candidates if os.path.isdir(path)]
+
+
+def stat_signature(paths):
+    """Modification times and sizes of ``paths``; it changes when something is installed or replaced."""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((0, 0))
+    return tuple(signature)
+
+
+def signature_paths(executable, prefix, site_dirs):
+    return [executable, os.path.join(prefix, "pyvenv.cfg")] + list(site_dirs)
+
+
+def count_distributions(site_dirs):
+    return sum(len(distribution_entries(site_dir)) for site_dir in site_dirs)
+
+
+def probe(executable):
+    """Start the interpreter and ask it about itself; None if it won't run."""
+    try:
+        result = subprocess.run(
+            [executable, "-I", "-c", PROBE_SCRIPT], stdin=subprocess.DEVNULL, capture_output=True,
+            text=True, timeout=PROBE_TIMEOUT, creationflags=CREATION_FLAGS
+        )
+        return json.loads(result.stdout) if result.returncode == 0 else None
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+def installation_kind(prefix):
+    """"conda", "pyenv" or "system" for an installation that isn't a virtual environment."""
+    if os.path.isdir(os.path.join(prefix, "conda-meta")):
+        return "conda"
+    return "pyenv" if f"{os.sep}.pyenv{os.sep}" in prefix else "system"
+
+
+def current_interpreter():
+    """The interpreter PyPackManager itself runs on, described from sys."""
+    site_dirs = site_package_dirs()
+    return Interpreter(
+        path=sys.executable,
+        version=platform.python_version(),
+        implementation=platform.python_implementation(),
+        kind="venv" if sys.prefix != sys.base_prefix else installation_kind(sys.prefix),
+        prefix=sys.prefix,
+        home=sys.base_prefix,
+        site_dirs=tuple(site_dirs),
+        package_count=count_distributions(site_dirs),
+        signature=stat_signature(signature_paths(sys.executable, sys.prefix, site_dirs)),
+    )
+
+
+def fingerprint(executable, known=None):
+    """Describe the interpreter at ``executable``, without starting it where the files say enough.
+
+    Virtual environments are read from pyvenv.cfg, conda environments
+    from conda-meta and other installations from their C headers and
+    folder layout; only when none of these give the exact version is the
+    interpreter started. ``known`` is an earlier Interpreter for the same
+    path, returned as it is if nothing changed since. Returns None for
+    executables that aren't a usable Python.
+    """
+    if same_path(executable, sys.executable):
+        return current_interpreter()
+    if known is not None:
+        paths = signature_paths(known.path, known.prefix, known.site_dirs)
+        if stat_signature(paths) == known.signature:
+            return known
+
+    prefix = environment_prefix(executable)
+    config = read_pyvenv_cfg(prefix)
+    if config is None:
+        # Links like /bin/python3 -> /usr/bin/python3.11 belong to the installation they point into
+        prefix = environment_prefix(os.path.realpath(executable))
+    implementation = "PyPy" if "pypy" in os.path.basename(os.path.realpath(executable)).lower() else "CPython"
+    version = None
+    if config is not None:
+        kind = "venv"
+        # venv writes "version", virtualenv "version_info" (3.11.7.final.0)
+        version = config.get("version") or ".".join(config.get("version_info", "").split(".")[:3]) or None
+        implementation = config.get("implementation") or implementation
+        home_bin = config.get("home") or ""
+        home = environment_prefix(os.path.join(home_bin, "python")) if home_bin else prefix
+    else:
+        kind = installation_kind(prefix)
+        version = conda_python_version(prefix) if kind == "conda" else None
+        home = prefix
+
+    major_minor = ".".join(version.split(".")[:2]) if version else major_minor_of(executable, home)
+    if version is None:
+        version = read_patchlevel(home, major_minor)
+
+    if version is not None:
+        site_dirs = layout_site_dirs(prefix, major_minor, user_site=config is None)
+        if config is not None and config.get("include-system-site-packages", "").lower() == "true":
+            site_dirs += layout_site_dirs(home, major_minor, user_site=True)
+    else:
+        # Nothing on disk says which Python this is, so ask it
+        info = probe(executable)
+        if info is None:
+            return None
+        version = info["version"]
+        implementation = info["implementation"]
+        home = info["base_prefix"]
+        site_dirs = info["site_dirs"]
+
+    return Interpreter(
+        path=executable,
+        version=version,
+        implementation=implementation,
+        kind=kind,
+        prefix=prefix,
+        home=home,
+        site_dirs=tuple(site_dirs),
+        package_count=count_distributions(site_dirs),
+        signature=stat_signature(signature_paths(executable, prefix, site_dirs)),
+    )
+
+
+def candidate_identity(executable):
+    """identity() of the interpreter an executable will turn out to be, from the path alone."""
+    prefix = environment_prefix(executable)
+    if os.path.isfile(os.path.join(prefix, "pyvenv.cfg")):
+        return os.path.normcase(os.path.abspath(prefix))
+    return os.path.normcase(os.path.realpath(executable))
+
+
+def identity(interpreter):
+    """Interpreters with the same identity are the same environment found twice.
+
+    A virtual environment's python is often a link to its base
+    interpreter, so environments are told apart by their folder and
+    other installations by the real path of the executable.
+    """
+    if interpreter.kind == "venv":
+        return os.path.normcase(os.path.abspath(interpreter.prefix))
+    return os.path.normcase(os.path.realpath(interpreter.path))
+
+
+def executables_in(directory):
+    """Python executables directly inside ``directory``."""
+    if WINDOWS:
+        path = os.path.join(directory, "python.exe")
+        return [path] if os.path.isfile(path) else []
+    found = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if re.fullmatch(r"python3(\.\d+)?|python|pypy3(\.\d+)?", entry.name) and os.access(entry.path, os.X_OK):
+                    found.append(entry.path)
+    except OSError:
+        pass
+    return sorted(found)
+
+
+def environments_in(directory):
+    """Executables of the environments directly below ``directory`` (e.g. a conda envs folder)."""
+    try:
+        children = sorted(os.scandir(directory), key=lambda entry: entry.name)
+    except OSError:
+        return []
+    executables = (environment_executable(entry.path) for entry in children if entry.is_dir())
+    return [executable for executable in executables if executable]
+
+
+def path_executables():
+    found = []
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        # pyenv shims are scripts; the versions behind them are found directly
+        if directory and "shims" not in directory and "WindowsApps" not in directory:
+            found += executables_in(directory)
+    return found
+
+
+def pyenv_executables():
+    root = os.environ.get("PYENV_ROOT") or os.path.expanduser(os.path.join("~", ".pyenv"))
+    versions = os.path.join(root, "pyenv-win", "versions") if WINDOWS else os.path.join(root, "versions")
+    found = environments_in(versions)
+    # pyenv-virtualenv keeps its environments inside the version they were made from
+    for version in glob.glob(os.path.join(versions, "*", "envs")):
+        found += environments_in(version)
+    return found
+
+
+def conda_executables():
+    home = os.path.expanduser("~")
+    roots = [os.path.join(home, name) for name in ("anaconda3", "miniconda3", "miniconda", "miniforge3", "mambaforge", "Anaconda3", "Miniconda3")]
+    roots += ["/opt/conda", "/opt/anaconda3", "/opt/miniconda3"]
+    if os.environ.get("CONDA_EXE"):
+        roots.append(environment_prefix(os.environ["CONDA_EXE"]))
+    found = []
+    for root in roots:
+        executable = environment_executable(root)
+        if executable:
+            found.append(executable)
+        found += environments_in(os.path.join(root, "envs"))
+    # Environments created elsewhere with --prefix are listed here by conda
+    try:
+        with open(os.path.join(home, ".conda", "environments.txt"), encoding="utf-8") as f:
+            for line in f:
+                executable = environment_executable(line.strip()) if line.strip() else None
+                if executable:
+                    found.append(executable)
+    except OSError:
+        pass
+    return found
+
+
+def virtualenv_home():
+    """Where virtualenvwrapper (and environments created by PyPackManager) keep environments."""
+    return os.environ.get("WORKON_HOME") or os.path.join(os.path.expanduser("~"), ".virtualenvs")
+
+
+def virtualenv_executables():
+    home = os.path.expanduser("~")
+    roots = [
+        virtualenv_home(),
+        os.path.join(home, ".local", "share", "virtualenvs"),  # pipenv
+        os.path.join(home, ".cache", "pypoetry", "virtualenvs"),
+        os.path.join(home, "Library", "Caches", "pypoetry", "virtualenvs"),
+        os.path.join(os.environ.get("LOCALAPPDATA", home), "pypoetry", "Cache", "virtualenvs"),
+    ]
+    found = []
+    for root in roots:
+        found += environments_in(root)
+    return found
+
+
+def installation_executables():
+    """Installers' default folders, which aren't always on PATH."""
+    if WINDOWS:
+        patterns = [
+            os.path.join(os.environ.get("LOCALAPPDATA", ""), "Programs", "Python", "Python*", "python.exe"),
+            os.path.join(os.environ.get("ProgramFiles", "C:\\Program Files"), "Python*", "python.exe"),
+            "C:\\Python*\\python.exe",
+        ]
+    else:
+        patterns = [
+            "/Library/Frameworks/Python.framework/Versions/*/bin/python3",
+            "/opt/homebrew/bin/python3*", "/usr/local/bin/python3*", "/opt/python*/bin/python3",
+        ]
+    found = []
+    for pattern in patterns:
+        found += [path for path in sorted(glob.glob(pattern)) if VERSIONED_NAME.search(path) or path.endswith(("python3", "python.exe"))]
+    return [path for path in found if not path.endswith("-config")]
+
+
+def default_project_dirs():
+    configured = os.environ.get("PYPACKMANAGER_PROJECT_DIRS")
+    if configured:
+        return [path for path in configured.split(os.pathsep) if path]
+    home = os.path.expanduser("~")
+    return [path for path in (os.path.join(home, name) for name in DEFAULT_PROJECT_DIRS) if os.path.isdir(path)]
+
+
+def project_executables(root, depth=PROJECT_SCAN_DEPTH):
+    """Virtual environments (folders with a pyvenv.cfg) up to ``depth`` levels below ``root``."""
+    found = []
+    level = [root]
+    for _ in range(depth):
+        below = []
+        for directory in level:
+            try:
+                with os.scandir(directory) as it:
+                    children = [entry.path for entry in it if entry.is_dir(follow_symlinks=False) and entry.name not in SKIPPED_DIRS]
+            except OSError:
+                continue
+            for child in children:
+                if os.path.isfile(os.path.join(child, "pyvenv.cfg")):
+                    executable = environment_executable(child)
+                    if executable:
+                        found.append(executable)
+                else:
+                    below.append(child)  # Environments aren't searched for more environments
+        level = below
+    return found
+
+
+def discover_interpreters(known=None, project_dirs=None):
+    """Find the Python interpreters and environments on this machine.
+
+    PATH, pyenv, conda, the usual virtualenv homes, the installers'
+    default folders and the project directories are searched at the same
+    time, then every candidate is fingerprinted in parallel. ``known``
+    ({path: Interpreter}, e.g. from the registry) saves fingerprinting
+    what hasn't changed. The running interpreter comes first.
+    """
+    known = known or {}
+    project_dirs = default_project_dirs() if project_dirs is None else project_dirs
+    searches = [path_executables, pyenv_executables, conda_executables, virtualenv_executables, installation_executables]
+
+    with ThreadPoolExecutor(max_workers=DISCOVERY_WORKERS, thread_name_prefix="interpreter-discovery") as executor:
+        futures = [executor.submit(search) for search in searches]
+        futures += [executor.submit(project_executables, root) for root in project_dirs]
+        candidates = [sys.executable]
+        seen = {candidate_identity(sys.executable)}
+        for future in futures:
+            try:
+                paths = future.result()
+            except OSError as e:
+                print(f"Interpreter search failed: {e}")
+                continue
+            for path in paths:
+                # The same interpreter is usually reachable under several names
+                key = candidate_identity(path)
+                if key not in seen:
+                    seen.add(key)
+                    candidates.append(path)
+
+        fingerprints = executor.map(lambda path: fingerprint(path, known.get(path)), candidates)
+        interpreters = []
+        identities = set()
+        for interpreter in fingerprints:
+            if interpreter is None or identity(interpreter) in identities:
+                continue
+            identities.add(identity(interpreter))
+            interpreters.append(interpreter)
+    return interpreters
+
+
+class InterpreterRegistry:
+    """Discovered interpreters, kept between runs so the environment list is there right away.
+
+    Stored in SQLite with when each was last seen by discovery and last
+    picked in the environment switcher; interpreters() lists the most
+    recently used first.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(data_dir(), "interpreters.sqlite3")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS interpreters (
+                path TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                seen_at REAL NOT NULL,
+                used_at REAL NOT NULL DEFAULT 0
+            )
+        """)
+        self._db.commit()
+
+    def interpreters(self):
+        with self._lock:
+            rows = self._db.execute("SELECT data FROM interpreters ORDER BY used_at DESC, seen_at").fetchall()
+        return [self._load(row[0]) for row in rows]
+
+    def get(self, path):
+        with self._lock:
+            row = self._db.execute("SELECT data FROM interpreters WHERE path = ?", (path,)).fetchone()
+        return self._load(row[0]) if row else None
+
+    def replace(self, interpreters):
+        """Store a discovery result; interpreters that weren't found again are dropped."""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO interpreters (path, data, seen_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET data = excluded.data, seen_at = excluded.seen_at",
+                [(interpreter.path, json.dumps(interpreter._asdict()), now) for interpreter in interpreters],
+            )
+            self._db.execute("DELETE FROM interpreters WHERE seen_at < ?", (now,))
+            self._db.commit()
+
+    def add(self, interpreter):
+        """Store one interpreter (e.g. a newly created environment) without a full discovery."""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO interpreters (path, data, seen_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET data = excluded.data, seen_at = excluded.seen_at",
+                (interpreter.path, json.dumps(interpreter._asdict()), time.time()),
+            )
+            self._db.commit()
+
+    def mark_used(self, path):
+        with self._lock:
+            self._db.execute("UPDATE interpreters SET used_at = ? WHERE path = ?", (time.time(), path))
+            self._db.commit()
+
+    def last_used(self):
+        """The interpreter picked most recently, if it still exists."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM interpreters WHERE used_at > 0 ORDER BY used_at DESC LIMIT 1"
+            ).fetchone()
+        interpreter = self._load(row[0]) if row else None
+        return interpreter if interpreter is not None and os.path.isfile(interpreter.path) else None
+
+    @staticmethod
+    def _load(data):
+        values = json.loads(data)
+        values["site_dirs"] = tuple(values["site_dirs"])
+        values["signature"] = tuple(tuple(item) for item in values["signature"])
+        return Interpreter(**values)
+
+
+_shared_registry = None
+_shared_registry_lock = threading.Lock()
+
+
+def shared_interpreter_registry():
+    """Return the process-wide InterpreterRegistry, creating it on first use."""
+    global _shared_registry
+    with _shared_registry_lock:
+        if _shared_registry is None:
+            _shared_registry = InterpreterRegistry()
+        return _shared_registry
+
+
+class InterpreterDiscoveryThread(QThread):
+    """Runs discover_interpreters() in the background and stores the result in the registry."""
+    interpreters_found = pyqtSignal(list)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, registry=None):
+        super().__init__()
+        self.registry = registry or shared_interpreter_registry()
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            known = {interpreter.path: interpreter for interpreter in self.registry.interpreters()}
+            interpreters = discover_interpreters(known)
+            self.registry.replace(interpreters)
+        except Exception as e:
+            self.error_occurred.emit(f"Error: {str(e)}")
+            return
+        print(f"Found {len(interpreters)} Python environments in {time.perf_counter() - started:.2f}s")
+        self.interpreters_found.emit(self.registry.interpreters())
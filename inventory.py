@@ -0,0 +1,235 @@
+import csv
+import os
+import sys
+import threading
+
+# Suffixes of the metadata directories a site-packages folder can contain
+DIST_INFO = ".dist-info"
+EGG_INFO = ".egg-info"
+
+
+def site_package_dirs():
+    """Return the directories on sys.path that can hold installed distributions."""
+    return [path for path in sys.path if path and os.path.isdir(path)]
+
+
+def read_metadata_headers(path):
+    """Read Name and Version from a METADATA/PKG-INFO file without parsing the body."""
+    headers = {}
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.strip():
+                    break  # The long description starts after the first blank line
+                key, _, value = line.partition(":")
+                if key in ("Name", "Version") and key not in headers:
+                    headers[key] = value.strip()
+                    if len(headers) == 2:
+                        break
+    except OSError:
+        pass
+    return headers
+
+
+def read_installer(dist_path):
+    try:
+        with open(os.path.join(dist_path, "INSTALLER"), encoding="utf-8") as f:
+            return f.read().strip() or "Unknown"
+    except OSError:
+        return "Unknown"
+
+
+def record_size(dist_path):
+    """Total installed size in bytes according to the RECORD file, or None without one."""
+    try:
+        with open(os.path.join(dist_path, "RECORD"), encoding="utf-8", newline="") as f:
+            total = 0
+            for row in csv.reader(f):
+                if len(row) >= 3 and row[2].isdigit():
+                    total += int(row[2])
+            return total
+    except OSError:
+        return None
+
+
+def record_entries(dist_path):
+    """Yield (path relative to site-packages, hash, size) for each row of a .dist-info's RECORD.
+
+    Files without a hash (RECORD itself, bytecode) have an empty hash and
+    a size of None. Raises OSError when there is no RECORD.
+    """
+    with open(os.path.join(dist_path, "RECORD"), encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            if len(row) >= 3 and row[0]:
+                yield row[0], row[1], int(row[2]) if row[2].isdigit() else None
+
+
+def record_files(dist_path):
+    """Absolute paths of the files a .dist-info's RECORD lists (including files outside site-packages).
+
+    Raises OSError when there is no RECORD.
+    """
+    site_dir = os.path.dirname(dist_path)
+    with open(os.path.join(dist_path, "RECORD"), encoding="utf-8", newline="") as f:
+        paths = {os.path.normpath(os.path.join(site_dir, row[0])) for row in csv.reader(f) if row and row[0]}
+    # Installers don't always list every file of the metadata directory itself
+    for entry in os.listdir(dist_path):
+        paths.add(os.path.join(dist_path, entry))
+    return sorted(paths)
+
+
+def read_distribution(site_dir, entry_name):
+    """Return the inventory record for one .dist-info/.egg-info entry, or None."""
+    dist_path = os.path.join(site_dir, entry_name)
+    if entry_name.endswith(DIST_INFO):
+        headers = read_metadata_headers(os.path.join(dist_path, "METADATA"))
+        stem = entry_name[:-len(DIST_INFO)]
+    elif entry_name.endswith(EGG_INFO):
+        metadata_path = os.path.join(dist_path, "PKG-INFO") if os.path.isdir(dist_path) else dist_path
+        headers = read_metadata_headers(metadata_path)
+        stem = entry_name[:-len(EGG_INFO)]
+    else:
+        return None
+
+    # Fall back to the directory name, which is "<name>-<version>"
+    dir_name, _, dir_version = stem.partition("-")
+    name = headers.get("Name") or dir_name
+    if not name:
+        return None
+
+    is_dist_info = entry_name.endswith(DIST_INFO)
+    return {
+        "name": name,
+        "version": headers.get("Version") or dir_version.split("-")[0] or "Unknown",
+        "location": site_dir,
+        "installer": read_installer(dist_path) if is_dist_info else "Unknown",
+        "size": record_size(dist_path) if is_dist_info else None,
+        "metadata_path": dist_path,
+    }
+
+
+def distribution_entries(site_dir):
+    """Return {entry name: mtime_ns} for the metadata entries in ``site_dir``."""
+    entries = {}
+    try:
+        with os.scandir(site_dir) as it:
+            for entry in it:
+                if entry.name.endswith((DIST_INFO, EGG_INFO)):
+                    try:
+                        entries[entry.name] = entry.stat().st_mtime_ns
+                    except OSError:
+                        pass
+    except OSError:
+        pass
+    return entries
+
+
+def scan_distributions(paths=None):
+    """List the distributions installed on ``paths`` (default: sys.path), in-process.
+
+    Returns dicts with name, version, location, installer, size (bytes, or
+    None when unknown) and metadata_path. Like importlib.metadata, the first
+    distribution found for a name wins.
+    """
+    seen = set()
+    packages = []
+    for site_dir in (paths if paths is not None else site_package_dirs()):
+        try:
+            entries = sorted(os.listdir(site_dir))
+        except OSError:
+            continue
+        for entry_name in entries:
+            if not entry_name.endswith((DIST_INFO, EGG_INFO)):
+                continue
+            package = read_distribution(site_dir, entry_name)
+            if package is None:
+                continue
+            key = package["name"].lower().replace("_", "-")
+            if key in seen:
+                continue
+            seen.add(key)
+            packages.append(package)
+    return packages
+
+
+class InventoryCache:
+    """Installed-package inventory that only re-reads what changed since the last scan.
+
+    Each .dist-info/.egg-info entry is remembered with its mtime; refresh()
+    lists the site directories and reads only entries that are new or have
+    been modified, so refreshing after an install costs O(changed) rather
+    than a full rescan. mark_dirty() (e.g. from a file system watcher) tells
+    callers that the last result may be out of date. Safe to use from a
+    worker thread.
+    """
+
+    def __init__(self, paths=None):
+        self.paths = paths
+        self._records = {}  # (site_dir, entry name) -> (mtime_ns, package or None)
+        self._packages = None
+        self._dirty = True
+        self._lock = threading.Lock()
+        self.last_reread = 0  # Entries read from disk by the last refresh()
+
+    def directories(self):
+        return list(self.paths if self.paths is not None else site_package_dirs())
+
+    def is_dirty(self):
+        return self._dirty
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    def packages(self):
+        """Return the last scan result, or None before the first refresh()."""
+        return self._packages
+
+    def refresh(self):
+        """Bring the inventory up to date and return it (same format as scan_distributions)."""
+        with self._lock:
+            # Clear the flag first so a change during the scan marks it dirty again
+            self._dirty = False
+            seen = set()
+            packages = []
+            records = {}
+            reread = 0
+            for site_dir in self.directories():
+                entries = distribution_entries(site_dir)
+                for entry_name in sorted(entries):
+                    key = (site_dir, entry_name)
+                    mtime = entries[entry_name]
+                    cached = self._records.get(key)
+                    if cached is not None and cached[0] == mtime:
+                        package = cached[1]
+                    else:
+                        package = read_distribution(site_dir, entry_name)
+                        reread += 1
+                    records[key] = (mtime, package)
+                    if package is None:
+                        continue
+                    name_key = package["name"].lower().replace("_", "-")
+                    if name_key in seen:
+                        continue
+                    seen.add(name_key)
+                    packages.append(package)
+
+            # Entries that disappeared (uninstalled or upgraded) are dropped with the old dict
+            self._records = records
+            self._packages = packages
+            self.last_reread = reread
+            return packages
+
+
+def pip_version_text(packages, python_version=None):
+    """Format the pip version like `pip --version` from a scan_distributions result.
+
+    ``python_version`` is the version of the environment's interpreter (default: this one).
+    """
+    for package in packages:
+        if package["name"].lower() == "pip":
+            if python_version:
+                python = ".".join(python_version.split(".")[:2])
+            else:
+                python = f"{sys.version_info.major}.{sys.version_info.minor}"
+            return f"pip {package['version']} from {os.path.join(package['location'], 'pip')} (python {python})"
+    return "pip is not installed"
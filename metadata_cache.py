@@ -0,0 +1,132 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+from app_paths import data_dir
+
+DEFAULT_TTL = 6 * 60 * 60                # Serve cached documents without asking PyPI for 6 hours
+DEFAULT_MAX_STALE = 7 * 24 * 60 * 60     # After a week, wait for revalidation instead of serving stale data
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024    # Compressed size limit for the whole cache
+
+
+def normalize_name(name):
+    """Normalize a project name the way PyPI does (PEP 503)."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+class CacheEntry(namedtuple("CacheEntry", "body etag last_modified fetched_at")):
+    def age(self):
+        return time.time() - self.fetched_at
+
+
+class MetadataCache:
+    """On-disk cache of PyPI JSON documents keyed by package name.
+
+    Documents are stored zlib-compressed in a SQLite database together with
+    the ETag and Last-Modified headers needed for conditional requests.
+    When the total size goes over ``max_bytes`` the least recently used
+    entries are evicted.
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, max_stale=DEFAULT_MAX_STALE, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path or os.path.join(data_dir("cache"), "metadata.sqlite3")
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                name TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS documents_accessed ON documents (accessed_at)")
+        self._db.commit()
+
+    def get(self, name):
+        """Return the cached CacheEntry for ``name``, or None if it isn't cached."""
+        key = normalize_name(name)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM documents WHERE name = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE documents SET accessed_at = ? WHERE name = ?", (time.time(), key))
+            self._db.commit()
+        body, etag, last_modified, fetched_at = row
+        return CacheEntry(zlib.decompress(body), etag, last_modified, fetched_at)
+
+    def is_fresh(self, entry):
+        return entry.age() < self.ttl
+
+    def is_usable_stale(self, entry):
+        return entry.age() < self.max_stale
+
+    def put(self, name, body, etag=None, last_modified=None):
+        """Store a freshly downloaded document and evict old entries if needed."""
+        compressed = zlib.compress(body)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (normalize_name(name), compressed, etag, last_modified, now, now, len(compressed)),
+            )
+            self._evict()
+            self._db.commit()
+
+    def touch(self, name):
+        """Mark a cached document as fresh again (the server answered 304)."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE documents SET fetched_at = ?, accessed_at = ? WHERE name = ?",
+                (now, now, normalize_name(name)),
+            )
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM documents")
+            self._db.commit()
+
+    def total_size(self):
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+
+    def _evict(self):
+        # Caller holds the lock
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        doomed = []
+        for name, size in self._db.execute("SELECT name, size FROM documents ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((name,))
+            total -= size
+        self._db.executemany("DELETE FROM documents WHERE name = ?", doomed)
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def shared_cache():
+    """Return the process-wide MetadataCache, creating it on first use."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = MetadataCache()
+        return _shared_cache
@@ -0,0 +1,118 @@
+from collections import namedtuple
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from pypi_client import PyPIClient
+from metadata_cache import shared_cache, normalize_name
+from version_key import version_key, version_greater, is_prerelease
+
+SCAN_WORKERS = 16      # Lookups in flight at once
+SCAN_RATE_LIMIT = 50   # Network requests per second (cache hits are free)
+SCAN_BATCH_SIZE = 50   # Packages per batch; results are reported after each one
+
+# An installed package with a newer release on PyPI
+OutdatedPackage = namedtuple("OutdatedPackage", "name installed latest")
+
+
+def latest_release(document, include_prereleases=False):
+    """Newest installable version in a PyPI JSON document, or None.
+
+    Releases without files or with only yanked files are skipped, and so
+    are pre-releases unless ``include_prereleases`` is set.
+    """
+    candidates = [
+        version for version, files in (document.get("releases") or {}).items()
+        if files and not all(f.get("yanked", False) for f in files)
+        and version_key(version)[0] and (include_prereleases or not is_prerelease(version))
+    ]
+    if not candidates:
+        # Fall back on the version PyPI itself reports as current
+        return document.get("info", {}).get("version")
+    return max(candidates, key=version_key)
+
+
+def find_outdated(packages, documents):
+    """Compare installed {"name", "version"} dicts with their PyPI documents ({normalized name: document})."""
+    outdated = []
+    for package in packages:
+        document = documents.get(normalize_name(package["name"]))
+        if document is None:
+            continue
+        installed = package["version"]
+        # Someone running a pre-release is offered newer pre-releases too
+        latest = latest_release(document, include_prereleases=is_prerelease(installed))
+        if latest and version_greater(latest, installed):
+            outdated.append(OutdatedPackage(package["name"], installed, latest))
+    return outdated
+
+
+def scan_outdated(packages, client, batch_size=SCAN_BATCH_SIZE, on_batch=None, is_cancelled=None):
+    """Check installed packages against PyPI in concurrent batches.
+
+    Returns (outdated packages, number of packages found on PyPI).
+    ``on_batch(outdated in the batch, packages checked so far)`` is called
+    after each batch.
+    """
+    packages = list(packages)
+    outdated = []
+    checked = 0
+    for start in range(0, len(packages), batch_size):
+        if is_cancelled is not None and is_cancelled():
+            break
+        batch = packages[start:start + batch_size]
+        documents = {}
+
+        def keep(name, document):
+            documents[normalize_name(name)] = document
+
+        client.get_packages([package["name"] for package in batch], on_result=keep, is_cancelled=is_cancelled)
+        found = find_outdated(batch, documents)
+        checked += len(documents)
+        outdated += found
+        if on_batch is not None:
+            on_batch(found, start + len(batch))
+    return outdated, checked
+
+
+class OutdatedScanThread(QThread):
+    """Checks installed packages against their latest release on PyPI.
+
+    Packages are looked up concurrently in batches through the metadata
+    cache, with network requests rate limited, so a large environment
+    takes seconds instead of the minutes of ``pip list --outdated``.
+    batch_ready carries the outdated packages found in each batch, and
+    scan_finished(outdated, checked) comes at the end, where ``checked``
+    counts the packages found on PyPI.
+    """
+    batch_ready = pyqtSignal(list)
+    progress = pyqtSignal(int, int)  # Packages checked, total
+    scan_finished = pyqtSignal(list, int)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, packages, client=None, batch_size=SCAN_BATCH_SIZE):
+        super().__init__()
+        self.packages = list(packages)
+        self.client = client or PyPIClient(
+            max_workers=SCAN_WORKERS, cache=shared_cache(), rate_limit=SCAN_RATE_LIMIT
+        )
+        self.batch_size = batch_size
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        def report(found, checked):
+            if found:
+                self.batch_ready.emit(found)
+            self.progress.emit(checked, len(self.packages))
+
+        try:
+            outdated, checked = scan_outdated(
+                self.packages, self.client, self.batch_size, report, lambda: self.cancelled
+            )
+        except Exception as e:
+            self.error_occurred.emit(f"Error: {str(e)}")
+            return
+        if not self.cancelled:
+            self.scan_finished.emit(outdated, checked)
@@ -1,15 +1,23 @@
-import os
-from PyQt5.QtWidgets import QFrame, QHBoxLayout, QVBoxLayout, QLabel, QPushButton, QComboBox
+from PyQt5.QtWidgets import QFrame, QHBoxLayout, QVBoxLayout, QLabel, QPushButton, QComboBox, QCheckBox
 from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QFont, QPixmap, QPainter, QColor
+from PyQt5.QtGui import QFont
+
+from icon_service import shared_icons
 
 class PackageCard(QFrame):
     package_clicked = pyqtSignal(object)
+    package_hovered = pyqtSignal(object)
+    install_clicked = pyqtSignal(object, str)  # Library, selected version
+    
+    ICON_SIZE = 40
     
-    def __init__(self, library, parent=None):
+    def __init__(self, library, install_set=None, parent=None):
         super().__init__(parent)
         self.library = library
+        self.install_set = install_set
         self.setup_ui()
+        if install_set is not None:
+            install_set.changed.connect(self.sync_selection)
         
     def setup_ui(self):
         self.setFrameShape(QFrame.StyledPanel)
@@ -27,57 +35,10 @@ class PackageCard(QFrame):
         main_layout.setContentsMargins(16, 16, 16, 16)
         main_layout.setSpacing(12)
         
-        # Icon
-        icon_size = 40
-        icon_path = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), 
-            "icons", 
-            self.library["icon"]
-        )
-        
+        # Icon (file or generated letter avatar, cached by the icon service)
         self.icon_label = QLabel()
-        
-        if os.path.exists(icon_path):
-            pixmap = QPixmap(icon_path).scaled(
-                icon_size, icon_size, 
-                Qt.KeepAspectRatio, Qt.SmoothTransformation
-            )
-        else:
-            # Create a custom icon
-            pixmap = QPixmap(icon_size, icon_size)
-            pixmap.fill(Qt.transparent)
-            
-            painter = QPainter(pixmap)
-            painter.setRenderHint(QPainter.Antialiasing)
-            
-            # Draw colored circle based on first letter
-            first_letter = self.library["name"][0].upper()
-            
-            # Different colors for different letters
-            color_map = {
-                'A': "#FF5733", 'B': "#33FF57", 'C': "#3357FF", 'D': "#F033FF", 
-                'E': "#33FFF0", 'F': "#FF3355", 'G': "#FFFF33", 'H': "#33FFFF",
-                'I': "#FF33FF", 'J': "#33FF33", 'K': "#3333FF", 'L': "#FF3333",
-                'M': "#33FFAA", 'N': "#AA33FF", 'O': "#FFAA33", 'P': "#3377FF",
-                'Q': "#FF7733", 'R': "#33FF77", 'S': "#7733FF", 'T': "#FF33AA",
-                'U': "#33FFAA", 'V': "#AA33FF", 'W': "#FFAA33", 'X': "#33AAFF",
-                'Y': "#FFAA33", 'Z': "#33AAFF"
-            }
-            
-            color = color_map.get(first_letter, "#3776AB")  # Default to Python blue
-            
-            painter.setBrush(QColor(color))
-            painter.setPen(Qt.NoPen)
-            painter.drawEllipse(0, 0, icon_size, icon_size)
-            
-            # Draw first letter
-            painter.setPen(Qt.white)
-            painter.setFont(QFont("Arial", 16, QFont.Bold))
-            painter.drawText(pixmap.rect(), Qt.AlignCenter, first_letter)
-            painter.end()
-        
-        self.icon_label.setPixmap(pixmap)
-        self.icon_label.setFixedSize(icon_size, icon_size)
+        self.icon_label.setFixedSize(self.ICON_SIZE, self.ICON_SIZE)
+        self.refresh_icon()
         main_layout.addWidget(self.icon_label)
         
         # Info container - left side
@@ -126,6 +87,17 @@ class PackageCard(QFrame):
         right_container = QHBoxLayout()
         right_container.setSpacing(10)
         
+        # Checkbox to add the package to the install set
+        if self.install_set is not None:
+            self.select_checkbox = QCheckBox()
+            self.select_checkbox.setToolTip("Select to install together with other packages")
+            self.select_checkbox.setStyleSheet("background-color: transparent;")
+            self.select_checkbox.setChecked(self.library["name"] in self.install_set)
+            self.select_checkbox.toggled.connect(
+                lambda checked: self.install_set.set_selected(self.library, checked)
+            )
+            right_container.addWidget(self.select_checkbox)
+        
         # Version dropdown
         self.version_dropdown = QComboBox()
         self.version_dropdown.addItems(self.library["versions"])
@@ -162,10 +134,24 @@ class PackageCard(QFrame):
                 background-color: #005fa3;
             }
         """)
+        self.install_button.clicked.connect(
+            lambda: self.install_clicked.emit(self.library, self.version_dropdown.currentText())
+        )
         right_container.addWidget(self.install_button)
         
         main_layout.addLayout(right_container)
         
+    def sync_selection(self):
+        self.select_checkbox.setChecked(self.library["name"] in self.install_set)
+
+    def refresh_icon(self):
+        pixmap = shared_icons().package_icon(self.library, self.ICON_SIZE, self.devicePixelRatioF())
+        self.icon_label.setPixmap(pixmap)
+        
+    def enterEvent(self, event):
+        self.package_hovered.emit(self.library)
+        super().enterEvent(event)
+
     def mousePressEvent(self, event):
         self.package_clicked.emit(self.library)
         super().mousePressEvent(event)
@@ -0,0 +1,213 @@
+import bisect
+import difflib
+import heapq
+import json
+import os
+import re
+import threading
+import time
+import urllib.request
+import xmlrpc.client
+
+from app_paths import data_dir
+from metadata_cache import normalize_name
+
+SIMPLE_INDEX_URL = "https://pypi.org/simple/"
+CHANGELOG_URL = "https://pypi.org/pypi"
+SIMPLE_JSON_TYPE = "application/vnd.pypi.simple.v1+json"
+
+# Refresh from the changelog when the index is older than this
+DEFAULT_MAX_AGE = 24 * 60 * 60
+
+# Stop collecting substring matches after this many hits; ranking only needs the best few
+MAX_SUBSTRING_HITS = 5000
+
+
+def parse_simple_index(text):
+    """Return (project names, last serial) from a simple index document.
+
+    Accepts the PEP 691 JSON format, the HTML simple index, or a plain
+    text file with one project name per line (e.g. a local mirror dump).
+    """
+    stripped = text.lstrip()
+    if stripped.startswith("{"):
+        data = json.loads(text)
+        serial = data.get("meta", {}).get("_last-serial")
+        return [project["name"] for project in data.get("projects", [])], serial
+    if stripped.startswith("<"):
+        serial = None
+        serial_match = re.search(r"<!--\s*SERIAL\s+(\d+)\s*-->", text)
+        if serial_match:
+            serial = int(serial_match.group(1))
+        return re.findall(r"<a[^>]*>([^<]+)</a>", text), serial
+    return [line.strip() for line in text.splitlines() if line.strip() and not line.startswith("#")], None
+
+
+class PackageIndex:
+    """Local, searchable list of every project name on PyPI.
+
+    Names are stored normalized and sorted in a plain text file, one per
+    line, next to a small JSON file with the changelog serial the list is
+    current to. Prefix matches use binary search over the sorted list,
+    substring matches scan one joined string and fuzzy matches fall back
+    to difflib over names with the same first letter and a similar length.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or data_dir("index")
+        self.names_path = os.path.join(self.directory, "names.txt")
+        self.meta_path = os.path.join(self.directory, "index.json")
+        self.serial = None
+        self.updated_at = 0
+        self._names = []
+        self._blob = "\n"
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._names)
+
+    def exists(self):
+        return os.path.exists(self.names_path) and os.path.exists(self.meta_path)
+
+    def is_loaded(self):
+        return bool(self._names)
+
+    def is_stale(self, max_age=DEFAULT_MAX_AGE):
+        return time.time() - self.updated_at > max_age
+
+    def load(self):
+        """Load the index from disk. Returns False if it hasn't been built yet."""
+        if not self.exists():
+            return False
+        with open(self.meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(self.names_path, encoding="utf-8") as f:
+            names = f.read().split("\n")
+        self._set_names([name for name in names if name], meta.get("serial"), meta.get("updated_at", 0))
+        return True
+
+    def build(self, source=SIMPLE_INDEX_URL, timeout=60):
+        """Build the index from the PyPI simple index, or a local mirror file."""
+        if os.path.exists(source):
+            with open(source, encoding="utf-8") as f:
+                text = f.read()
+        else:
+            request = urllib.request.Request(source, headers={"Accept": SIMPLE_JSON_TYPE})
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                text = response.read().decode("utf-8")
+
+        names, serial = parse_simple_index(text)
+        self._set_names(sorted({normalize_name(name) for name in names}), serial, time.time())
+        self.save()
+
+    def update(self, changelog_url=CHANGELOG_URL, timeout=60):
+        """Apply new and removed projects from the PyPI changelog since our serial.
+
+        Returns the number of names added or removed. Falls back to a full
+        build when the index has no serial to start from.
+        """
+        if self.serial is None:
+            self.build()
+            return len(self._names)
+
+        proxy = xmlrpc.client.ServerProxy(changelog_url)
+        events = proxy.changelog_since_serial(self.serial)
+
+        names = list(self._names)
+        serial = self.serial
+        changes = 0
+        for name, _version, _timestamp, action, event_serial in events:
+            serial = max(serial, event_serial)
+            key = normalize_name(name)
+            position = bisect.bisect_left(names, key)
+            present = position < len(names) and names[position] == key
+            if action == "create" and not present:
+                names.insert(position, key)
+                changes += 1
+            elif action == "remove project" and present:
+                del names[position]
+                changes += 1
+
+        self._set_names(names, serial, time.time())
+        self.save()
+        return changes
+
+    def save(self):
+        tmp_path = self.names_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self._names))
+        os.replace(tmp_path, self.names_path)
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump({"serial": self.serial, "updated_at": self.updated_at, "count": len(self._names)}, f)
+
+    def search(self, query, limit=10):
+        """Return up to ``limit`` project names matching ``query``, best first.
+
+        Exact matches rank first, then prefix matches, then names containing
+        the query (earlier and at word boundaries first), then close
+        misspellings. Shorter names win ties.
+        """
+        query = normalize_name(query.strip())
+        if not query:
+            return []
+
+        with self._lock:
+            names, blob = self._names, self._blob
+
+        ranked = {}
+
+        # Prefix matches are one contiguous run of the sorted list; keep the shortest
+        start = bisect.bisect_left(names, query)
+        end = bisect.bisect_left(names, query + "\uffff", start)
+        for name in heapq.nsmallest(limit, names[start:end], key=len):
+            ranked[name] = (0 if name == query else 1, len(name), name)
+
+        # Substring matches: scan the joined names for the query
+        position = blob.find(query)
+        hits = 0
+        while position != -1 and hits < MAX_SUBSTRING_HITS:
+            line_start = blob.rfind("\n", 0, position) + 1
+            line_end = blob.find("\n", position)
+            name = blob[line_start:line_end]
+            offset = position - line_start
+            if offset and name not in ranked:
+                boundary = blob[position - 1] in "-_."
+                ranked[name] = (2 if boundary else 3, offset, len(name), name)
+            hits += 1
+            position = blob.find(query, line_end)
+
+        # Fuzzy matches only when there aren't enough direct hits
+        if len(ranked) < limit:
+            first = bisect.bisect_left(names, query[0])
+            last = bisect.bisect_left(names, query[0] + "\uffff", first)
+            candidates = [name for name in names[first:last] if abs(len(name) - len(query)) <= 2]
+            for name in difflib.get_close_matches(query, candidates, n=limit, cutoff=0.7):
+                if name not in ranked:
+                    ranked[name] = (4, len(name), name)
+
+        return heapq.nsmallest(limit, ranked, key=ranked.get)
+
+    def _set_names(self, names, serial, updated_at):
+        blob = "\n" + "\n".join(names) + "\n"
+        with self._lock:
+            self._names = names
+            self._blob = blob
+            self.serial = serial
+            self.updated_at = updated_at
+
+
+_shared_index = None
+_shared_index_lock = threading.Lock()
+
+
+def shared_index():
+    """Return the process-wide PackageIndex, loading it from disk on first use."""
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = PackageIndex()
+            try:
+                _shared_index.load()
+            except (OSError, ValueError):
+                pass  # Corrupt or unreadable index; it will be rebuilt
+        return _shared_index
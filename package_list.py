@@ -0,0 +1,380 @@
+import bisect
+
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QRectF, QSize, QEvent, pyqtSignal
+from PyQt5.QtGui import QFont, QColor, QPainter, QPainterPath, QFontMetrics
+
+from metadata_cache import normalize_name
+from icon_service import shared_icons
+from version_key import version_greater
+
+LibraryRole = Qt.UserRole + 1
+
+
+class PackageListModel(QAbstractListModel):
+    """List model for package results that only exposes rows as the view needs them.
+
+    Rows are kept sorted by a position key. A row may start out with just a
+    name (e.g. a ranked name from the package index) and be filled in later
+    with update_library(). Rows are revealed to the view ``batch_size`` at
+    a time through canFetchMore/fetchMore, and ``details_needed`` asks for
+    the metadata of newly revealed rows that only have a name.
+    """
+    details_needed = pyqtSignal(list)
+
+    def __init__(self, batch_size=10, parent=None):
+        super().__init__(parent)
+        self.batch_size = batch_size
+        self._positions = []
+        self._libraries = []
+        self._rows_by_name = {}
+        self._loaded = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        library = self._libraries[index.row()]
+        if role == Qt.DisplayRole:
+            return library["name"]
+        if role == Qt.ToolTipRole:
+            return library.get("description")
+        if role == LibraryRole:
+            return library
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._libraries)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        first = self._loaded
+        last = min(first + self.batch_size, len(self._libraries)) - 1
+        if last < first:
+            return
+        self.beginInsertRows(QModelIndex(), first, last)
+        self._loaded = last + 1
+        self.endInsertRows()
+
+        pending = [library["name"] for library in self._libraries[first:last + 1] if not has_details(library)]
+        if pending:
+            self.details_needed.emit(pending)
+
+    def clear(self):
+        self.beginResetModel()
+        self._positions = []
+        self._libraries = []
+        self._rows_by_name = {}
+        self._loaded = 0
+        self.endResetModel()
+
+    def set_names(self, names, loaded=None):
+        """Replace the contents with name-only rows; the first ``loaded`` are shown at once."""
+        self.beginResetModel()
+        self._positions = list(range(len(names)))
+        self._libraries = [{"name": name} for name in names]
+        self._rows_by_name = {normalize_name(name): row for row, name in enumerate(names)}
+        self._loaded = min(len(names), self.batch_size if loaded is None else loaded)
+        self.endResetModel()
+
+    def add_library(self, position, library):
+        """Fill in the row at ``position``, or insert a new row there if there isn't one."""
+        row = bisect.bisect_left(self._positions, position)
+        if row < len(self._positions) and self._positions[row] == position:
+            self._replace_row(row, library)
+            return
+
+        visible = row <= self._loaded
+        if visible:
+            self.beginInsertRows(QModelIndex(), row, row)
+        self._positions.insert(row, position)
+        self._libraries.insert(row, library)
+        self._reindex()
+        if visible:
+            self._loaded += 1
+            self.endInsertRows()
+
+    def update_library(self, library):
+        """Fill in details for the row with the same package name, if there is one."""
+        row = self._rows_by_name.get(normalize_name(library["name"]))
+        if row is not None:
+            self._replace_row(row, library)
+
+    def mark_unavailable(self, names):
+        """Flag name-only rows whose details could not be loaded."""
+        for name in names:
+            row = self._rows_by_name.get(normalize_name(name))
+            if row is not None and not has_details(self._libraries[row]):
+                self._replace_row(row, {"name": self._libraries[row]["name"], "unavailable": True})
+
+    def libraries(self):
+        return list(self._libraries)
+
+    def _replace_row(self, row, library):
+        self._libraries[row] = library
+        if row < self._loaded:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def _reindex(self):
+        self._rows_by_name = {normalize_name(library["name"]): row for row, library in enumerate(self._libraries)}
+
+
+class InstalledPackageModel(QAbstractListModel):
+    """Lightweight model of installed packages ({"name", "version"} dicts) for the My Python page.
+
+    Packages found to be outdated (see add_outdated) show their latest
+    version, and set_outdated_only() narrows the list down to them.
+    set_shared() notes packages also installed in other environments.
+    """
+
+    def __init__(self, batch_size=200, parent=None):
+        super().__init__(parent)
+        self.batch_size = batch_size
+        self._all_packages = []
+        self._packages = []
+        self._loaded = 0
+        self._latest = {}  # Normalized name -> newer version on PyPI
+        self._shared = {}  # Normalized name -> other environments with the same release
+        self._outdated_only = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        package = self._packages[index.row()]
+        if role == Qt.DisplayRole:
+            latest = self._latest.get(normalize_name(package["name"]))
+            if latest:
+                return f"{package['name']} - {package['version']}  \u2192  {latest}"
+            return f"{package['name']} - {package['version']}"
+        if role == Qt.ForegroundRole:
+            return QColor("#e6c07b") if normalize_name(package["name"]) in self._latest else None
+        if role == Qt.ToolTipRole:
+            shared = self._shared.get(normalize_name(package["name"]))
+            if shared:
+                plural = "environment" if shared == 1 else "environments"
+                return f"{package['name']} {package['version']} is also installed in {shared} other {plural}"
+            return None
+        if role == LibraryRole:
+            return package
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._packages)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        last = min(self._loaded + self.batch_size, len(self._packages)) - 1
+        if last < self._loaded:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, last)
+        self._loaded = last + 1
+        self.endInsertRows()
+
+    def set_packages(self, packages):
+        self._all_packages = list(packages)
+        # Forget updates that have been installed since the scan
+        installed = {normalize_name(package["name"]): package["version"] for package in self._all_packages}
+        self._latest = {
+            name: latest for name, latest in self._latest.items()
+            if name in installed and version_greater(latest, installed[name])
+        }
+        self._show()
+
+    def add_outdated(self, outdated):
+        """Mark OutdatedPackage results from the outdated scanner."""
+        for package in outdated:
+            self._latest[normalize_name(package.name)] = package.latest
+        if self._outdated_only:
+            self._show()
+        elif self._loaded:
+            self.dataChanged.emit(self.index(0), self.index(self._loaded - 1))
+
+    def clear_outdated(self):
+        self._latest = {}
+        self._show()
+
+    def outdated_packages(self):
+        """The installed packages marked outdated, as {"name", "version", "latest"} dicts."""
+        return [
+            {**package, "latest": self._latest[normalize_name(package["name"])]}
+            for package in self._all_packages if normalize_name(package["name"]) in self._latest
+        ]
+
+    def set_shared(self, shared):
+        """Take {normalized name: count} from disk_report.shared_counts()."""
+        self._shared = dict(shared)
+        if self._loaded:
+            self.dataChanged.emit(self.index(0), self.index(self._loaded - 1))
+
+    def set_outdated_only(self, outdated_only):
+        self._outdated_only = outdated_only
+        self._show()
+
+    def _show(self):
+        self.beginResetModel()
+        if self._outdated_only:
+            self._packages = [p for p in self._all_packages if normalize_name(p["name"]) in self._latest]
+        else:
+            self._packages = self._all_packages
+        self._loaded = min(len(self._packages), self.batch_size)
+        self.endResetModel()
+
+
+def has_details(library):
+    # Name-only rows are filled in with the full dict from PyPISearchThread.process_package_data
+    return "versions" in library
+
+
+class PackageCardDelegate(QStyledItemDelegate):
+    """Paints PackageListModel rows to look like PackageCard, without any widgets per row."""
+    package_clicked = pyqtSignal(object)
+    install_clicked = pyqtSignal(object)
+
+    ROW_HEIGHT = 100
+    SPACING = 12
+    ICON_SIZE = 40
+    PADDING = 16
+    BUTTON_WIDTH = 70
+    BUTTON_HEIGHT = 28
+    CHECK_SIZE = 18
+
+    def __init__(self, parent=None, install_set=None):
+        super().__init__(parent)
+        self.install_set = install_set
+        self.name_font = QFont("Arial", 15, QFont.Bold)
+        self.small_font = QFont("Arial", 10)
+        self.description_font = QFont("Arial", 10)
+        self.description_font.setPixelSize(13)
+        self.small_font.setPixelSize(12)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT + self.SPACING)
+
+    def card_rect(self, option):
+        return option.rect.adjusted(0, 0, 0, -self.SPACING)
+
+    def install_button_rect(self, option):
+        card = self.card_rect(option)
+        return QRect(
+            card.right() - self.PADDING - self.BUTTON_WIDTH,
+            card.center().y() - self.BUTTON_HEIGHT // 2,
+            self.BUTTON_WIDTH,
+            self.BUTTON_HEIGHT
+        )
+
+    def select_rect(self, option):
+        """Checkbox for the install set, left of the version box."""
+        button = self.install_button_rect(option)
+        return QRect(
+            button.left() - 20 - self.BUTTON_WIDTH - self.CHECK_SIZE,
+            button.center().y() - self.CHECK_SIZE // 2,
+            self.CHECK_SIZE,
+            self.CHECK_SIZE
+        )
+
+    def paint(self, painter, option, index):
+        library = index.data(LibraryRole)
+        if library is None:
+            return
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        card = self.card_rect(option)
+        hovered = bool(option.state & QStyle.State_MouseOver)
+
+        # Card background
+        path = QPainterPath()
+        path.addRoundedRect(QRectF(card), 10, 10)
+        painter.fillPath(path, QColor("#353535" if hovered else "#2e2e2e"))
+
+        # Icon (file or generated letter avatar, cached by the icon service)
+        icon_rect = QRect(card.left() + self.PADDING, card.top() + self.PADDING, self.ICON_SIZE, self.ICON_SIZE)
+        pixmap = shared_icons().package_icon(library, self.ICON_SIZE, painter.device().devicePixelRatioF())
+        painter.drawPixmap(icon_rect, pixmap)
+
+        # Install button and version on the right
+        button = self.install_button_rect(option)
+        button_path = QPainterPath()
+        button_path.addRoundedRect(QRectF(button), 4, 4)
+        painter.fillPath(button_path, QColor("#0078d7"))
+        painter.setPen(Qt.white)
+        painter.setFont(self.description_font)
+        painter.drawText(button, Qt.AlignCenter, "Install")
+
+        versions = library.get("versions") or []
+        version_rect = QRect(button.left() - 10 - self.BUTTON_WIDTH, button.top(), self.BUTTON_WIDTH, self.BUTTON_HEIGHT)
+        if versions:
+            version_path = QPainterPath()
+            version_path.addRoundedRect(QRectF(version_rect), 4, 4)
+            painter.fillPath(version_path, QColor("#333"))
+            painter.setPen(QColor("#444"))
+            painter.drawPath(version_path)
+            painter.setPen(Qt.white)
+            painter.drawText(version_rect, Qt.AlignCenter, versions[0])
+
+        text_right = version_rect.left() - 12
+        if self.install_set is not None and has_details(library):
+            check = self.select_rect(option)
+            check_path = QPainterPath()
+            check_path.addRoundedRect(QRectF(check), 3, 3)
+            if library["name"] in self.install_set:
+                painter.fillPath(check_path, QColor("#0078d7"))
+                painter.setPen(Qt.white)
+                painter.drawText(check, Qt.AlignCenter, "\u2713")
+            else:
+                painter.fillPath(check_path, QColor("#333"))
+                painter.setPen(QColor("#666"))
+                painter.drawPath(check_path)
+            text_right = check.left() - 12
+
+        # Name, date and description
+        text_left = icon_rect.right() + 12
+        name_metrics = QFontMetrics(self.name_font)
+        name_rect = QRect(text_left, card.top() + self.PADDING - 4, text_right - text_left, name_metrics.height())
+        name = name_metrics.elidedText(library["name"], Qt.ElideRight, name_rect.width())
+        painter.setFont(self.name_font)
+        painter.drawText(name_rect, Qt.AlignLeft | Qt.AlignVCenter, name)
+
+        upload_date = library.get("upload_date", "Unknown")
+        if upload_date != "Unknown":
+            date_left = text_left + name_metrics.horizontalAdvance(name) + 10
+            date_rect = QRect(date_left, name_rect.top(), max(0, text_right - date_left), name_rect.height())
+            painter.setFont(self.small_font)
+            painter.setPen(QColor("#888888"))
+            painter.drawText(date_rect, Qt.AlignLeft | Qt.AlignVCenter, f"Updated: {upload_date}")
+
+        if has_details(library):
+            description = library.get("description") or "No description available"
+        elif library.get("unavailable"):
+            description = "Package details could not be loaded"
+        else:
+            description = "Loading package details..."
+        description_rect = QRect(text_left, name_rect.bottom() + 6, text_right - text_left, card.bottom() - name_rect.bottom() - 6 - self.PADDING)
+        painter.setFont(self.description_font)
+        painter.setPen(QColor("#aaaaaa"))
+        painter.drawText(description_rect, Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap, description)
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        # Clicks on the painted Install button install, the checkbox adds to the
+        # install set and clicks elsewhere open the details
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            library = index.data(LibraryRole)
+            if library is not None and has_details(library):
+                if self.install_button_rect(option).contains(event.pos()):
+                    self.install_clicked.emit(library)
+                elif self.install_set is not None and self.select_rect(option).contains(event.pos()):
+                    self.install_set.toggle(library)
+                elif self.card_rect(option).contains(event.pos()):
+                    self.package_clicked.emit(library)
+            return True
+        return super().editorEvent(event, model, option, index)
@@ -0,0 +1,189 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+PYPI_JSON_URL = "https://pypi.org/pypi"
+DEFAULT_TIMEOUT = 10       # Seconds allowed for each request
+DEFAULT_MAX_WORKERS = 10   # Maximum number of requests in flight at once
+CANCEL_POLL_INTERVAL = 0.1 # How often get_packages checks for cancellation
+MAX_RETRY_AFTER = 10       # Longest wait honoured from a 429 Retry-After header
+
+# Background revalidation of stale cache entries is shared by all clients
+_revalidation_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="pypi-revalidate")
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+
+
+class RateLimiter:
+    """Token bucket shared by the threads of a client: at most ``rate`` requests per second.
+
+    Up to ``burst`` requests may start at once before the rate applies.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+class PyPIClient:
+    """Small client for the PyPI JSON API that can fetch several packages at once.
+
+    If a MetadataCache is given, documents are served from it while fresh.
+    Stale documents are returned immediately and revalidated in the
+    background with a conditional request. With ``rate_limit`` (requests
+    per second) network requests are spaced out, which bulk lookups use
+    to stay polite; cache hits are never delayed.
+    """
+
+    def __init__(self, base_url=PYPI_JSON_URL, timeout=DEFAULT_TIMEOUT, max_workers=DEFAULT_MAX_WORKERS, cache=None,
+                 rate_limit=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_workers = max(1, max_workers)
+        self.cache = cache
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+
+    def package_url(self, name):
+        return f"{self.base_url}/{name}/json"
+
+    def release_url(self, name, version):
+        return f"{self.base_url}/{name}/{version}/json"
+
+    def get_package(self, name):
+        """Fetch the JSON document for a single package.
+
+        Raises urllib.error.HTTPError (e.g. 404 for unknown packages) and
+        other network errors to the caller.
+        """
+        if self.cache is None:
+            return json.loads(self._download(name, None))
+
+        entry = self.cache.get(name)
+        if entry is not None:
+            if self.cache.is_fresh(entry):
+                return json.loads(entry.body)
+            if self.cache.is_usable_stale(entry):
+                self._revalidate_in_background(name, entry)
+                return json.loads(entry.body)
+
+        return json.loads(self._download(name, entry))
+
+    def get_release(self, name, version):
+        """Fetch the JSON document for one version of a package.
+
+        Release documents don't change once published, so they bypass the
+        MetadataCache; callers that need them often keep their own copy
+        (see ReleaseStore).
+        """
+        request = urllib.request.Request(self.release_url(name, version))
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def get_packages(self, names, deadline=None, on_result=None, is_cancelled=None):
+        """Fetch several packages concurrently and return the ones that loaded.
+
+        Results come back in the same order as ``names``. Packages that fail
+        or time out are skipped, and if ``deadline`` (seconds) passes before
+        everything has finished, whatever has arrived so far is returned.
+        ``on_result(name, data)`` is called in the calling thread as each
+        package arrives. If ``is_cancelled()`` returns True, outstanding
+        requests are abandoned and the results so far are returned.
+        """
+        names = list(names)
+        if not names:
+            return []
+
+        loaded = {}
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(names)))
+        try:
+            futures = {executor.submit(self.get_package, name): name for name in names}
+            pending = set(futures)
+            give_up_at = time.monotonic() + deadline if deadline is not None else None
+            while pending:
+                if is_cancelled is not None and is_cancelled():
+                    break
+                if give_up_at is not None and time.monotonic() >= give_up_at:
+                    break  # Return the partial results we have
+                # Wake up regularly so cancellation is noticed while requests hang
+                done, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = futures[future]
+                    try:
+                        loaded[name] = future.result()
+                    except Exception:
+                        continue  # Skip any packages that fail to load
+                    if on_result is not None:
+                        on_result(name, loaded[name])
+        finally:
+            # Don't let a straggler hold up the results that already arrived
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return [loaded[name] for name in names if name in loaded]
+
+    def _download(self, name, entry):
+        """Download a document, revalidating ``entry`` if one is given, and return the raw body."""
+        request = urllib.request.Request(self.package_url(name))
+        if entry is not None:
+            if entry.etag:
+                request.add_header("If-None-Match", entry.etag)
+            if entry.last_modified:
+                request.add_header("If-Modified-Since", entry.last_modified)
+
+        for attempt in range(2):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    body = response.read()
+                    if self.cache is not None:
+                        self.cache.put(name, body, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                    return body
+            except urllib.error.HTTPError as e:
+                if e.code == 304 and entry is not None:
+                    # Not modified: our copy is still good
+                    self.cache.touch(name)
+                    return entry.body
+                if e.code == 429 and attempt == 0:
+                    # Too many requests: wait as asked (within reason) and try once more
+                    try:
+                        delay = float(e.headers.get("Retry-After") or 1)
+                    except ValueError:
+                        delay = 1
+                    time.sleep(min(delay, MAX_RETRY_AFTER))
+                    continue
+                raise
+
+    def _revalidate_in_background(self, name, entry):
+        with _revalidating_lock:
+            if name in _revalidating:
+                return
+            _revalidating.add(name)
+
+        def revalidate():
+            try:
+                self._download(name, entry)
+            except Exception:
+                pass  # Keep serving the stale copy; we'll try again next time
+            finally:
+                with _revalidating_lock:
+                    _revalidating.discard(name)
+
+        _revalidation_pool.submit(revalidate)
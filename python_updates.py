@@ -0,0 +1,244 @@
+import json
+import os
+import platform
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import namedtuple
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from app_paths import data_dir
+from downloader import USER_AGENT
+from version_key import version_greater, version_key
+
+RELEASES_URL = "https://www.python.org/api/v2/downloads/release/?is_published=true&pre_release=false"
+RELEASE_FILES_URL = "https://www.python.org/api/v2/downloads/release_file/?release={release_id}"
+DEFAULT_TIMEOUT = 20
+
+# Ask python.org again when the cached release list is older than this
+DEFAULT_MAX_AGE = 12 * 60 * 60
+# How often the app looks for updates while it is open (the check is free while the cache is fresh)
+CHECK_INTERVAL = 60 * 60
+
+RELEASE_NAME = re.compile(r"^Python (\d+\.\d+\.\d+)$")
+RELEASE_ID = re.compile(r"/release/(\d+)/?$")
+
+# One final CPython release from python.org. ``date`` is YYYY-MM-DD.
+Release = namedtuple("Release", "version date release_id notes_url")
+
+
+def parse_release_feed(releases):
+    """Final releases (newest first) from the JSON list the python.org downloads API returns."""
+    parsed = []
+    for release in releases:
+        name = RELEASE_NAME.match((release.get("name") or "").strip())
+        release_id = RELEASE_ID.search(release.get("resource_uri") or "")
+        if not name or not release_id or release.get("pre_release") or not release.get("is_published", True):
+            continue
+        parsed.append(Release(
+            name.group(1), (release.get("release_date") or "")[:10], int(release_id.group(1)),
+            release.get("release_notes_url") or ""
+        ))
+    parsed.sort(key=lambda release: version_key(release.version), reverse=True)
+    return parsed
+
+
+def series(version):
+    """(major, minor) of a version like "3.12.4"; None if it doesn't have both."""
+    parts = version.split(".")
+    try:
+        return int(parts[0]), int(parts[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def find_update(releases, version):
+    """The newest release of ``version``'s series that is newer than it, or None.
+
+    Series are compared as numbers, so 3.1 is not mistaken for 3.12.
+    """
+    wanted = series(version)
+    if wanted is None:
+        return None
+    for release in releases:
+        if series(release.version) == wanted:
+            return release if version_greater(release.version, version) else None
+    return None
+
+
+def describe_update(release):
+    """The text the My Python page shows for an available update."""
+    released = f"on {release.date}" if release.date else "recently"
+    notes = release.notes_url or f"https://docs.python.org/release/{release.version}/"
+    return (
+        f"Python {release.version} was released {released} with bug and security fixes for your version.\n\n"
+        f"Changes: {notes}\n"
+        f"Download: https://www.python.org/downloads/release/python-{release.version.replace('.', '')}/"
+    )
+
+
+def installer_file_name(version, system=None, machine=None):
+    """Usual file name of the python.org installer for this platform, or None where there isn't one."""
+    system = system or platform.system()
+    machine = (machine or platform.machine()).lower()
+    if system == "Windows":
+        if machine in ("arm64", "aarch64"):
+            return f"python-{version}-arm64.exe"
+        return f"python-{version}-amd64.exe" if machine in ("amd64", "x86_64") else f"python-{version}.exe"
+    if system == "Darwin":
+        return f"python-{version}-macos11.pkg"
+    return None
+
+
+def is_installer(file_name, version, system=None, machine=None):
+    """True if a release file is the installer for this platform."""
+    if (system or platform.system()) == "Darwin":
+        # The macOS package name follows the oldest supported macOS (macosx10.9, macos11, ...)
+        return file_name.startswith(f"python-{version}-macos") and file_name.endswith(".pkg")
+    return file_name == installer_file_name(version, system, machine)
+
+
+def fetch_json(url, headers=None, timeout=DEFAULT_TIMEOUT):
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT, "Accept": "application/json", **(headers or {})})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8")), response.headers
+
+
+class ReleaseFeed:
+    """python.org's list of Python releases, parsed once and cached on disk.
+
+    Only the version, date, id and release notes link of final releases
+    are kept. While the cache is younger than ``max_age`` no request is
+    made; after that it is revalidated with a conditional request, and if
+    python.org can't be reached the stale list is used.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(data_dir(), "python_releases.json")
+        self._releases = None
+        self._fetched_at = 0
+        self._etag = None
+        self._last_modified = None
+        self._lock = threading.Lock()
+        self.last_fetch_seconds = None  # How long the last request took, None when the cache was used
+
+    def is_stale(self, max_age=DEFAULT_MAX_AGE):
+        return time.time() - self._fetched_at > max_age
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self._releases = [Release(*release) for release in data["releases"]]
+            self._fetched_at = data.get("fetched_at", 0)
+            self._etag = data.get("etag")
+            self._last_modified = data.get("last_modified")
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def save(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "releases": [list(release) for release in self._releases], "fetched_at": self._fetched_at,
+                "etag": self._etag, "last_modified": self._last_modified,
+            }, f)
+        os.replace(temp_path, self.path)
+
+    def releases(self, max_age=DEFAULT_MAX_AGE, url=RELEASES_URL):
+        """The cached release list, refreshed first when it is older than ``max_age``."""
+        with self._lock:
+            self.last_fetch_seconds = None
+            if self._releases is None:
+                self.load()
+            if self._releases is not None and not self.is_stale(max_age):
+                return self._releases
+
+            headers = {}
+            if self._releases is not None:
+                if self._etag:
+                    headers["If-None-Match"] = self._etag
+                if self._last_modified:
+                    headers["If-Modified-Since"] = self._last_modified
+            started = time.perf_counter()
+            try:
+                data, response_headers = fetch_json(url, headers)
+                self._releases = parse_release_feed(data)
+                self._etag = response_headers.get("ETag")
+                self._last_modified = response_headers.get("Last-Modified")
+            except urllib.error.HTTPError as e:
+                if e.code != 304 or self._releases is None:
+                    return self._stale_or_raise(e)
+            except (urllib.error.URLError, OSError, ValueError) as e:
+                return self._stale_or_raise(e)
+            self.last_fetch_seconds = time.perf_counter() - started
+            self._fetched_at = time.time()
+            self.save()
+            return self._releases
+
+    def installer(self, release, system=None, machine=None):
+        """(url, sha256 or None) of the installer for this platform, or None where there isn't one."""
+        file_name = installer_file_name(release.version, system, machine)
+        if file_name is None:
+            return None
+        try:
+            files, _ = fetch_json(RELEASE_FILES_URL.format(release_id=release.release_id))
+        except (urllib.error.URLError, OSError, ValueError):
+            files = []
+        for entry in files:
+            url = entry.get("url") or ""
+            if is_installer(url.rsplit("/", 1)[-1], release.version, system, machine):
+                return url, entry.get("sha256_sum") or None
+        if files:
+            return None  # Not built for this platform (e.g. no installer for an old security release)
+        return f"https://www.python.org/ftp/python/{release.version}/{file_name}", None
+
+    def _stale_or_raise(self, error):
+        # Callers hold the lock
+        if self._releases is None:
+            raise error
+        print(f"Using cached Python releases, python.org not reachable: {error}")
+        return self._releases
+
+
+_shared_feed = None
+_shared_feed_lock = threading.Lock()
+
+
+def shared_release_feed():
+    """Return the process-wide ReleaseFeed, creating it on first use."""
+    global _shared_feed
+    with _shared_feed_lock:
+        if _shared_feed is None:
+            _shared_feed = ReleaseFeed()
+        return _shared_feed
+
+
+class PythonUpdateCheckThread(QThread):
+    """Looks up updates for a set of interpreters against the cached release feed.
+
+    ``versions`` maps interpreter paths to their versions; update_checked
+    is emitted for each path with its Release, or None when it is current.
+    """
+    update_checked = pyqtSignal(str, object)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, versions, feed=None):
+        super().__init__()
+        self.versions = dict(versions)
+        self.feed = feed or shared_release_feed()
+
+    def run(self):
+        try:
+            releases = self.feed.releases()
+        except Exception as e:
+            self.error_occurred.emit(f"Error: {str(e)}")
+            return
+        if self.feed.last_fetch_seconds is not None:
+            print(f"Fetched {len(releases)} Python releases in {self.feed.last_fetch_seconds:.2f}s")
+        for path, version in self.versions.items():
+            self.update_checked.emit(path, find_update(releases, version))
@@ -0,0 +1,110 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from app_paths import data_dir
+from metadata_cache import normalize_name, DEFAULT_TTL
+
+
+class ReleaseStore:
+    """Local store of the metadata the resolver needs, kept between runs.
+
+    Per-release metadata (requires_dist and requires_python of one version)
+    never changes once published, so it is kept forever. The list of
+    versions of a project does change and is refreshed after ``ttl``
+    seconds. Everything read is also memoized in memory, so repeated
+    resolutions in one session don't touch SQLite at all.
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL):
+        self.path = path or os.path.join(data_dir("cache"), "releases.sqlite3")
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._releases = {}  # (name, version) -> release dict
+        self._projects = {}  # name -> (fetched_at, versions)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS releases (
+                name TEXT NOT NULL,
+                version TEXT NOT NULL,
+                requires_dist TEXT NOT NULL,
+                requires_python TEXT,
+                PRIMARY KEY (name, version)
+            );
+            CREATE TABLE IF NOT EXISTS projects (
+                name TEXT PRIMARY KEY,
+                versions TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+        """)
+        self._db.commit()
+
+    def get_release(self, name, version):
+        """Return {"requires_dist": [...], "requires_python": str or None}, or None if unknown."""
+        key = (normalize_name(name), version)
+        with self._lock:
+            release = self._releases.get(key)
+            if release is None:
+                row = self._db.execute(
+                    "SELECT requires_dist, requires_python FROM releases WHERE name = ? AND version = ?", key
+                ).fetchone()
+                if row is None:
+                    return None
+                release = self._releases[key] = {"requires_dist": json.loads(row[0]), "requires_python": row[1]}
+            return release
+
+    def put_release(self, name, version, requires_dist, requires_python=None):
+        key = (normalize_name(name), version)
+        release = {"requires_dist": list(requires_dist or []), "requires_python": requires_python}
+        with self._lock:
+            self._releases[key] = release
+            self._db.execute(
+                "INSERT OR REPLACE INTO releases VALUES (?, ?, ?, ?)",
+                key + (json.dumps(release["requires_dist"]), requires_python),
+            )
+            self._db.commit()
+        return release
+
+    def get_versions(self, name):
+        """Return the cached [[version, requires_python, yanked], ...] list, or None if missing or stale."""
+        key = normalize_name(name)
+        with self._lock:
+            project = self._projects.get(key)
+            if project is None:
+                row = self._db.execute("SELECT fetched_at, versions FROM projects WHERE name = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                project = self._projects[key] = (row[0], json.loads(row[1]))
+        fetched_at, versions = project
+        return versions if time.time() - fetched_at < self.ttl else None
+
+    def put_versions(self, name, versions):
+        key = normalize_name(name)
+        now = time.time()
+        with self._lock:
+            self._projects[key] = (now, versions)
+            self._db.execute("INSERT OR REPLACE INTO projects VALUES (?, ?, ?)", (key, json.dumps(versions), now))
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._releases = {}
+            self._projects = {}
+            self._db.execute("DELETE FROM releases")
+            self._db.execute("DELETE FROM projects")
+            self._db.commit()
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def shared_release_store():
+    """Return the process-wide ReleaseStore, creating it on first use."""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = ReleaseStore()
+        return _shared_store
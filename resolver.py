@@ -0,0 +1,326 @@
+import threading
+from collections import namedtuple
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from packaging.markers import default_environment
+    from packaging.requirements import Requirement, InvalidRequirement
+    from packaging.specifiers import SpecifierSet, InvalidSpecifier
+    from packaging.utils import canonicalize_name
+    from packaging.version import Version, InvalidVersion
+except ImportError:
+    # pip always ships a copy of packaging
+    from pip._vendor.packaging.markers import default_environment
+    from pip._vendor.packaging.requirements import Requirement, InvalidRequirement
+    from pip._vendor.packaging.specifiers import SpecifierSet, InvalidSpecifier
+    from pip._vendor.packaging.utils import canonicalize_name
+    from pip._vendor.packaging.version import Version, InvalidVersion
+
+from pypi_client import PyPIClient
+from metadata_cache import shared_cache
+from release_store import shared_release_store
+
+DEFAULT_MAX_ROUNDS = 2000  # Candidate versions tried before giving up on a resolution
+DEFAULT_PREFETCH_WORKERS = 8
+
+# One package in a resolution; ``required_by`` holds the names that depend on it
+Pin = namedtuple("Pin", "name version extras dependencies required_by installed")
+
+
+@lru_cache(maxsize=None)
+def parse_requirement(text):
+    """Parse a requirement string once per process; None if it is invalid."""
+    try:
+        return Requirement(text)
+    except InvalidRequirement:
+        return None
+
+
+@lru_cache(maxsize=None)
+def project_name(name):
+    return canonicalize_name(name)
+
+
+@lru_cache(maxsize=None)
+def python_allowed(requires_python, python_version):
+    """True if ``python_version`` (a Version) satisfies a requires_python string."""
+    if not requires_python:
+        return True
+    try:
+        return SpecifierSet(requires_python).contains(python_version, prereleases=True)
+    except InvalidSpecifier:
+        return True
+
+
+def normalize_version(version):
+    try:
+        return str(Version(version))
+    except InvalidVersion:
+        return version
+
+
+class ResolutionError(Exception):
+    """The requirements can't be satisfied together (or resolving took too many rounds)."""
+
+
+class Resolution:
+    """The result of Resolver.resolve(): one Pin per package, dependencies after their parents."""
+
+    def __init__(self, requirements, pins, requested):
+        self.requirements = list(requirements)
+        self.pins = pins
+        self.requested = requested  # Normalized names of the packages asked for
+
+    def __iter__(self):
+        return iter(self.pins)
+
+    def __len__(self):
+        return len(self.pins)
+
+    def changes(self):
+        """Pins that aren't already installed at the chosen version."""
+        return [pin for pin in self.pins if not pin.installed]
+
+
+class Resolver:
+    """In-process dependency resolver over the requires_dist metadata on PyPI.
+
+    Picks the newest version of every package that satisfies all the
+    requirements on it, backtracking to older versions on conflicts.
+    Environment markers and requires_python are evaluated for
+    ``environment`` (default: this interpreter); wheel platform tags are
+    not checked, so the result is a preview of what pip would pick.
+    Already ``installed`` versions ({normalized name: version}) are
+    preferred when they fit, like pip's default upgrade strategy.
+
+    Metadata comes from ``store`` (a ReleaseStore) and is only fetched with
+    ``client`` when missing, so once a dependency graph has been seen,
+    resolving it again doesn't touch the network.
+    """
+
+    def __init__(self, client=None, store=None, environment=None, installed=None,
+                 max_rounds=DEFAULT_MAX_ROUNDS, prefetch_workers=DEFAULT_PREFETCH_WORKERS):
+        self.client = client or PyPIClient(cache=shared_cache())
+        self.store = store or shared_release_store()
+        self.environment = dict(environment or default_environment())
+        self.installed = {canonicalize_name(name): normalize_version(version) for name, version in (installed or {}).items()}
+        self.max_rounds = max_rounds
+        self.prefetch_workers = prefetch_workers
+        self.python_version = Version(self.environment["python_full_version"])
+        self._candidates = {}
+        self._release_keys = {}  # name -> {Version: the version string PyPI published it as}
+        self._prefetched = set()
+        self._lock = threading.Lock()
+        self._rounds = 0
+        self._conflict = None
+        self._executor = None
+
+    def resolve(self, requirements):
+        """Resolve requirement strings and return a Resolution, or raise ResolutionError."""
+        pending = []
+        for text in requirements:
+            requirement = parse_requirement(text)
+            if requirement is None:
+                raise ResolutionError(f"Invalid requirement: {text}")
+            if requirement.marker is None or requirement.marker.evaluate(self._marker_environment("")):
+                pending.append((project_name(requirement.name), requirement, None))
+
+        self._rounds = 0
+        self._conflict = None
+        with ThreadPoolExecutor(max_workers=self.prefetch_workers, thread_name_prefix="resolver") as executor:
+            self._executor = executor
+            pins = self._search(tuple(pending), {})
+        self._executor = None
+
+        if pins is None:
+            raise ResolutionError(self._conflict or "The requirements can't be satisfied together")
+        requested = {name for name, _, _ in pending}
+        return Resolution(requirements, self._ordered(pins, requested), requested)
+
+    def _search(self, pending, pins):
+        """Depth-first search: pin the next unpinned requirement, backtrack when stuck."""
+        # Skip over requirements on packages that are already pinned
+        while pending:
+            (name, requirement, parent), pending = pending[0], pending[1:]
+            pin = pins.get(name)
+            if pin is None:
+                break
+
+            if not requirement.specifier.contains(pin.version, prereleases=True):
+                self._conflict = (
+                    f"{parent or 'You'} requires {requirement}, but {pin.name} {pin.version} was picked"
+                    f"{' for ' + ', '.join(pin.required_by) if pin.required_by else ''}"
+                )
+                return None
+
+            # Already pinned and compatible: just record the edge and any new extras
+            new_extras = set(requirement.extras) - pin.extras
+            pins = dict(pins)
+            pins[name] = pin._replace(
+                extras=pin.extras | new_extras,
+                required_by=pin.required_by + ((parent,) if parent else ()),
+            )
+            if new_extras:
+                release = self._release(name, pin.version)
+                known = {str(dependency) for dependency in self._dependencies(release, pin.extras)}
+                added = [d for d in self._dependencies(release, pin.extras | new_extras) if str(d) not in known]
+                pins[name] = pins[name]._replace(
+                    dependencies=pin.dependencies + tuple(project_name(d.name) for d in added)
+                )
+                pending += self._pending(added, name)
+        else:
+            return pins  # Nothing left to pin: this is a solution
+
+        # Everything asked of this package so far narrows down its candidates
+        specifier = SpecifierSet(str(requirement.specifier))
+        extras = set(requirement.extras)
+        for other_name, other, _ in pending:
+            if other_name == name:
+                specifier &= other.specifier
+
+        self._prefetch({other_name for other_name, _, _ in pending if other_name not in pins})
+        for version in self._matching_versions(name, specifier):
+            self._rounds += 1
+            if self._rounds > self.max_rounds:
+                raise ResolutionError(f"Gave up after trying {self.max_rounds} versions ({self._conflict})")
+
+            release = self._release(name, version)
+            if release is None:
+                continue
+            dependencies = self._dependencies(release, extras)
+            new_pins = dict(pins)
+            new_pins[name] = Pin(
+                name=name,
+                version=version,
+                extras=frozenset(extras),
+                dependencies=tuple(project_name(dependency.name) for dependency in dependencies),
+                required_by=(parent,) if parent else (),
+                installed=self.installed.get(name) == str(version),
+            )
+            result = self._search(pending + self._pending(dependencies, name), new_pins)
+            if result is not None:
+                return result
+
+        if self._conflict is None:
+            self._conflict = f"No version of {requirement.name} matches {specifier or 'any version'}"
+        return None
+
+    def _pending(self, dependencies, parent):
+        return tuple((project_name(dependency.name), dependency, parent) for dependency in dependencies)
+
+    def _ordered(self, pins, requested):
+        # Breadth-first from the requested packages, so parents come before their dependencies
+        ordered, seen = [], set()
+        queue = sorted(requested)
+        while queue:
+            name = queue.pop(0)
+            if name in seen:
+                continue
+            seen.add(name)
+            ordered.append(pins[name])
+            queue.extend(sorted(pins[name].dependencies))
+        ordered.extend(pin for name, pin in sorted(pins.items()) if name not in seen)
+        return ordered
+
+    def _matching_versions(self, name, specifier):
+        """Versions allowed by ``specifier``, newest first, with the installed one (if allowed) first."""
+        candidates = [
+            version for version, requires_python, yanked, _ in self._project_versions(name)
+            if not yanked and python_allowed(requires_python, self.python_version)
+        ]
+        allowed = list(specifier.filter(candidates))
+        installed = self.installed.get(name)
+        if installed is not None:
+            for i, version in enumerate(allowed):
+                if str(version) == installed:
+                    allowed.insert(0, allowed.pop(i))
+                    break
+        return allowed
+
+    def _project_versions(self, name):
+        """[(Version, requires_python, yanked, release key)] for a project, newest first.
+
+        The release key is the version as PyPI lists it (e.g. "1.0-beta"),
+        which is what its JSON API and the release store are keyed by.
+        """
+        with self._lock:
+            candidates = self._candidates.get(name)
+        if candidates is not None:
+            return candidates
+
+        versions = self.store.get_versions(name)
+        if versions is None:
+            versions = self._fetch_versions(name)
+
+        candidates = []
+        for version, requires_python, yanked in versions:
+            try:
+                candidates.append((Version(version), requires_python, yanked, version))
+            except InvalidVersion:
+                continue
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        with self._lock:
+            self._candidates[name] = candidates
+            self._release_keys[name] = {candidate[0]: candidate[3] for candidate in candidates}
+        return candidates
+
+    def _fetch_versions(self, name):
+        try:
+            document = self.client.get_package(name)
+        except Exception:
+            return []  # Unknown package: no candidates, so the resolution backtracks
+        versions = []
+        for version, files in document.get("releases", {}).items():
+            if not files:
+                continue  # A release without files can't be installed
+            yanked = all(f.get("yanked", False) for f in files)
+            versions.append([version, files[0].get("requires_python"), yanked])
+        self.store.put_versions(name, versions)
+        return versions
+
+    def _release(self, name, version):
+        self._project_versions(name)
+        with self._lock:
+            key = self._release_keys.get(name, {}).get(version, str(version))
+        release = self.store.get_release(name, key)
+        if release is None:
+            try:
+                info = self.client.get_release(name, key).get("info", {})
+            except Exception:
+                return None
+            release = self.store.put_release(name, key, info.get("requires_dist"), info.get("requires_python"))
+        return release
+
+    def _prefetch(self, names):
+        """Load metadata for the next packages in parallel instead of one round trip at a time."""
+        if self._executor is None:
+            return
+        with self._lock:
+            names = [name for name in names if name not in self._candidates and name not in self._prefetched]
+            self._prefetched.update(names)
+        for name in names:
+            self._executor.submit(self._prefetch_one, name)
+
+    def _prefetch_one(self, name):
+        # The newest version is usually the one picked, so fetch its release too
+        candidates = self._project_versions(name)
+        for version, requires_python, yanked, _ in candidates:
+            if not yanked and not version.is_prerelease and python_allowed(requires_python, self.python_version):
+                self._release(name, version)
+                break
+
+    def _dependencies(self, release, extras):
+        """Requirements of a release that apply to this environment with ``extras`` enabled."""
+        dependencies = []
+        environments = [self._marker_environment(extra) for extra in [""] + sorted(extras)]
+        for text in release["requires_dist"]:
+            requirement = parse_requirement(text)
+            if requirement is None:
+                continue
+            if requirement.marker is None or any(requirement.marker.evaluate(env) for env in environments):
+                dependencies.append(requirement)
+        return dependencies
+
+    def _marker_environment(self, extra):
+        return {**self.environment, "extra": extra}
@@ -1,32 +1,75 @@
-import urllib.request
-import json
+import urllib.error
 import random
 from datetime import datetime, timedelta
 from PyQt5.QtCore import QThread, pyqtSignal
 
+from pypi_client import PyPIClient, DEFAULT_TIMEOUT, DEFAULT_MAX_WORKERS
+from metadata_cache import shared_cache, normalize_name
+from package_index import shared_index
+from version_key import sort_versions
+
+# Give up on stragglers after this many seconds and show what has loaded
+DEFAULT_DEADLINE = 20
+
+# Ranked names taken from the package index per search, and how many of
+# them are fetched up front; the rest are loaded as the list scrolls
+SEARCH_RESULT_LIMIT = 500
+SEARCH_PAGE_SIZE = 10
+
+def recent_sort_key(library):
+    # Sort key for the recent list (used with reverse=True, newest first)
+    return library["upload_date"] if library["upload_date"] != "Unknown" else "9999-99-99"
+
+
 class PyPISearchThread(QThread):
+    # Emitted once with the full list when the run is complete
     result_ready = pyqtSignal(list)
+    # Incremental mode only: (position in the final ordering, library) as each package arrives
+    package_ready = pyqtSignal(int, dict)
+    # Incremental search with the package index: every ranked name, before any details load
+    names_ready = pyqtSignal(list)
     error_occurred = pyqtSignal(str)
     
-    def __init__(self, query, mode="search"):
+    def __init__(self, query, mode="search", max_workers=DEFAULT_MAX_WORKERS,
+                 timeout=DEFAULT_TIMEOUT, deadline=DEFAULT_DEADLINE, use_cache=True,
+                 incremental=False, known=None, package_names=None):
         super().__init__()
         self.query = query
-        self.mode = mode  # "search", "recent", "trending"
+        self.mode = mode  # "search", "recent", "trending", "packages"
+        self.package_names = package_names or []  # Packages to load in "packages" mode
+        self.deadline = deadline
+        self.incremental = incremental
+        # Libraries already loaded by an earlier search, keyed by normalized name;
+        # reused instead of being fetched again
+        self.known = known or {}
+        self.cancelled = False
+        self.client = PyPIClient(
+            timeout=timeout,
+            max_workers=max_workers,
+            cache=shared_cache() if use_cache else None
+        )
         
     def run(self):
         try:
             result = []
             
-            if self.mode == "search" and self.query:
-                # Search for a specific package
-                url = f"https://pypi.org/pypi/{self.query}/json"
+            if self.mode == "search" and self.query and shared_index().is_loaded():
+                # Rank matching names in the local index, then fetch the best ones
+                names = shared_index().search(self.query, limit=SEARCH_RESULT_LIMIT)
+                if self.incremental and not self.cancelled:
+                    self.names_ready.emit(names)
+                self.fetch_packages(names[:SEARCH_PAGE_SIZE], result)
+            
+            elif self.mode == "search" and self.query:
+                # No local index yet: search for a specific package
                 try:
-                    response = urllib.request.urlopen(url)
-                    if response.getcode() == 200:
-                        data = json.loads(response.read().decode())
-                        if "info" in data:
-                            # Single package found
-                            result.append(self.process_package_data(data))
+                    data = self.client.get_package(self.query)
+                    if "info" in data:
+                        # Single package found
+                        library = self.process_package_data(data)
+                        result.append(library)
+                        if self.incremental:
+                            self.package_ready.emit(0, library)
                 except urllib.error.HTTPError as e:
                     if e.code == 404:
                         # Try the search endpoint instead for partial matches
@@ -42,16 +85,27 @@ class PyPISearchThread(QThread):
                 # Fetch trending packages based on downloads
                 self.fetch_trending_packages(result)
                 
-            self.result_ready.emit(result)
+            elif self.mode == "packages":
+                # Load details for specific packages, e.g. rows scrolled into view
+                self.fetch_packages(self.package_names, result)
+                
+            if not self.cancelled:
+                self.result_ready.emit(result)
             
         except Exception as e:
-            self.error_occurred.emit(f"Error: {str(e)}")
+            if not self.cancelled:
+                self.error_occurred.emit(f"Error: {str(e)}")
+    
+    def cancel(self):
+        """Ask the thread to stop early. Nothing is emitted after cancelling."""
+        self.cancelled = True
     
     def process_package_data(self, data):
+        # Only a summary: the long description, full release list and
+        # classifiers are loaded by the DetailLoader when the detail page opens
         info = data["info"]
         releases = data["releases"]
-        versions = list(releases.keys())
-        versions.sort(reverse=True)
+        versions = sort_versions(releases.keys())
         
         # Extract upload date of the latest version if available
         upload_date = "Unknown"
@@ -72,13 +126,48 @@ class PyPISearchThread(QThread):
             "developer": info.get("author", "Unknown"),
             "icon": f"{info['name'].lower()}.png",
             "link": info.get("project_url", f"https://pypi.org/project/{info['name']}/"),
-            "long_desc": info.get("description", "No detailed description available"),
-            "upload_date": upload_date
+            "upload_date": upload_date,
+            "home_page": info.get("home_page") or "",
+            "project_urls": info.get("project_urls") or {}
         }
     
+    def fetch_packages(self, package_names, result_list):
+        # Fetch all packages concurrently; ones that fail or time out are skipped.
+        # In incremental mode each package is emitted as soon as it arrives.
+        positions = {name: i for i, name in enumerate(package_names)}
+        processed = {}
+        
+        def add_library(name, library):
+            processed[name] = library
+            if self.incremental and not self.cancelled:
+                self.package_ready.emit(positions[name], library)
+        
+        def on_package(name, data):
+            try:
+                library = self.process_package_data(data)
+            except Exception:
+                return  # Skip malformed package documents
+            add_library(name, library)
+        
+        # Packages loaded by an earlier search are delivered straight away
+        missing = []
+        for name in package_names:
+            if normalize_name(name) in self.known:
+                add_library(name, self.known[normalize_name(name)])
+            else:
+                missing.append(name)
+        
+        self.client.get_packages(
+            missing,
+            deadline=self.deadline,
+            on_result=on_package,
+            is_cancelled=lambda: self.cancelled
+        )
+        result_list.extend(processed[name] for name in package_names if name in processed)
+    
     def search_multiple_packages(self, query, result_list):
-        # Use search to find multiple packages
-        # For demo purposes, just get some popular packages that match
+        # Fallback used until the local package index has been built:
+        # match against some popular packages
         popular_packages = [
             "numpy", "pandas", "requests", "tensorflow", "pytorch", 
             "django", "flask", "scikit-learn", "matplotlib", "scipy",
@@ -89,15 +178,7 @@ class PyPISearchThread(QThread):
         
         matching_packages = [pkg for pkg in popular_packages if query.lower() in pkg.lower()]
         
-        for package_name in matching_packages[:10]:  # Limit to 10 results
-            try:
-                url = f"https://pypi.org/pypi/{package_name}/json"
-                response = urllib.request.urlopen(url)
-                if response.getcode() == 200:
-                    data = json.loads(response.read().decode())
-                    result_list.append(self.process_package_data(data))
-            except Exception:
-                pass  # Skip any packages that fail to load
+        self.fetch_packages(matching_packages[:10], result_list)  # Limit to 10 results
     
     def fetch_recent_packages(self, result_list):
         # In a real app, you would use a proper API for this
@@ -111,18 +192,10 @@ class PyPISearchThread(QThread):
         
         random.shuffle(packages)  # Randomize for demonstration
         
-        for package_name in packages[:10]:  # Limit to 10
-            try:
-                url = f"https://pypi.org/pypi/{package_name}/json"
-                response = urllib.request.urlopen(url)
-                if response.getcode() == 200:
-                    data = json.loads(response.read().decode())
-                    result_list.append(self.process_package_data(data))
-            except Exception:
-                pass  # Skip any packages that fail to load
+        self.fetch_packages(packages[:10], result_list)  # Limit to 10
         
         # Sort by upload date (newest first)
-        result_list.sort(key=lambda x: x["upload_date"] if x["upload_date"] != "Unknown" else "9999-99-99", reverse=True)
+        result_list.sort(key=recent_sort_key, reverse=True)
     
     def fetch_trending_packages(self, result_list):
         # In a real app, you would use download stats or GitHub stars
@@ -134,12 +207,31 @@ class PyPISearchThread(QThread):
             "pylance", "pyright", "black", "ruff", "mypy"
         ]
         
-        for package_name in trending_packages[:10]:
-            try:
-                url = f"https://pypi.org/pypi/{package_name}/json"
-                response = urllib.request.urlopen(url)
-                if response.getcode() == 200:
-                    data = json.loads(response.read().decode())
-                    result_list.append(self.process_package_data(data))
-            except Exception:
-                pass  # Skip any packages that fail to load
+        self.fetch_packages(trending_packages[:10], result_list)
+
+
+class PackageIndexThread(QThread):
+    """Build the local package index, or bring it up to date, in the background."""
+    index_ready = pyqtSignal(int)
+    error_occurred = pyqtSignal(str)
+    
+    def __init__(self, source=None):
+        super().__init__()
+        self.source = source  # Optional local mirror file to build from
+        
+    def run(self):
+        try:
+            index = shared_index()
+            if self.source:
+                index.build(self.source)
+            elif not index.is_loaded():
+                index.build()
+            elif index.is_stale():
+                try:
+                    index.update()
+                except Exception:
+                    # The changelog is unavailable; rebuild from the simple index
+                    index.build()
+            self.index_ready.emit(len(index))
+        except Exception as e:
+            self.error_occurred.emit(f"Error: {str(e)}")
@@ -92,8 +92,8 @@ def create_library_detail_page(parent):
     """)
     version_section.addWidget(parent.detail_version)
     
-    install_detail_button = QPushButton("Install")
-    install_detail_button.setStyleSheet("""
+    parent.install_detail_button = QPushButton("Install")
+    parent.install_detail_button.setStyleSheet("""
         QPushButton {
             padding: 10px 30px;
             font-size: 15px;
@@ -105,8 +105,13 @@ def create_library_detail_page(parent):
         QPushButton:hover {
             background-color: #005fa3;
         }
+        QPushButton:disabled {
+            background-color: #444;
+            color: #aaa;
+        }
     """)
-    version_section.addWidget(install_detail_button)
+    parent.install_detail_button.clicked.connect(parent.install_detail_library)
+    version_section.addWidget(parent.install_detail_button)
     
     header.addLayout(version_section)
     layout.addLayout(header)
@@ -164,6 +169,14 @@ def create_library_detail_page(parent):
             height: 0px;
         }
     """)
+    # Applies to the HTML rendered from READMEs
+    parent.detail_description.document().setDefaultStyleSheet("""
+        a { color: #4ea3ff; }
+        code { font-family: Consolas, monospace; color: #e6c07b; }
+        pre { font-family: Consolas, monospace; background-color: #1b1b1b; }
+        th { background-color: #333; }
+    """)
+    parent.detail_description.setOpenExternalLinks(True)
     layout.addWidget(parent.detail_description, 1)
     
     return page
@@ -0,0 +1,174 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QProgressBar, QTableWidget, QTableWidgetItem,
+    QHeaderView, QAbstractItemView
+)
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QFont
+
+from disk_report import DiskReportThread
+from downloader import format_size
+from interpreters import describe, short_path
+
+
+class SizeItem(QTableWidgetItem):
+    """Table cell showing a byte count that sorts by the number, not the text."""
+
+    def __init__(self, size):
+        super().__init__(format_size(size))
+        self.size = size
+        self.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+
+    def __lt__(self, other):
+        return self.size < getattr(other, "size", 0)
+
+
+class DiskReportDialog(QDialog):
+    """Disk usage of every known environment and the packages installed in more than one of them."""
+    report_ready = pyqtSignal(object)
+
+    def __init__(self, interpreters, inventories=None, parent=None):
+        super().__init__(parent)
+        self.interpreters = list(interpreters)
+
+        self.setWindowTitle("Disk Usage")
+        self.setMinimumSize(760, 600)
+        self.setStyleSheet("""
+            QDialog {
+                background-color: #1e1e1e;
+            }
+            QLabel {
+                color: white;
+            }
+            QTableWidget {
+                background-color: #252525;
+                border: none;
+                border-radius: 6px;
+                color: #ddd;
+                font-size: 13px;
+                gridline-color: #333;
+            }
+            QHeaderView::section {
+                background-color: #2a2a2a;
+                color: #aaa;
+                border: none;
+                padding: 4px;
+            }
+        """)
+
+        layout = QVBoxLayout(self)
+        title = QLabel(f"Disk usage of {len(self.interpreters)} environments")
+        title.setFont(QFont("Segoe UI", 14, QFont.Bold))
+        layout.addWidget(title)
+
+        self.status_label = QLabel("Measuring environments...")
+        self.status_label.setWordWrap(True)
+        self.status_label.setStyleSheet("color: #aaa;")
+        layout.addWidget(self.status_label)
+
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 0)  # The walk doesn't know how many files there are
+        self.progress.setFixedHeight(6)
+        self.progress.setTextVisible(False)
+        layout.addWidget(self.progress)
+
+        self.environment_table = self.create_table(["Environment", "Packages", "Files", "On disk", "Hard linked"])
+        layout.addWidget(self.environment_table, 1)
+
+        duplicates_title = QLabel("Installed in several environments")
+        duplicates_title.setFont(QFont("Segoe UI", 12, QFont.Bold))
+        layout.addWidget(duplicates_title)
+
+        self.duplicate_table = self.create_table(["Package", "Version", "Environments", "Size", "Reclaimable"])
+        layout.addWidget(self.duplicate_table, 1)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        close_button = QPushButton("Close")
+        close_button.setStyleSheet("""
+            QPushButton {
+                background-color: #333;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                padding: 8px 16px;
+            }
+            QPushButton:hover {
+                background-color: #444;
+            }
+        """)
+        close_button.clicked.connect(self.reject)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        self.report_thread = DiskReportThread(self.interpreters, inventories)
+        self.report_thread.progress.connect(self.show_progress)
+        self.report_thread.report_ready.connect(self.show_report)
+        self.report_thread.error_occurred.connect(self.show_report_error)
+        self.report_thread.start()
+
+    def create_table(self, headers):
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        for column in range(1, len(headers)):
+            table.horizontalHeader().setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        return table
+
+    def show_progress(self, files, size):
+        self.status_label.setText(f"Measuring environments... {files:,} files, {format_size(size)}")
+
+    def show_report(self, report):
+        self.progress.setVisible(False)
+
+        self.environment_table.setRowCount(len(report.environments))
+        for row, usage in enumerate(report.environments):
+            name = QTableWidgetItem(describe(usage.interpreter))
+            name.setToolTip("\n".join(usage.roots) or usage.interpreter.path)
+            self.environment_table.setItem(row, 0, name)
+            packages = QTableWidgetItem()
+            packages.setData(Qt.DisplayRole, usage.packages)
+            self.environment_table.setItem(row, 1, packages)
+            files = QTableWidgetItem()
+            files.setData(Qt.DisplayRole, usage.files)
+            self.environment_table.setItem(row, 2, files)
+            self.environment_table.setItem(row, 3, SizeItem(usage.allocated))
+            self.environment_table.setItem(row, 4, SizeItem(usage.linked))
+        self.environment_table.setSortingEnabled(True)
+
+        self.duplicate_table.setRowCount(len(report.duplicates))
+        for row, duplicate in enumerate(report.duplicates):
+            self.duplicate_table.setItem(row, 0, QTableWidgetItem(duplicate.name))
+            self.duplicate_table.setItem(row, 1, QTableWidgetItem(duplicate.version))
+            environments = QTableWidgetItem()
+            environments.setData(Qt.DisplayRole, len(duplicate.environments))
+            environments.setToolTip("\n".join(short_path(i.prefix) for i in duplicate.environments))
+            self.duplicate_table.setItem(row, 2, environments)
+            self.duplicate_table.setItem(row, 3, SizeItem(duplicate.size))
+            self.duplicate_table.setItem(row, 4, SizeItem(duplicate.reclaimable))
+        self.duplicate_table.setSortingEnabled(True)
+
+        self.status_label.setText(
+            f"{format_size(report.on_disk)} on disk in {len(report.environments)} environments. "
+            f"{len(report.duplicates)} releases are installed more than once; sharing their identical "
+            f"files would free {format_size(report.reclaimable)}."
+        )
+        self.report_ready.emit(report)
+
+    def show_report_error(self, message):
+        self.progress.setVisible(False)
+        self.status_label.setText(f"Could not measure the environments: {message}")
+
+    def done(self, result):
+        # A walk over large environments can take a while; stop it rather than wait
+        if self.report_thread.isRunning():
+            self.report_thread.cancel()
+            self.report_thread.progress.disconnect()
+            self.report_thread.report_ready.disconnect()
+            self.report_thread.error_occurred.disconnect()
+            self.report_thread.finished.connect(self.deleteLater)
+        else:
+            self.deleteLater()
+        super().done(result)
@@ -0,0 +1,70 @@
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QLabel, QPushButton, QComboBox
+from PyQt5.QtCore import Qt
+
+def create_environment_bar(parent):
+    """My Python header row for picking the environment the page shows and pip installs into."""
+    bar = QWidget()
+    layout = QHBoxLayout(bar)
+    layout.setContentsMargins(0, 0, 0, 0)
+    layout.setSpacing(10)
+
+    label = QLabel("Environment:")
+    label.setStyleSheet("color: #bbb; font-size: 14px;")
+    layout.addWidget(label)
+
+    parent.environment_combo = QComboBox()
+    parent.environment_combo.setCursor(Qt.PointingHandCursor)
+    parent.environment_combo.setMinimumWidth(420)
+    parent.environment_combo.setStyleSheet("""
+        QComboBox {
+            background-color: #2a2a2a;
+            color: #ddd;
+            border: 1px solid #444;
+            border-radius: 4px;
+            padding: 6px 10px;
+            font-size: 13px;
+        }
+        QComboBox QAbstractItemView {
+            background-color: #2a2a2a;
+            color: #ddd;
+            selection-background-color: #0078d7;
+        }
+    """)
+    parent.environment_combo.activated.connect(parent.switch_environment)
+    layout.addWidget(parent.environment_combo, 1)
+
+    parent.rescan_environments_button = QPushButton("Find Environments")
+    parent.rescan_environments_button.setCursor(Qt.PointingHandCursor)
+    parent.rescan_environments_button.setStyleSheet("""
+        QPushButton {
+            padding: 6px 14px;
+            font-size: 13px;
+            background-color: #444;
+            color: white;
+            border-radius: 4px;
+            border: none;
+        }
+        QPushButton:hover {
+            background-color: #555;
+        }
+        QPushButton:disabled {
+            color: #888;
+        }
+    """)
+    parent.rescan_environments_button.clicked.connect(parent.discover_environments)
+    layout.addWidget(parent.rescan_environments_button)
+
+    # Disk usage of every known environment and what they have installed in common
+    parent.disk_usage_button = QPushButton("Disk Usage")
+    parent.disk_usage_button.setCursor(Qt.PointingHandCursor)
+    parent.disk_usage_button.setStyleSheet(parent.rescan_environments_button.styleSheet())
+    parent.disk_usage_button.clicked.connect(parent.show_disk_report)
+    layout.addWidget(parent.disk_usage_button)
+
+    # New virtual environment, populated by linking files from the wheel store
+    parent.new_environment_button = QPushButton("New Environment")
+    parent.new_environment_button.setCursor(Qt.PointingHandCursor)
+    parent.new_environment_button.setStyleSheet(parent.rescan_environments_button.styleSheet())
+    parent.new_environment_button.clicked.connect(parent.create_environment)
+    layout.addWidget(parent.new_environment_button)
+    return bar
@@ -23,7 +23,7 @@ def create_home_page(parent):
     search_layout.setSpacing(10)
     
     parent.search_box = QLineEdit()
-    parent.search_box.setPlaceholderText("Search for packages... (press Enter to search)")
+    parent.search_box.setPlaceholderText("Search for packages...")
     parent.search_box.setStyleSheet("""
         QLineEdit {
             padding: 12px 16px;
@@ -37,6 +37,7 @@ def create_home_page(parent):
             border: 1px solid #0078d7;
         }
     """)
+    parent.search_box.textEdited.connect(parent.schedule_search)
     parent.search_box.returnPressed.connect(parent.search_package)
     search_layout.addWidget(parent.search_box)
     
@@ -0,0 +1,140 @@
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QProgressBar, QCheckBox
+from PyQt5.QtCore import Qt
+
+def create_install_panel(parent):
+    """Sidebar panel showing the running install job; hidden while nothing is queued."""
+    panel = QWidget()
+    panel.setStyleSheet("""
+        QWidget {
+            background-color: #2e2e2e;
+            border: none;
+        }
+    """)
+    layout = QVBoxLayout(panel)
+    layout.setContentsMargins(12, 10, 12, 10)
+    layout.setSpacing(6)
+
+    parent.install_status_label = QLabel()
+    parent.install_status_label.setWordWrap(True)
+    parent.install_status_label.setStyleSheet("color: #ddd; font-size: 12px;")
+    layout.addWidget(parent.install_status_label)
+
+    parent.install_progress_bar = QProgressBar()
+    parent.install_progress_bar.setRange(0, 100)
+    parent.install_progress_bar.setTextVisible(False)
+    parent.install_progress_bar.setFixedHeight(6)
+    parent.install_progress_bar.setStyleSheet("""
+        QProgressBar {
+            border: none;
+            border-radius: 3px;
+            background-color: #333;
+        }
+        QProgressBar::chunk {
+            background-color: #0078d7;
+            border-radius: 3px;
+        }
+    """)
+    layout.addWidget(parent.install_progress_bar)
+
+    footer = QHBoxLayout()
+    parent.install_queue_label = QLabel()
+    parent.install_queue_label.setStyleSheet("color: #888; font-size: 11px;")
+    footer.addWidget(parent.install_queue_label)
+    footer.addStretch()
+
+    parent.install_cancel_button = QPushButton("Cancel")
+    parent.install_cancel_button.setCursor(Qt.PointingHandCursor)
+    parent.install_cancel_button.setStyleSheet("""
+        QPushButton {
+            padding: 3px 10px;
+            font-size: 12px;
+            background-color: #444;
+            color: white;
+            border-radius: 4px;
+            border: none;
+        }
+        QPushButton:hover {
+            background-color: #555;
+        }
+    """)
+    parent.install_cancel_button.clicked.connect(parent.cancel_shown_install)
+    footer.addWidget(parent.install_cancel_button)
+    layout.addLayout(footer)
+
+    panel.setVisible(False)
+    return panel
+
+
+def create_install_set_bar(parent):
+    """Sidebar bar for the packages picked in the result lists; hidden while none are."""
+    bar = QWidget()
+    bar.setStyleSheet("""
+        QWidget {
+            background-color: #2e2e2e;
+            border: none;
+        }
+    """)
+    layout = QVBoxLayout(bar)
+    layout.setContentsMargins(12, 10, 12, 10)
+    layout.setSpacing(6)
+
+    parent.install_set_label = QLabel()
+    parent.install_set_label.setStyleSheet("color: #ddd; font-size: 12px;")
+    layout.addWidget(parent.install_set_label)
+
+    buttons = QHBoxLayout()
+    review_button = QPushButton("Review && Install")
+    review_button.setCursor(Qt.PointingHandCursor)
+    review_button.setStyleSheet("""
+        QPushButton {
+            padding: 4px 10px;
+            font-size: 12px;
+            background-color: #0078d7;
+            color: white;
+            border-radius: 4px;
+            border: none;
+        }
+        QPushButton:hover {
+            background-color: #005fa3;
+        }
+    """)
+    review_button.clicked.connect(parent.review_install_set)
+    buttons.addWidget(review_button)
+
+    clear_button = QPushButton("Clear")
+    clear_button.setCursor(Qt.PointingHandCursor)
+    clear_button.setStyleSheet("""
+        QPushButton {
+            padding: 4px 10px;
+            font-size: 12px;
+            background-color: #444;
+            color: white;
+            border-radius: 4px;
+            border: none;
+        }
+        QPushButton:hover {
+            background-color: #555;
+        }
+    """)
+    clear_button.clicked.connect(parent.install_set.clear)
+    buttons.addWidget(clear_button)
+    layout.addLayout(buttons)
+
+    bar.setVisible(False)
+    return bar
+
+
+def create_offline_toggle(parent):
+    """Sidebar switch for installing only from the local wheel cache."""
+    parent.offline_checkbox = QCheckBox("Offline (cached wheels only)")
+    parent.offline_checkbox.setCursor(Qt.PointingHandCursor)
+    parent.offline_checkbox.setStyleSheet("""
+        QCheckBox {
+            color: #aaa;
+            font-size: 12px;
+            padding: 8px 12px;
+        }
+    """)
+    parent.offline_checkbox.setChecked(parent.install_manager.offline)
+    parent.offline_checkbox.toggled.connect(parent.set_offline_mode)
+    return parent.offline_checkbox
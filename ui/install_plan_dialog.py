@@ -0,0 +1,168 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QListWidget, QListWidgetItem, QProgressBar
+)
+from PyQt5.QtGui import QFont, QColor
+
+from install_plan import InstallPlanThread
+from metadata_cache import normalize_name
+
+
+class InstallPlanDialog(QDialog):
+    """Preview of everything one pip transaction would install for the install set."""
+
+    def __init__(self, install_set, install_manager, python=None, inventory=None, parent=None):
+        super().__init__(parent)
+        self.install_set = install_set
+        self.install_manager = install_manager
+        self.python = python
+        self.requirements = install_set.requirements()
+        self.plan = None
+
+        self.setWindowTitle("Install Selected Packages")
+        self.setMinimumSize(520, 460)
+        self.setStyleSheet("""
+            QDialog {
+                background-color: #1e1e1e;
+            }
+            QLabel {
+                color: white;
+            }
+            QListWidget {
+                background-color: #252525;
+                border: none;
+                border-radius: 6px;
+                color: #ddd;
+                font-size: 13px;
+                padding: 6px;
+            }
+        """)
+
+        layout = QVBoxLayout(self)
+        title = QLabel(f"Install {len(self.requirements)} selected packages")
+        title.setFont(QFont("Segoe UI", 14, QFont.Bold))
+        layout.addWidget(title)
+
+        self.status_label = QLabel("Resolving all packages together...")
+        self.status_label.setWordWrap(True)
+        self.status_label.setStyleSheet("color: #aaa;")
+        layout.addWidget(self.status_label)
+
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 0)  # Busy until pip has resolved the set
+        self.progress.setFixedHeight(6)
+        self.progress.setTextVisible(False)
+        layout.addWidget(self.progress)
+
+        self.plan_list = QListWidget()
+        layout.addWidget(self.plan_list, 1)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        cancel_button = QPushButton("Cancel")
+        cancel_button.setStyleSheet("""
+            QPushButton {
+                background-color: #333;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                padding: 8px 16px;
+            }
+            QPushButton:hover {
+                background-color: #444;
+            }
+        """)
+        cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(cancel_button)
+
+        self.install_button = QPushButton("Install")
+        self.install_button.setEnabled(False)
+        self.install_button.setStyleSheet("""
+            QPushButton {
+                background-color: #0078d7;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                padding: 8px 16px;
+            }
+            QPushButton:hover {
+                background-color: #005fa3;
+            }
+            QPushButton:disabled {
+                background-color: #444;
+                color: #aaa;
+            }
+        """)
+        self.install_button.clicked.connect(self.install)
+        button_layout.addWidget(self.install_button)
+        layout.addLayout(button_layout)
+
+        # Show what was picked while pip resolves
+        for requirement in self.requirements:
+            self.plan_list.addItem(requirement)
+
+        self.plan_thread = InstallPlanThread(
+            self.requirements, python, inventory, install_manager.offline, install_manager.wheel_store
+        )
+        self.plan_thread.plan_ready.connect(self.show_plan)
+        self.plan_thread.error_occurred.connect(self.show_plan_error)
+        self.plan_thread.start()
+
+    def show_plan(self, plan):
+        self.plan = plan
+        self.progress.setVisible(False)
+        self.plan_list.clear()
+
+        for item in plan.items:
+            kind = "selected" if item.requested else "dependency"
+            row = QListWidgetItem(f"{item.name} {item.version}    ({kind})")
+            if not item.requested:
+                row.setForeground(QColor("#999999"))
+            if item.required_by:
+                row.setToolTip(f"Required by {', '.join(item.required_by)}")
+            elif item.url:
+                row.setToolTip(item.url)
+            self.plan_list.addItem(row)
+
+        planned = {normalize_name(item.name) for item in plan.requested}
+        satisfied = [name for name in self.requirements if normalize_name(name) not in planned]
+
+        if not plan.items:
+            self.status_label.setText("Everything selected is already installed.")
+            return
+
+        summary = (
+            f"{len(plan.items)} packages will be installed in one pip run: "
+            f"{len(plan.requested)} selected and {len(plan.dependencies)} dependencies."
+        )
+        if satisfied:
+            summary += f" Already installed: {', '.join(satisfied)}."
+        self.status_label.setText(summary)
+        self.install_button.setEnabled(True)
+
+    def show_plan_error(self, message):
+        # Without a preview (e.g. pip older than 22.2) the set can still go in one pip run
+        self.progress.setVisible(False)
+        if self.install_manager.offline:
+            message += " (offline mode: only cached wheels can be installed)"
+        self.status_label.setText(f"Could not preview the install: {message}")
+        self.install_button.setText("Install Anyway")
+        self.install_button.setEnabled(True)
+
+    def install(self):
+        if self.plan is not None:
+            # Exact plans come with their files, which are downloaded in parallel before pip runs
+            self.install_manager.submit(self.plan.pinned_requirements(), python=self.python, downloads=self.plan.downloads())
+        else:
+            self.install_manager.submit(self.requirements, python=self.python)
+        self.install_set.clear()
+        self.accept()
+
+    def done(self, result):
+        # Let a still-running resolution finish before the dialog goes away
+        if self.plan_thread.isRunning():
+            self.plan_thread.plan_ready.disconnect()
+            self.plan_thread.error_occurred.disconnect()
+            self.plan_thread.finished.connect(self.deleteLater)
+        else:
+            self.deleteLater()
+        super().done(result)
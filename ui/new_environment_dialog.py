@@ -0,0 +1,178 @@
+import os
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QPushButton, QLineEdit, QComboBox, QRadioButton,
+    QPlainTextEdit, QFileDialog
+)
+from PyQt5.QtGui import QFont
+
+from env_builder import submit_environment
+from interpreters import describe, short_path, virtualenv_home
+
+
+class NewEnvironmentDialog(QDialog):
+    """Create a virtual environment whose packages are linked from PyPackManager's wheel store."""
+
+    def __init__(self, install_manager, interpreters, source_packages=None, source_name="", parent=None):
+        super().__init__(parent)
+        self.install_manager = install_manager
+        self.source_packages = list(source_packages or [])
+        self.job = None
+
+        self.setWindowTitle("New Environment")
+        self.setMinimumSize(560, 480)
+        self.setStyleSheet("""
+            QDialog {
+                background-color: #1e1e1e;
+            }
+            QLabel, QRadioButton {
+                color: white;
+            }
+            QLineEdit, QComboBox, QPlainTextEdit {
+                background-color: #252525;
+                color: #ddd;
+                border: 1px solid #444;
+                border-radius: 4px;
+                padding: 6px;
+                font-size: 13px;
+            }
+            QComboBox QAbstractItemView {
+                background-color: #2a2a2a;
+                color: #ddd;
+                selection-background-color: #0078d7;
+            }
+        """)
+
+        layout = QVBoxLayout(self)
+        title = QLabel("New environment")
+        title.setFont(QFont("Segoe UI", 14, QFont.Bold))
+        layout.addWidget(title)
+
+        description = QLabel(
+            "Packages are linked from the wheel store instead of being copied, so an environment "
+            "with packages you already have takes seconds and almost no disk space."
+        )
+        description.setWordWrap(True)
+        description.setStyleSheet("color: #aaa;")
+        layout.addWidget(description)
+
+        form = QGridLayout()
+        form.setHorizontalSpacing(10)
+        form.addWidget(QLabel("Name:"), 0, 0)
+        self.name_edit = QLineEdit()
+        self.name_edit.setPlaceholderText("e.g. ml-experiments")
+        self.name_edit.textChanged.connect(self.update_location)
+        form.addWidget(self.name_edit, 0, 1)
+
+        form.addWidget(QLabel("Folder:"), 1, 0)
+        self.folder = virtualenv_home()
+        self.location_label = QLabel()
+        self.location_label.setStyleSheet("color: #aaa;")
+        form.addWidget(self.location_label, 1, 1)
+        browse_button = QPushButton("Browse...")
+        browse_button.clicked.connect(self.choose_folder)
+        form.addWidget(browse_button, 1, 2)
+
+        form.addWidget(QLabel("Python:"), 2, 0)
+        self.python_combo = QComboBox()
+        # Base installations first; a virtual environment's python creates one from its base too
+        for interpreter in sorted(interpreters, key=lambda i: i.kind == "venv"):
+            self.python_combo.addItem(describe(interpreter), interpreter.path)
+        form.addWidget(self.python_combo, 2, 1, 1, 2)
+        layout.addLayout(form)
+
+        self.copy_radio = QRadioButton(f"Same packages as {source_name} ({len(self.source_packages)})")
+        self.copy_radio.setEnabled(bool(self.source_packages))
+        layout.addWidget(self.copy_radio)
+        self.list_radio = QRadioButton("These packages (one requirement per line):")
+        layout.addWidget(self.list_radio)
+        self.requirements_edit = QPlainTextEdit()
+        self.requirements_edit.setPlaceholderText("numpy\npandas>=2.0")
+        self.requirements_edit.textChanged.connect(lambda: self.list_radio.setChecked(True))
+        layout.addWidget(self.requirements_edit, 1)
+        self.empty_radio = QRadioButton("Only pip")
+        layout.addWidget(self.empty_radio)
+        (self.copy_radio if self.source_packages else self.empty_radio).setChecked(True)
+
+        self.status_label = QLabel()
+        self.status_label.setWordWrap(True)
+        self.status_label.setStyleSheet("color: #e06c75;")
+        layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        cancel_button = QPushButton("Cancel")
+        cancel_button.setStyleSheet("""
+            QPushButton {
+                background-color: #333;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                padding: 8px 16px;
+            }
+            QPushButton:hover {
+                background-color: #444;
+            }
+        """)
+        browse_button.setStyleSheet(cancel_button.styleSheet())
+        cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(cancel_button)
+
+        self.create_button = QPushButton("Create")
+        self.create_button.setStyleSheet("""
+            QPushButton {
+                background-color: #0078d7;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                padding: 8px 16px;
+            }
+            QPushButton:hover {
+                background-color: #005fa3;
+            }
+            QPushButton:disabled {
+                background-color: #444;
+                color: #aaa;
+            }
+        """)
+        self.create_button.clicked.connect(self.create)
+        button_layout.addWidget(self.create_button)
+        layout.addLayout(button_layout)
+        self.update_location()
+
+    def location(self):
+        return os.path.join(self.folder, self.name_edit.text().strip())
+
+    def update_location(self):
+        name = self.name_edit.text().strip()
+        self.location_label.setText(short_path(self.location()) if name else short_path(self.folder) + os.sep)
+        self.create_button.setEnabled(bool(name) and self.python_combo.count() > 0)
+        self.status_label.setText("")
+
+    def choose_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Create the environment in", self.folder)
+        if folder:
+            self.folder = folder
+            self.update_location()
+
+    def requirements(self):
+        if self.copy_radio.isChecked():
+            # Pinned, so the new environment matches the shown one
+            return [
+                f"{package['name']}=={package['version']}" for package in self.source_packages
+                if package.get("version") not in (None, "Unknown")
+            ]
+        if self.list_radio.isChecked():
+            lines = (line.split("#")[0].strip() for line in self.requirements_edit.toPlainText().splitlines())
+            return [line for line in lines if line]
+        return []
+
+    def create(self):
+        location = self.location()
+        if os.path.exists(location) and os.listdir(location):
+            self.status_label.setText(f"{short_path(location)} already exists.")
+            return
+        self.job = submit_environment(
+            self.install_manager, location, self.python_combo.currentData(), self.requirements()
+        )
+        self.accept()
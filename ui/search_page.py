@@ -1,7 +1,9 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QScrollArea
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QListView, QLineEdit
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
 
+from package_list import PackageListModel, PackageCardDelegate
+
 def create_search_results_page(parent):
     page = QWidget()
     layout = QVBoxLayout(page)
@@ -25,7 +27,32 @@ def create_search_results_page(parent):
         }
     """)
     back_button.clicked.connect(parent.go_back_to_home)
-    layout.addWidget(back_button, 0, Qt.AlignLeft)
+    
+    # Search box so typing can continue after leaving the home page
+    top_layout = QHBoxLayout()
+    top_layout.setSpacing(10)
+    top_layout.addWidget(back_button)
+    
+    parent.results_search_box = QLineEdit()
+    parent.results_search_box.setPlaceholderText("Search for packages...")
+    parent.results_search_box.setStyleSheet("""
+        QLineEdit {
+            padding: 8px 16px;
+            font-size: 14px;
+            border-radius: 6px;
+            background-color: #2a2a2a;
+            color: white;
+            border: 1px solid #3a3a3a;
+        }
+        QLineEdit:focus {
+            border: 1px solid #0078d7;
+        }
+    """)
+    parent.results_search_box.textEdited.connect(parent.schedule_search)
+    parent.results_search_box.returnPressed.connect(parent.search_package)
+    top_layout.addWidget(parent.results_search_box, 1)
+    
+    layout.addLayout(top_layout)
 
     # Search results title
     parent.search_results_title = QLabel("Search Results")
@@ -33,14 +60,37 @@ def create_search_results_page(parent):
     parent.search_results_title.setStyleSheet("background-color: transparent; margin-bottom: 20px;")
     layout.addWidget(parent.search_results_title)
     
-    # Search results container with scroll
-    search_scroll = QScrollArea()
-    search_scroll.setWidgetResizable(True)
-    search_scroll.setFrameShape(QScrollArea.NoFrame)  # Remove frame
-    search_scroll.setStyleSheet("""
-        QScrollArea {
+    # Status message for the loading, empty and error states
+    parent.search_status_label = QLabel("Start typing to find packages")
+    parent.search_status_label.setAlignment(Qt.AlignCenter)
+    parent.search_status_label.setStyleSheet("color: #888; padding: 40px; background-color: #2a2a2a; border-radius: 8px;")
+    layout.addWidget(parent.search_status_label)
+    
+    # Search results list: rows are painted by a delegate, and their
+    # details are loaded as they scroll into view
+    parent.search_results_model = PackageListModel(parent=page)
+    parent.search_results_model.details_needed.connect(parent.load_search_result_details)
+    
+    parent.search_results_delegate = PackageCardDelegate(page, install_set=parent.install_set)
+    parent.search_results_delegate.package_clicked.connect(parent.show_library_detail)
+    parent.search_results_delegate.install_clicked.connect(parent.install_package)
+    
+    parent.search_results_view = QListView()
+    parent.search_results_view.setModel(parent.search_results_model)
+    parent.search_results_view.setItemDelegate(parent.search_results_delegate)
+    parent.install_set.changed.connect(parent.search_results_view.viewport().update)
+    parent.search_results_view.setUniformItemSizes(True)
+    parent.search_results_view.setMouseTracking(True)  # For hover highlighting
+    parent.search_results_view.entered.connect(parent.prefetch_search_result_detail)
+    parent.search_results_view.setSelectionMode(QListView.NoSelection)
+    parent.search_results_view.setVerticalScrollMode(QListView.ScrollPerPixel)
+    parent.search_results_view.setFrameShape(QListView.NoFrame)
+    parent.search_results_view.viewport().setCursor(Qt.PointingHandCursor)
+    parent.search_results_view.setStyleSheet("""
+        QListView {
             border: none;
             background: transparent;
+            outline: none;
         }
         QScrollBar:vertical {
             border: none;
@@ -57,21 +107,6 @@ def create_search_results_page(parent):
             height: 0px;
         }
     """)
-    
-    parent.search_results_container = QWidget()
-    parent.search_results_container.setStyleSheet("background-color: transparent;")
-    parent.search_results_layout = QVBoxLayout(parent.search_results_container)
-    parent.search_results_layout.setContentsMargins(0, 0, 0, 0)
-    parent.search_results_layout.setSpacing(12)
-    parent.search_results_layout.setAlignment(Qt.AlignTop)
-    
-    # Placeholder for search results
-    parent.search_results_placeholder = QLabel("Enter a search term and press Enter to find packages")
-    parent.search_results_placeholder.setAlignment(Qt.AlignCenter)
-    parent.search_results_placeholder.setStyleSheet("color: #888; padding: 40px; background-color: #2a2a2a; border-radius: 8px;")
-    parent.search_results_layout.addWidget(parent.search_results_placeholder)
-    
-    search_scroll.setWidget(parent.search_results_container)
-    layout.addWidget(search_scroll, 1)
+    layout.addWidget(parent.search_results_view, 1)
     
     return page
@@ -0,0 +1,92 @@
+import re
+from functools import lru_cache
+
+# PEP 440 versions, with the alternative spellings it allows
+VERSION_PATTERN = re.compile(r"""
+    ^\s*v?
+    (?:(?P<epoch>[0-9]+)!)?
+    (?P<release>[0-9]+(?:\.[0-9]+)*)
+    (?:[-_.]?(?P<pre_label>a|b|c|rc|alpha|beta|pre|preview)[-_.]?(?P<pre_number>[0-9]+)?)?
+    (?:-(?P<post_implicit>[0-9]+)|[-_.]?(?P<post_label>post|rev|r)[-_.]?(?P<post_number>[0-9]+)?)?
+    (?:[-_.]?(?P<dev_label>dev)[-_.]?(?P<dev_number>[0-9]+)?)?
+    (?:\+(?P<local>[a-z0-9]+(?:[-_.][a-z0-9]+)*))?
+    \s*$
+""", re.VERBOSE | re.IGNORECASE)
+
+PRE_PHASES = {"a": 0, "alpha": 0, "b": 1, "beta": 1, "c": 2, "rc": 2, "pre": 2, "preview": 2}
+FINAL_PHASE = 3
+DEV_ONLY_PHASE = -1  # 1.0.dev1 sorts before 1.0a1
+PLAIN_RELEASE = re.compile(r"[0-9]+(?:\.[0-9]+)*$")
+FINAL_KEY = (FINAL_PHASE, 0)
+NO_DEV_KEY = (1, 0)
+NO_LOCAL_KEY = (0, ())
+
+
+@lru_cache(maxsize=65536)
+def version_key(version):
+    """A tuple that sorts version strings in PEP 440 order.
+
+    Handles epochs, pre-, post- and dev-releases and local versions, so
+    "1.0.dev1" < "1.0a1" < "1.0" < "1.0.post1" < "1.0+local" < "10.0".
+    Strings that aren't valid versions sort before all valid ones, by
+    text. Keys are cached, so sorting the same releases again is cheap.
+    """
+    if PLAIN_RELEASE.match(version):
+        # Most versions are just numbers and dots
+        release = tuple(map(int, version.split(".")))
+        while len(release) > 1 and release[-1] == 0:
+            release = release[:-1]
+        return (1, 0, release, FINAL_KEY, -1, NO_DEV_KEY, NO_LOCAL_KEY)
+
+    match = VERSION_PATTERN.match(version)
+    if match is None:
+        return (0, version)
+
+    release = tuple(int(part) for part in match.group("release").split("."))
+    while len(release) > 1 and release[-1] == 0:
+        release = release[:-1]  # 1.0 == 1.0.0
+
+    post = match.group("post_implicit") or match.group("post_number")
+    has_post = post is not None or match.group("post_label") is not None
+    has_dev = match.group("dev_label") is not None
+
+    if match.group("pre_label"):
+        pre = (PRE_PHASES[match.group("pre_label").lower()], int(match.group("pre_number") or 0))
+    elif has_dev and not has_post:
+        pre = (DEV_ONLY_PHASE, 0)
+    else:
+        pre = FINAL_KEY
+
+    local = ()
+    if match.group("local"):
+        # Numeric segments sort after alphanumeric ones
+        local = tuple(
+            (1, int(part), "") if part.isdigit() else (0, 0, part.lower())
+            for part in re.split(r"[-_.]", match.group("local"))
+        )
+
+    return (
+        1,
+        int(match.group("epoch") or 0),
+        release,
+        pre,
+        int(post or 0) if has_post else -1,
+        (0, int(match.group("dev_number") or 0)) if has_dev else NO_DEV_KEY,
+        (1, local) if local else NO_LOCAL_KEY,
+    )
+
+
+def sort_versions(versions, newest_first=True):
+    """Return the version strings sorted in PEP 440 order, newest first by default."""
+    return sorted(versions, key=version_key, reverse=newest_first)
+
+
+def version_greater(version1, version2):
+    """True if version1 is a newer release than version2."""
+    return version_key(version1) > version_key(version2)
+
+
+def is_prerelease(version):
+    """True for alpha, beta, release candidate and dev releases (and invalid versions)."""
+    key = version_key(version)
+    return key[0] == 0 or key[3][0] != FINAL_PHASE or key[5][0] == 0
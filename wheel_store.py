@@ -0,0 +1,224 @@
+import html
+import os
+import pathlib
+import shutil
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from app_paths import data_dir
+from downloader import file_sha256
+from metadata_cache import normalize_name
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # Least recently used files are evicted above this
+INDEX_FILE = "find-links.html"
+
+
+def parse_archive_name(filename):
+    """(normalized name, version) from a wheel or sdist file name, or (None, None)."""
+    if filename.endswith(".whl"):
+        parts = filename[:-4].split("-")
+        if len(parts) >= 5:
+            return normalize_name(parts[0]), parts[1]
+    else:
+        for extension in (".tar.gz", ".zip", ".tar.bz2", ".tgz"):
+            if filename.endswith(extension):
+                name, _, version = filename[:-len(extension)].rpartition("-")
+                if name:
+                    return normalize_name(name), version
+    return None, None
+
+
+class WheelStore:
+    """Content-addressed cache of downloaded wheels (and sdists), kept between runs.
+
+    Files are stored once per sha256 as ``<root>/<sha[:2]>/<sha>/<filename>``
+    (pip needs the real file name to install a wheel) and indexed in SQLite
+    with their size and last use. When the store grows past ``max_bytes``
+    the least recently used files are evicted, except those held by a
+    running install. ``find_links()`` returns an HTML page listing every
+    stored file, for ``pip install --find-links`` (and ``--no-index`` to
+    install from the cache only).
+    """
+
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root or data_dir("wheels")
+        os.makedirs(self.root, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._held = Counter()  # sha256 -> installs using the file right now
+        self._index_stale = True
+        self._db = sqlite3.connect(os.path.join(self.root, "index.sqlite3"), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS wheels (
+                sha256 TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                name TEXT,
+                version TEXT,
+                size INTEGER NOT NULL,
+                added_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS wheels_name ON wheels (name, version);
+            CREATE INDEX IF NOT EXISTS wheels_used_at ON wheels (used_at);
+        """)
+        self._db.commit()
+
+    def path_for(self, sha256, filename):
+        return os.path.join(self.root, sha256[:2], sha256, filename)
+
+    def get(self, sha256):
+        """Path of the stored file with this hash (marking it as used), or None."""
+        sha256 = sha256.lower()
+        with self._lock:
+            row = self._db.execute("SELECT filename, size FROM wheels WHERE sha256 = ?", (sha256,)).fetchone()
+            if row is None:
+                return None
+            path = self.path_for(sha256, row[0])
+            try:
+                intact = os.path.getsize(path) == row[1]
+            except OSError:
+                intact = False
+            if not intact:
+                # Deleted or truncated behind our back
+                self._forget(sha256)
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE wheels SET used_at = ? WHERE sha256 = ?", (time.time(), sha256))
+            self._db.commit()
+            return path
+
+    def add(self, path, sha256=None, filename=None):
+        """Move a verified file into the store and return its new path.
+
+        ``sha256`` is computed when not given. Adding a file that is
+        already stored just drops the new copy.
+        """
+        filename = filename or os.path.basename(path)
+        sha256 = (sha256 or file_sha256(path)).lower()
+        existing = self.get(sha256)
+        if existing is not None:
+            if os.path.abspath(path) != os.path.abspath(existing):
+                _remove(path)
+            return existing
+
+        target = self.path_for(sha256, filename)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.replace(path, target)
+        except OSError:
+            shutil.move(path, target)  # Different drive than the downloads folder
+        name, version = parse_archive_name(filename)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO wheels VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (sha256, filename, name, version, os.path.getsize(target), now, now),
+            )
+            self._db.commit()
+            self._index_stale = True
+        self.evict()
+        return target
+
+    def hash_of(self, path):
+        """sha256 of a file returned by get()/add()/find(), from where it is stored."""
+        return os.path.basename(os.path.dirname(path))
+
+    def hashes(self):
+        with self._lock:
+            return {row[0] for row in self._db.execute("SELECT sha256 FROM wheels")}
+
+    def find(self, name, version=None):
+        """Paths of the stored files for a project (and version), most recently used first."""
+        query = "SELECT sha256, filename FROM wheels WHERE name = ?"
+        args = [normalize_name(name)]
+        if version is not None:
+            query += " AND version = ?"
+            args.append(version)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY used_at DESC", args).fetchall()
+        return [self.path_for(sha256, filename) for sha256, filename in rows]
+
+    def usage(self):
+        """(number of files, total bytes) in the store."""
+        with self._lock:
+            count, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM wheels").fetchone()
+        return count, size
+
+    def hold(self, hashes):
+        """Protect files from eviction while an install uses them; pair with release()."""
+        with self._lock:
+            self._held.update(sha256.lower() for sha256 in hashes)
+
+    def release(self, hashes):
+        with self._lock:
+            self._held.subtract(sha256.lower() for sha256 in hashes)
+            self._held += Counter()  # Drop the ones no longer held
+
+    def evict(self, max_bytes=None):
+        """Delete least recently used files until the store fits in ``max_bytes``; returns bytes freed."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        freed = 0
+        with self._lock:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM wheels").fetchone()[0]
+            if total <= limit:
+                return 0
+            for sha256, size in self._db.execute("SELECT sha256, size FROM wheels ORDER BY used_at").fetchall():
+                if total <= limit:
+                    break
+                if self._held[sha256]:
+                    continue
+                self._forget(sha256)
+                total -= size
+                freed += size
+            self._db.commit()
+            self._index_stale = True
+        return freed
+
+    def clear(self):
+        return self.evict(0)
+
+    def find_links(self):
+        """Path of an HTML page linking every stored file, for pip's --find-links."""
+        path = os.path.join(self.root, INDEX_FILE)
+        with self._lock:
+            if not self._index_stale and os.path.exists(path):
+                return path
+            rows = self._db.execute("SELECT sha256, filename FROM wheels ORDER BY filename").fetchall()
+            links = []
+            for sha256, filename in rows:
+                uri = pathlib.Path(self.path_for(sha256, filename)).resolve().as_uri()
+                links.append(f'<a href="{html.escape(uri)}#sha256={sha256}">{html.escape(filename)}</a><br>')
+            temp_path = path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write("<!DOCTYPE html>\n<html><body>\n" + "\n".join(links) + "\n</body></html>\n")
+            os.replace(temp_path, path)
+            self._index_stale = False
+        return path
+
+    def _forget(self, sha256):
+        # Callers hold the lock and commit
+        self._db.execute("DELETE FROM wheels WHERE sha256 = ?", (sha256,))
+        shutil.rmtree(os.path.join(self.root, sha256[:2], sha256), ignore_errors=True)
+        self._index_stale = True
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def shared_wheel_store():
+    """Return the process-wide WheelStore, creating it on first use."""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = WheelStore()
+        return _shared_store